@@ -0,0 +1,134 @@
+"""
+对比 full 与 lean 浏览器配置的抓取吞吐量（每分钟页面数）和峰值内存（chromedriver 及所有 Chrome 子进程的 RSS 之和）
+
+页面来自本地 fixture_server.py，不访问外网。峰值内存需要 psutil（pip install psutil），未安装时只统计吞吐量。
+
+用法示例:
+    python bench_profiles.py --pages 50 --asset-delay 30
+    python bench_profiles.py --pages 50 --headless      # 无图形界面的环境中 full 配置也使用无头模式
+"""
+import argparse
+import json
+import threading
+import time
+from urllib.parse import quote_plus
+
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_profiles import PROFILES, create_driver
+from driver_bootstrap import get_driver_path
+from fixture_server import start_fixture_server
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class RssSampler:
+    def __init__(self, pid, interval=0.1):
+        """
+        后台采样进程树的内存占用
+
+        :param pid: 根进程（chromedriver）的 PID
+        :param interval: 采样间隔（秒）
+        """
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.peak
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                root = psutil.Process(self.pid)
+                total = 0
+                for process in [root] + root.children(recursive=True):
+                    try:
+                        total += process.memory_info().rss
+                    except psutil.Error:
+                        pass
+                self.peak = max(self.peak, total)
+            except psutil.Error:
+                pass
+            self._stopped.wait(self.interval)
+
+
+def run_profile(profile, base_url, pages, driver_path, headless=None):
+    """
+    使用一个浏览器依次抓取 pages 个搜索结果页
+
+    :return: 统计结果
+    """
+    overrides = {'headless': headless} if headless is not None else {}
+    started = time.perf_counter()
+    driver = create_driver(profile, service=Service(driver_path), **overrides)
+    startup = time.perf_counter() - started
+
+    sampler = RssSampler(driver.service.process.pid).start() if psutil is not None else None
+    titles = 0
+    try:
+        started = time.perf_counter()
+        for index in range(pages):
+            driver.get(f"{base_url}/s?wd={quote_plus(f'{profile} {index}')}")
+            WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, '#content_left h3')))
+            titles += len(driver.find_elements(By.CSS_SELECTOR, 'h3'))
+        elapsed = time.perf_counter() - started
+    finally:
+        peak_rss = sampler.stop() if sampler is not None else None
+        driver.quit()
+
+    return {
+        'profile': profile,
+        'pages': pages,
+        'titles': titles,
+        'startupSeconds': round(startup, 3),
+        'elapsedSeconds': round(elapsed, 3),
+        'pagesPerMinute': round(pages / elapsed * 60, 1),
+        'peakRssMb': round(peak_rss / 1024 / 1024, 1) if peak_rss else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比浏览器配置的抓取吞吐量与内存占用')
+    parser.add_argument('--pages', type=int, default=30, help='每个配置抓取的页面数')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['full', 'lean'])
+    parser.add_argument('--images', type=int, default=20, help='每个页面的图片数量')
+    parser.add_argument('--asset-delay', type=float, default=20.0, help='图片、字体等子资源的延迟（毫秒）')
+    parser.add_argument('--headless', action='store_true', help='所有配置都使用无头模式（无图形界面的环境）')
+    parser.add_argument('--json', help='将结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    server = start_fixture_server(images=args.images, asset_delay=args.asset_delay / 1000.0)
+    base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    driver_path = get_driver_path()
+
+    results = []
+    for profile in args.profiles:
+        result = run_profile(profile, base_url, args.pages, driver_path, headless=True if args.headless else None)
+        results.append(result)
+        peak = f"{result['peakRssMb']} MB" if result['peakRssMb'] is not None else '未统计 (需要 psutil)'
+        print(f"{profile:>5}: {result['pagesPerMinute']:>7} 页/分钟  峰值内存 {peak}  "
+              f"启动 {result['startupSeconds']}s  共 {result['elapsedSeconds']}s")
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
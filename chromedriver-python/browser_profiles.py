@@ -0,0 +1,153 @@
+"""
+浏览器配置：full 为完整的可见浏览器（与示例脚本一致），lean 为只读取页面文本的精简无头浏览器
+
+lean 配置：
+    - 无头模式、较小的窗口
+    - 不加载图片、样式表、字体
+    - 通过 CDP Network.setBlockedURLs 按网址模式屏蔽广告与统计脚本
+    - 页面加载策略 eager：DOM 解析完成即返回，不等待图片等子资源
+
+用法示例:
+    from browser_profiles import create_driver
+    driver = create_driver('lean')
+"""
+from selenium import webdriver
+
+from driver_bootstrap import create_service
+
+# 默认屏蔽的广告与统计网址模式（Network.setBlockedURLs 支持 * 通配符）；图片、样式表、字体由对应开关屏蔽
+DEFAULT_BLOCKED_PATTERNS = [
+    '*googlesyndication.com*', '*doubleclick.net*', '*google-analytics.com*', '*googletagmanager.com*',
+    '*hm.baidu.com*', '*pos.baidu.com*', '*/ads/*'
+]
+
+PROFILES = {
+    'full': {
+        'headless': False,
+        'window_size': None,
+        'block_images': False,
+        'block_css': False,
+        'block_fonts': False,
+        'blocked_patterns': [],
+        'page_load_strategy': 'normal'
+    },
+    'lean': {
+        'headless': True,
+        'window_size': '800,600',
+        'block_images': True,
+        'block_css': True,
+        'block_fonts': True,
+        'blocked_patterns': DEFAULT_BLOCKED_PATTERNS,
+        'page_load_strategy': 'eager'
+    }
+}
+
+
+def profile_settings(profile='lean', **overrides):
+    """
+    获取配置项，可覆盖其中的任意项
+
+    :param profile: full / lean
+    :param overrides: 覆盖的配置项，如 headless=False、blocked_patterns=[...]
+    :return: 配置字典
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"未知的浏览器配置: {profile}")
+    unknown = set(overrides) - set(PROFILES[profile])
+    if unknown:
+        raise ValueError(f"未知的配置项: {', '.join(sorted(unknown))}")
+    settings = dict(PROFILES[profile])
+    settings.update(overrides)
+    return settings
+
+
+def build_options(settings):
+    """
+    根据配置生成 ChromeOptions
+
+    :param settings: profile_settings() 返回的配置
+    :return: ChromeOptions
+    """
+    options = webdriver.ChromeOptions()
+    options.page_load_strategy = settings['page_load_strategy']
+    if settings['headless']:
+        options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
+    if settings['window_size']:
+        options.add_argument(f"--window-size={settings['window_size']}")
+
+    # 2 表示禁止；图片在渲染进程中直接跳过，不发出请求
+    content_settings = {}
+    if settings['block_images']:
+        content_settings['images'] = 2
+        options.add_argument('--blink-settings=imagesEnabled=false')
+    if settings['block_css']:
+        content_settings['stylesheets'] = 2
+    if content_settings:
+        options.add_experimental_option('prefs', {
+            f'profile.managed_default_content_settings.{name}': value
+            for name, value in content_settings.items()
+        })
+
+    if settings['headless']:
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--mute-audio')
+    return options
+
+
+def extension_patterns(*extensions):
+    """
+    按扩展名生成网址模式：扩展名位于网址结尾或查询参数之前
+
+    不使用 "*.png*"，否则 "/a.pngview"、"/view?file=a.png&page=2" 这类页面本身也会被屏蔽；
+    setBlockedURLs 只支持 * 通配符，查询参数的值恰好以扩展名结尾（如 "/view?file=a.png"）时仍会匹配。
+    """
+    patterns = []
+    for extension in extensions:
+        patterns += [f'*.{extension}', f'*.{extension}?*']
+    return patterns
+
+
+def blocked_patterns(settings):
+    """
+    汇总需要通过 CDP 屏蔽的网址模式（图片 / 样式表 / 字体开关同样以网址模式补充屏蔽）
+    """
+    patterns = list(settings['blocked_patterns'])
+    if settings['block_images']:
+        patterns += extension_patterns('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico')
+    if settings['block_css']:
+        patterns += extension_patterns('css')
+    if settings['block_fonts']:
+        patterns += extension_patterns('woff', 'woff2', 'ttf', 'otf')
+    # 去重并保持顺序
+    return list(dict.fromkeys(patterns))
+
+
+def apply_blocking(driver, patterns):
+    """
+    通过 CDP 屏蔽匹配的请求
+
+    :param driver: Chrome WebDriver
+    :param patterns: 网址模式列表
+    """
+    if not patterns:
+        return
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+
+def create_driver(profile='lean', service=None, **overrides):
+    """
+    按配置启动 Chrome
+
+    :param profile: full / lean
+    :param service: chromedriver Service，默认使用 driver_bootstrap 缓存的 chromedriver
+    :param overrides: 覆盖的配置项，见 PROFILES
+    :return: Chrome WebDriver
+    """
+    settings = profile_settings(profile, **overrides)
+    driver = webdriver.Chrome(service=service or create_service(), options=build_options(settings))
+    apply_blocking(driver, blocked_patterns(settings))
+    return driver
@@ -0,0 +1,168 @@
+"""
+chromedriver 路径缓存：重复运行时直接使用上次解析到的 chromedriver，只有本机 Chrome 升级（主版本不一致）时才联网下载
+
+用法示例:
+    from driver_bootstrap import create_service
+    driver = webdriver.Chrome(service=create_service())
+
+环境变量:
+    CHROMEDRIVER_OFFLINE=1   离线模式，从不联网：使用缓存或 PATH 中的 chromedriver
+    CHROMEDRIVER_CACHE       缓存文件路径，默认 ~/.cache/chromedriver-python/driver.json
+"""
+import json
+import os
+import plistlib
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+from selenium.webdriver.chrome.service import Service
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'chromedriver-python', 'driver.json')
+
+VERSION_PATTERN = re.compile(r'(\d+)\.(\d+)\.(\d+)\.(\d+)')
+
+
+class DriverNotAvailableError(Exception):
+    """离线模式下没有可用的 chromedriver"""
+
+
+def local_chrome_version():
+    """
+    读取本机安装的 Chrome 版本，优先使用注册表 / Info.plist，避免启动浏览器进程
+
+    :return: 版本号字符串，未安装或无法识别时返回 None
+    """
+    if sys.platform == 'win32':
+        import winreg
+        for root, key in ((winreg.HKEY_CURRENT_USER, r'Software\Google\Chrome\BLBeacon'),
+                          (winreg.HKEY_LOCAL_MACHINE, r'Software\Google\Chrome\BLBeacon'),
+                          (winreg.HKEY_LOCAL_MACHINE, r'Software\WOW6432Node\Google\Chrome\BLBeacon')):
+            try:
+                with winreg.OpenKey(root, key) as handle:
+                    return winreg.QueryValueEx(handle, 'version')[0]
+            except OSError:
+                continue
+        return None
+
+    if sys.platform == 'darwin':
+        plist = '/Applications/Google Chrome.app/Contents/Info.plist'
+        try:
+            with open(plist, 'rb') as f:
+                return plistlib.load(f).get('CFBundleShortVersionString')
+        except OSError:
+            return None
+
+    for name in ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'):
+        binary = shutil.which(name)
+        if binary:
+            return _binary_version(binary)
+    return None
+
+
+def driver_version(path):
+    """
+    读取 chromedriver 的版本
+
+    :param path: chromedriver 路径
+    :return: 版本号字符串，无法识别时返回 None
+    """
+    return _binary_version(path)
+
+
+def _binary_version(path):
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+def _major(version):
+    return version.split('.', 1)[0] if version else None
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cache(cache_path, entry):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # 先写临时文件再替换，多个脚本同时运行时不会读到半个文件
+    temp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(temp_path, cache_path)
+
+
+def get_driver_path(offline=None, cache_path=None):
+    """
+    获取与本机 Chrome 匹配的 chromedriver 路径
+
+    1. 缓存中的 chromedriver 存在且主版本与本机 Chrome 一致（或无法读取 Chrome 版本）时直接返回，不联网
+    2. 否则通过 ChromeDriverManager 下载，并更新缓存
+    3. 离线模式下不联网：依次使用缓存、PATH 中的 chromedriver
+
+    :param offline: 是否离线，默认读取环境变量 CHROMEDRIVER_OFFLINE
+    :param cache_path: 缓存文件路径，默认读取环境变量 CHROMEDRIVER_CACHE
+    :return: chromedriver 路径
+    :raises DriverNotAvailableError: 离线模式下找不到 chromedriver
+    """
+    if offline is None:
+        offline = os.environ.get('CHROMEDRIVER_OFFLINE', '').lower() in ('1', 'true', 'yes')
+    cache_path = cache_path or os.environ.get('CHROMEDRIVER_CACHE') or DEFAULT_CACHE_PATH
+
+    cache = _load_cache(cache_path)
+    cached_path = cache.get('path') if cache else None
+    if cached_path and not os.path.isfile(cached_path):
+        cached_path = None
+
+    chrome_version = local_chrome_version()
+    if cached_path:
+        if chrome_version is None or _major(cache.get('driverVersion')) == _major(chrome_version):
+            return cached_path
+        if offline:
+            print(f"警告: 缓存的 chromedriver {cache.get('driverVersion')} 与 Chrome {chrome_version} 版本不一致"
+                  f"（离线模式，不重新下载）", file=sys.stderr)
+            return cached_path
+
+    if offline:
+        path = shutil.which('chromedriver')
+        if path is None:
+            raise DriverNotAvailableError("离线模式下没有可用的 chromedriver，请先联网运行一次或将 chromedriver 加入 PATH")
+        return path
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    _save_cache(cache_path, {
+        'path': path,
+        'driverVersion': driver_version(path),
+        'chromeVersion': chrome_version,
+        'resolvedAt': time.strftime('%Y-%m-%dT%H:%M:%S')
+    })
+    return path
+
+
+def create_service(offline=None, **kwargs):
+    """
+    创建使用缓存 chromedriver 的 Service
+
+    :param offline: 是否离线，见 get_driver_path()
+    :return: Service
+    """
+    return Service(get_driver_path(offline=offline), **kwargs)
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    resolved = get_driver_path()
+    print(f"chromedriver: {resolved}")
+    print(f"Chrome: {local_chrome_version()}")
+    print(f"用时 {(time.perf_counter() - start) * 1000:.1f} ms")
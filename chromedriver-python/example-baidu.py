@@ -1,15 +1,14 @@
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_bootstrap import create_service
 import time
 
 # 1. 初始化驱动 (确保路径正确)
-service = Service(ChromeDriverManager().install())
+service = create_service()  # 重复运行时直接使用缓存的 chromedriver
 driver = webdriver.Chrome(service=service)
 
 try:
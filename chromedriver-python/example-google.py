@@ -1,7 +1,5 @@
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+from driver_bootstrap import create_service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,7 +7,7 @@ from selenium.webdriver.support import expected_conditions as EC
 import time
 
 # 1. 初始化驱动（确保你的 chromedriver 版本与 Chrome 一致）
-service = Service(ChromeDriverManager().install()) 
+service = create_service()  # 重复运行时直接使用缓存的 chromedriver
 driver = webdriver.Chrome(service=service)
 
 try:
@@ -0,0 +1,147 @@
+"""
+本地测试页面服务，不访问外网即可验证 scrape_runner.py
+
+用法示例:
+    python fixture_server.py --port 8765
+    python scrape_runner.py --queries a b c --url-template "http://127.0.0.1:8765/s?wd={query}" \
+        --wait-for "#content_left" --spec '{"title": "h3", "links": {"css": "h3 a", "attr": "href", "all": true}}'
+"""
+import argparse
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+RESULTS_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{query} - 搜索结果</title>
+<link rel="stylesheet" href="/static/style.css?q={quoted}">
+<script src="/ads/track.js?q={quoted}"></script>
+</head>
+<body>
+<input id="kw" name="wd" value="{query}">
+<div id="content_left">
+{results}
+</div>
+{images}
+</body>
+</html>
+"""
+
+RESULT_ITEM = '<div class="result"><h3><a href="/item/{index}?q={quoted}">{query} 第 {index} 条结果</a></h3>' \
+              '<p class="abstract">关于 {query} 的摘要 {index}</p></div>'
+
+# 模拟真实页面中的大量图片、字体和样式（带查询参数，避免浏览器缓存掩盖差异）
+RESULT_IMAGE = '<img src="/static/img/{index}.jpg?q={quoted}" width="120" height="90" alt="">'
+
+STYLE_SHEET = """@font-face {{ font-family: "Fixture"; src: url("/static/font.woff2?q={quoted}") format("woff2"); }}
+body {{ font-family: "Fixture", sans-serif; background: url("/static/bg.png?q={quoted}"); }}
+.result {{ margin: 8px 0; }}
+"""
+
+ASSET_BYTES = 64 * 1024
+
+ITEM_PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>条目 {index}</title></head>
+<body><div id="top"><a href="/">首页</a></div><h3>条目 {index}</h3><article>{body}</article></body>
+</html>
+"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type='text/html; charset=utf-8', status=200):
+        delay = self.server.delay
+        if delay:
+            time.sleep(delay)
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_asset(self, body, content_type):
+        # 子资源额外延迟，模拟图片、字体与广告服务器
+        if self.server.asset_delay:
+            time.sleep(self.server.asset_delay)
+        self._send(body, content_type)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/s':
+            # 模拟搜索结果页：结果在 #content_left 中，标题为 h3
+            raw_query = params.get('wd', [''])[0]
+            query = html.escape(raw_query)
+            quoted = quote_plus(raw_query)
+            results = '\n'.join(RESULT_ITEM.format(index=i, query=query, quoted=quoted)
+                                 for i in range(1, self.server.results + 1))
+            images = '\n'.join(RESULT_IMAGE.format(index=i, quoted=quoted) for i in range(1, self.server.images + 1))
+            self._send(RESULTS_PAGE.format(query=query, quoted=quoted, results=results, images=images))
+        elif url.path.startswith('/item/'):
+            index = html.escape(url.path.rsplit('/', 1)[-1])
+            self._send(ITEM_PAGE.format(index=index, body='内容 ' * 200))
+        elif url.path == '/static/style.css':
+            self._send_asset(STYLE_SHEET.format(quoted=quote_plus(params.get('q', [''])[0])), 'text/css')
+        elif url.path.endswith(('.jpg', '.png')):
+            self._send_asset(b'\x89PNG\r\n\x1a\n' + b'\0' * ASSET_BYTES, 'image/png')
+        elif url.path.endswith('.woff2'):
+            self._send_asset(b'wOF2' + b'\0' * ASSET_BYTES, 'font/woff2')
+        elif url.path.startswith('/ads/'):
+            self._send_asset('void 0;', 'application/javascript')
+        else:
+            self._send('<html><body><h3>fixture</h3></body></html>')
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    delay = 0.0
+    asset_delay = 0.0
+    results = 10
+    images = 20
+
+
+def start_fixture_server(host='127.0.0.1', port=0, delay=0.0, results=10, images=20, asset_delay=0.0):
+    """
+    在后台线程中启动测试页面服务
+
+    :param port: 监听端口，0 表示随机端口
+    :param delay: 每个响应的模拟延迟（秒）
+    :param results: 搜索结果页的结果条数
+    :param images: 搜索结果页的图片数量
+    :param asset_delay: 图片、样式表、字体、广告脚本的额外延迟（秒）
+    :return: 服务对象，server.server_address 为实际地址
+    """
+    server = FixtureServer((host, port), FixtureHandler)
+    server.delay = delay
+    server.results = results
+    server.images = images
+    server.asset_delay = asset_delay
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地测试页面服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='每个响应的模拟延迟（毫秒）')
+    parser.add_argument('--asset-delay', type=float, default=0.0, help='图片、字体等子资源的额外延迟（毫秒）')
+    args = parser.parse_args()
+
+    server = start_fixture_server(args.host, args.port, args.delay / 1000.0, asset_delay=args.asset_delay / 1000.0)
+    print(f"Fixture server listening on http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
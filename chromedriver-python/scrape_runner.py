@@ -0,0 +1,267 @@
+"""
+并行抓取：多个长期存活的无头 Chrome 并行处理一组查询/网址，结果逐条写入 JSONL
+
+用法示例:
+    python scrape_runner.py --queries "Python 自动化技巧" "Selenium 教程" \
+        --url-template "https://www.baidu.com/s?wd={query}" --wait-for "#content_left" \
+        --spec '{"title": "h3"}' --workers 4 --out results.jsonl
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from urllib.parse import quote_plus
+
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_profiles import PROFILES, create_driver
+from driver_bootstrap import get_driver_path
+
+
+def parse_spec(spec):
+    """
+    规范化提取规则
+
+    规则是 {字段名: CSS 选择器} 或 {字段名: {"css": 选择器, "attr": 属性名, "all": 是否取全部}}，
+    例如 {"title": "h3", "links": {"css": "h3 a", "attr": "href", "all": true}}
+    """
+    fields = {}
+    for name, rule in spec.items():
+        if isinstance(rule, str):
+            rule = {'css': rule}
+        if not rule.get('css'):
+            raise ValueError(f"提取规则缺少 css: {name}")
+        fields[name] = {'css': rule['css'], 'attr': rule.get('attr'), 'all': bool(rule.get('all'))}
+    return fields
+
+
+def extract(driver, fields):
+    """
+    按提取规则读取当前页面
+    """
+    data = {}
+    for name, rule in fields.items():
+        if rule['all']:
+            elements = driver.find_elements(By.CSS_SELECTOR, rule['css'])
+            data[name] = [_read(element, rule['attr']) for element in elements]
+        else:
+            try:
+                data[name] = _read(driver.find_element(By.CSS_SELECTOR, rule['css']), rule['attr'])
+            except NoSuchElementException:
+                data[name] = None
+    return data
+
+
+def _read(element, attr):
+    return element.get_attribute(attr) if attr else element.text
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        """
+        线程安全的 JSONL 输出，每条结果写完立即刷新，中途中断也不会丢失已完成的结果
+
+        :param path: 输出文件路径，"-" 表示标准输出
+        """
+        self._file = sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ScrapeRunner:
+    def __init__(self, fields, workers=4, driver_path=None, profile='lean', profile_overrides=None,
+                 wait_for=None, wait_timeout=10, page_load_timeout=30, max_tasks_per_driver=200):
+        """
+        初始化抓取器
+
+        :param fields: parse_spec() 规范化后的提取规则
+        :param workers: 并行的浏览器数量
+        :param driver_path: chromedriver 路径，为空时使用 driver_bootstrap 缓存的路径
+        :param profile: 浏览器配置 (full / lean)，见 browser_profiles.py
+        :param profile_overrides: 覆盖的配置项，如 {"block_css": False}
+        :param wait_for: 提取前等待出现的 CSS 选择器，为空时等待第一个提取字段
+        :param wait_timeout: 等待元素出现的超时（秒）
+        :param page_load_timeout: 页面加载超时（秒）
+        :param max_tasks_per_driver: 每个浏览器处理多少个任务后重启，避免长时间运行后内存增长
+        """
+        self.fields = fields
+        self.workers = workers
+        self.driver_path = driver_path
+        self.profile = profile
+        self.profile_overrides = profile_overrides or {}
+        self.wait_for = wait_for or next(iter(fields.values()))['css']
+        self.wait_timeout = wait_timeout
+        self.page_load_timeout = page_load_timeout
+        self.max_tasks_per_driver = max_tasks_per_driver
+
+    def run(self, tasks, writer):
+        """
+        并行处理任务，每完成一个就写入一条结果
+
+        :param tasks: [(输入, 网址)]
+        :param writer: JsonlWriter
+        :return: (成功数, 失败数)
+        """
+        if self.driver_path is None:
+            # 所有浏览器共用同一个 chromedriver，重复运行时不联网
+            self.driver_path = get_driver_path()
+
+        pending = queue.Queue()
+        for task in tasks:
+            pending.put(task)
+
+        counts = {'ok': 0, 'failed': 0}
+        counts_lock = threading.Lock()
+        threads = []
+        for index in range(min(self.workers, pending.qsize())):
+            thread = threading.Thread(target=self._work, args=(index, pending, writer, counts, counts_lock),
+                                      name=f'scrape-worker-{index}', daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return counts['ok'], counts['failed']
+
+    def _start_driver(self):
+        driver = create_driver(self.profile, service=Service(self.driver_path), **self.profile_overrides)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        return driver
+
+    def _work(self, index, pending, writer, counts, counts_lock):
+        driver = None
+        handled = 0
+        try:
+            while True:
+                try:
+                    source, url = pending.get_nowait()
+                except queue.Empty:
+                    return
+
+                record = {'input': source, 'url': url, 'worker': index}
+                start = time.perf_counter()
+                try:
+                    # 同一个浏览器处理多个任务，避免每个任务重新启动 Chrome
+                    if driver is None or handled >= self.max_tasks_per_driver:
+                        if driver is not None:
+                            driver.quit()
+                        driver = self._start_driver()
+                        handled = 0
+                    handled += 1
+
+                    driver.get(url)
+                    WebDriverWait(driver, self.wait_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, self.wait_for))
+                    )
+                    record['ok'] = True
+                    record['data'] = extract(driver, self.fields)
+                except WebDriverException as e:
+                    record['ok'] = False
+                    record['error'] = (e.msg or type(e).__name__).splitlines()[0]
+                    # 浏览器本身出错时重启，超时等页面错误继续复用
+                    if driver is not None and not _driver_alive(driver):
+                        _quit_quietly(driver)
+                        driver = None
+                except Exception as e:
+                    # chromedriver 进程退出（连接被拒绝、重试次数用尽）或提取函数出错：记为失败并换一个新的浏览器，
+                    # 不让工作线程退出而丢失剩余任务
+                    record['ok'] = False
+                    record['error'] = f'{type(e).__name__}: {e}'.splitlines()[0]
+                    if driver is not None:
+                        _quit_quietly(driver)
+                        driver = None
+                record['elapsedMs'] = round((time.perf_counter() - start) * 1000, 3)
+
+                writer.write(record)
+                with counts_lock:
+                    counts['ok' if record['ok'] else 'failed'] += 1
+        finally:
+            if driver is not None:
+                _quit_quietly(driver)
+
+
+def _driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def build_tasks(urls=(), queries=(), url_template=None):
+    """
+    将网址和查询词转换为 (输入, 网址) 列表
+    """
+    tasks = [(url, url) for url in urls]
+    if queries:
+        if not url_template:
+            raise ValueError("使用 --queries 时需要指定 --url-template")
+        tasks += [(query, url_template.format(query=quote_plus(query))) for query in queries]
+    return tasks
+
+
+def _read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并行抓取网页并输出 JSONL')
+    parser.add_argument('--urls', nargs='*', default=[], help='网址列表')
+    parser.add_argument('--urls-file', help='网址文件，每行一个')
+    parser.add_argument('--queries', nargs='*', default=[], help='查询词列表')
+    parser.add_argument('--queries-file', help='查询词文件，每行一个')
+    parser.add_argument('--url-template', help='查询词对应的网址模板，如 https://www.baidu.com/s?wd={query}')
+    parser.add_argument('--spec', default='{"title": "h3"}', help='提取规则 (JSON 字符串或 .json 文件)')
+    parser.add_argument('--wait-for', help='提取前等待出现的 CSS 选择器')
+    parser.add_argument('--workers', type=int, default=4, help='并行的浏览器数量')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='lean', help='浏览器配置')
+    parser.add_argument('--out', default='-', help='输出 JSONL 文件，默认标准输出')
+    args = parser.parse_args()
+
+    urls = args.urls + (_read_lines(args.urls_file) if args.urls_file else [])
+    queries = args.queries + (_read_lines(args.queries_file) if args.queries_file else [])
+    tasks = build_tasks(urls, queries, args.url_template)
+    if not tasks:
+        parser.error('没有需要抓取的网址或查询词')
+
+    if args.spec.endswith('.json'):
+        with open(args.spec, encoding='utf-8') as f:
+            spec = json.load(f)
+    else:
+        spec = json.loads(args.spec)
+
+    runner = ScrapeRunner(parse_spec(spec), workers=args.workers, profile=args.profile, wait_for=args.wait_for)
+    writer = JsonlWriter(args.out)
+    start = time.perf_counter()
+    try:
+        ok, failed = runner.run(tasks, writer)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"完成 {ok} 个，失败 {failed} 个，用时 {elapsed:.1f} 秒", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,316 @@
-from flask import Flask, request, jsonify, render_template, session
+from flask import Flask, request, jsonify, render_template, session, Response
+from flask.json.provider import DefaultJSONProvider
 import requests
 import os
+import sys
+import time
 import uuid
+import hashlib
+import base64
 from config import Config
-from utils.winappdriver import WinAppDriverClient
-from utils.image_utils import compress_image
+from utils.winappdriver import WinAppDriverClient, BATCH_ACTIONS
+from utils.image_utils import encode_image, process_image, IMAGE_FORMATS
+from utils.transport import configure_shared_transport
+from utils.source_diff import SourceTracker
+from utils.control_tree import ControlTreeCache, SEARCH_ATTRIBUTES, parse_attribute_list
+from utils.screen_stream import ScreenStreamer
+from utils.frame_delta import FrameDeltaEncoder
+from utils.image_pool import ImageWorkerPool, PoolBusyError, StaleFrameError
+from utils.screenshot_cache import ScreenshotCache
+from utils.session_manager import SessionManager
+from utils.warm_pool import WarmSessionPool, load_reset_hook
+from utils.node_router import NodeRouter, NoHealthyNodeError
+from utils.session_store import create_session_store
+from utils.waits import wait_for, WaitTimeoutError, WAIT_CONDITIONS
+from utils.metrics import MetricsRegistry, begin_request, end_request, record_span, span
+from utils.recorder import SessionRecorder, Replayer, RecordingError
+from utils.compression import StaticAssetCache, available_encodings, compress, content_etag, is_compressible
+from collections import Counter
+import atexit
+import threading
+import xml.etree.ElementTree as ET
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify 的序列化耗时计入当前请求的 serialize 分段"""
+    
+    def dumps(self, obj, **kwargs):
+        with span('serialize'):
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = TimedJSONProvider(app)
+
+# 所有会话共享的 HTTP 连接池
+transport = configure_shared_transport(
+    pool_size=app.config['HTTP_POOL_SIZE'],
+    connect_timeout=app.config['HTTP_CONNECT_TIMEOUT'],
+    read_timeout=app.config['HTTP_READ_TIMEOUT']
+)
+# 每个 WinAppDriver 命令的往返耗时计入当前请求的 upstream 分段
+transport.add_observer(lambda method, url, elapsed, error: record_span('upstream', elapsed))
+
+# 截图解码/编码在独立的处理池中执行，不占用请求线程
+image_pool = ImageWorkerPool(
+    workers=app.config['IMAGE_POOL_WORKERS'],
+    max_queue=app.config['IMAGE_POOL_QUEUE'],
+    mode=app.config['IMAGE_POOL_MODE']
+)
+
+# 截图结果缓存：多个页面查看同一会话时共享采集与编码结果
+screenshot_cache = ScreenshotCache(ttl=app.config['SCREENSHOT_CACHE_TTL'])
+
+# 每个会话最近一次返回的控件树，用于增量差异
+source_trackers = {}
+
+# 每个会话已解析的控件树，供检查器逐层展开与搜索
+control_trees = ControlTreeCache(max_age=app.config['TREE_CACHE_MAX_AGE'])
+
+# 每个会话的实时画面推流，多个观看者共享同一个采集循环
+screen_streamers = {}
+streamers_lock = threading.Lock()
+
+# 每个会话的帧差编码器，保存上一帧用于增量截图
+frame_encoders = {}
+
+# 会话命令录制，保存为 JSONL 供回放
+recorder = SessionRecorder(app.config['RECORDINGS_DIR'])
+atexit.register(recorder.shutdown)
+
+# 回放使用的会话（不计入 driver_sessions，避免挤掉用户的会话）
+replay_clients = {}
+replay_lock = threading.Lock()
+
+def release_session(session_id, driver_client=None, reason=None):
+    """
+    清理会话关联的数据（会话关闭、空闲超时或超出数量被回收后调用）
+    """
+    source_trackers.pop(session_id, None)
+    control_trees.invalidate(session_id)
+    frame_encoders.pop(session_id, None)
+    screenshot_cache.invalidate(session_id)
+    if recorder.is_recording(session_id):
+        recorder.stop(session_id)
+    with streamers_lock:
+        streamer = screen_streamers.pop(session_id, None)
+    if streamer is not None:
+        streamer.stop()
+
+def count_node_sessions():
+    """
+    统计每个 WinAppDriver 节点上的会话数（包括预热池中的空闲会话）
+    """
+    with replay_lock:
+        replaying = list(replay_clients.values())
+    clients = driver_sessions.clients() + warm_pool.idle_clients() + replaying
+    return Counter(driver_client.winappdriver_url for driver_client in clients)
+
+# WinAppDriver 节点路由：定期探测 /status，新会话分配到负载最低的可用节点
+node_router = NodeRouter(
+    urls=app.config['WINAPPDRIVER_URLS'],
+    transport=transport,
+    session_counter=count_node_sessions,
+    probe_interval=app.config['NODE_PROBE_INTERVAL'],
+    probe_timeout=app.config['NODE_PROBE_TIMEOUT']
+)
+
+def client_options():
+    """
+    创建 WinAppDriver 客户端时的公共参数
+    """
+    return {
+        'transport': transport,
+        'cache_size': app.config['ELEMENT_CACHE_SIZE'],
+        'cache_ttl': app.config['ELEMENT_CACHE_TTL'],
+        'snapshot_policy': app.config['SNAPSHOT_POLICY'],
+        'snapshot_max_age': app.config['SNAPSHOT_MAX_AGE']
+    }
+
+def launch_client(app_path):
+    """
+    在负载最低的节点上创建 WinAppDriver 客户端并启动应用，会话此后固定在该节点
+    """
+    node_url = node_router.acquire()
+    try:
+        driver_client = WinAppDriverClient(winappdriver_url=node_url, app_path=app_path, **client_options())
+        driver_client.start_application()
+        return driver_client
+    finally:
+        node_router.settle(node_url)
+
+# 存储会话的 WinAppDriver 客户端，空闲超时或超出数量时自动关闭（预热的会话归还到池中）；
+# 使用共享存储时，任一工作进程都可以根据存储的状态重建客户端
+driver_sessions = SessionManager(
+    idle_timeout=app.config['SESSION_TIMEOUT'],
+    max_sessions=app.config['MAX_SESSIONS'],
+    on_evict=release_session,
+    close=lambda driver_client: warm_pool.release(driver_client.app_path, driver_client),
+    store=create_session_store(app.config['SESSION_STORE']),
+    restore=lambda state: WinAppDriverClient.from_state(state, **client_options()),
+    sync_interval=app.config['SESSION_STORE_SYNC_INTERVAL']
+)
+
+reset_hook = load_reset_hook(app.config['WARM_POOL_RESET_HOOK'])
+
+def reset_client(driver_client):
+    """
+    执行重置钩子恢复应用状态，并清除客户端缓存
+    """
+    reset_hook(driver_client)
+    driver_client.reset_state()
+
+# 预热会话池：预先启动应用，创建会话时直接租用
+warm_pool = WarmSessionPool(
+    launch=launch_client,
+    apps=app.config['WARM_POOL_APPS'],
+    size=app.config['WARM_POOL_SIZE'],
+    reset_hook=reset_client if reset_hook else None
+)
+warm_pool.start()
+atexit.register(warm_pool.shutdown)
 
-# 存储会话的 WinAppDriver 客户端
-driver_sessions = {}
+def hit_ratio(hits, misses):
+    return round(hits / (hits + misses), 4) if hits + misses else 0.0
+
+def collect_metrics():
+    """
+    抓取 /metrics 时读取会话、缓存、处理池与节点的当前状态
+    
+    :return: [(名称, 类型, 说明, [(标签, 值)])]
+    """
+    sessions = driver_sessions.stats()
+    clients = driver_sessions.clients()
+    element_stats = [driver_client.element_cache.stats() for driver_client in clients]
+    element_hits = sum(stats['hits'] for stats in element_stats)
+    element_misses = sum(stats['misses'] for stats in element_stats)
+    snapshot_hits = sum(driver_client.snapshot_hits for driver_client in clients)
+    snapshot_misses = sum(driver_client.snapshot_misses for driver_client in clients)
+    screenshots = screenshot_cache.stats()
+    trees = control_trees.stats()
+    warm_apps = warm_pool.stats()['apps']
+    warm_hits = sum(stats['hits'] for stats in warm_apps.values())
+    warm_misses = sum(stats['misses'] for stats in warm_apps.values())
+    images = image_pool.stats()
+    pool = transport.stats()
+    nodes = node_router.stats()['nodes']
+    
+    return [
+        ('active_sessions', 'gauge', '当前会话数', [({}, sessions['live'])]),
+        ('sessions_evicted_total', 'counter', '被自动关闭的会话数',
+         [({'reason': 'idle'}, sessions['evictedIdle']), ({'reason': 'lru'}, sessions['evictedLru'])]),
+        ('warm_sessions_idle', 'gauge', '预热池中的空闲会话数',
+         [({'app': app_id}, stats['idle']) for app_id, stats in warm_apps.items()]),
+        # 元素缓存与快照的命中率为当前会话的累计值，会话关闭后不再计入
+        ('cache_hit_ratio', 'gauge', '缓存命中率', [
+            ({'cache': 'screenshot'}, screenshots['hitRatio']),
+            ({'cache': 'element'}, hit_ratio(element_hits, element_misses)),
+            ({'cache': 'snapshot'}, hit_ratio(snapshot_hits, snapshot_misses)),
+            ({'cache': 'warm_pool'}, hit_ratio(warm_hits, warm_misses))
+        ]),
+        ('screenshot_cache_requests_total', 'counter', '截图缓存请求数', [
+            ({'result': 'hit'}, screenshots['hits']),
+            ({'result': 'coalesced'}, screenshots['coalesced']),
+            ({'result': 'miss'}, screenshots['misses'])
+        ]),
+        ('control_tree_requests_total', 'counter', '控件树分页接口的缓存使用情况', [
+            ({'result': 'hit'}, trees['hits']),
+            ({'result': 'unchanged'}, trees['unchanged']),
+            ({'result': 'rebuild'}, trees['rebuilds'])
+        ]),
+        ('control_tree_nodes', 'gauge', '缓存的控件树节点总数', [({}, trees['nodes'])]),
+        ('image_pool_queue_depth', 'gauge', '等待处理的截图任务数', [({}, images['queueDepth'])]),
+        ('image_pool_running', 'gauge', '正在处理的截图任务数', [({}, images['running'])]),
+        ('image_pool_rejected_total', 'counter', '队列已满被拒绝的截图任务数', [({}, images['rejected'])]),
+        ('upstream_requests_total', 'counter', '发送到 WinAppDriver 的命令数', [({}, pool['requests'])]),
+        ('upstream_errors_total', 'counter', '连接失败或超时的 WinAppDriver 命令数', [({}, pool['errors'])]),
+        ('node_healthy', 'gauge', 'WinAppDriver 节点是否可用',
+         [({'node': url}, stats['healthy']) for url, stats in nodes.items()]),
+        ('node_sessions', 'gauge', '每个 WinAppDriver 节点上的会话数',
+         [({'node': url}, stats['sessions']) for url, stats in nodes.items()])
+    ]
+
+# 请求指标：每个路由的请求数与耗时直方图，以及抓取时读取的状态
+metrics = MetricsRegistry()
+metrics.add_collector(collect_metrics)
+
+@app.before_request
+def start_request_timer():
+    """开始记录请求的耗时分段"""
+    begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    """记录请求指标，并通过 Server-Timing 头返回耗时分段"""
+    spans = end_request()
+    if spans is None:
+        return response
+    total = spans.elapsed()
+    metrics.observe_request(request.endpoint or 'unmatched', request.method, response.status_code, total, spans)
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = spans.server_timing(total)
+    return response
+
+def accepted_encoding():
+    """
+    按 Accept-Encoding 选择压缩编码，未启用压缩或客户端不接受时返回 None
+    """
+    if not app.config['COMPRESSION_ENABLED']:
+        return None
+    return request.accept_encodings.best_match(available_encodings())
+
+@app.after_request
+def compress_response(response):
+    """压缩较大的文本响应（JSON、XML、脚本、样式），已压缩的图像和流式响应不处理"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding()
+    if encoding is None or (response.content_length or 0) < app.config['COMPRESSION_MIN_SIZE']:
+        return response
+    
+    with span('compress'):
+        data = compress(response.get_data(), encoding,
+                        gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+                        brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'])
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # 压缩后的内容与原始内容字节不同，强 ETag 改为弱 ETag（304 判断使用弱比较）
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.after_request
+def sync_session_state(response):
+    """请求结束后将会话状态（元素缓存、最后使用时间）写回存储，供其他工作进程使用"""
+    session_id = (request.view_args or {}).get('session_id')
+    if session_id is not None:
+        driver_sessions.sync(session_id)
+    return response
+
+# 静态文件按内容哈希生成 ETag，压缩结果只生成一次
+static_assets = StaticAssetCache(app.static_folder, min_size=app.config['COMPRESSION_MIN_SIZE'])
+
+def send_static_asset(filename):
+    """静态文件：内容未变化时返回 304，否则返回（压缩后的）文件内容"""
+    asset = static_assets.get(filename)
+    encoding = accepted_encoding()
+    encoding, data = static_assets.variant(asset, [encoding] if encoding else [])
+    
+    if request.if_none_match.contains_weak(asset.etag):
+        response = Response(status=304)
+    else:
+        response = Response(data, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(asset.etag, weak=encoding is not None)
+    response.vary.add('Accept-Encoding')
+    # 每次使用前向服务端确认，文件未修改时只需一个 304
+    response.cache_control.no_cache = True
+    return response
+
+app.view_functions['static'] = send_static_asset
 
 @app.route('/')
 def index():
@@ -30,70 +330,323 @@ def create_session():
         # 创建新的会话ID
         session_id = str(uuid.uuid4())
         
-        # 初始化 WinAppDriver 客户端
-        driver_client = WinAppDriverClient(
-            winappdriver_url=app.config['WINAPPDRIVER_URL'],
-            app_path=app_path
-        )
-        
-        # 启动应用
-        response = driver_client.start_application()
+        # 优先租用预热的会话，池中没有空闲会话时再启动应用
+        driver_client = warm_pool.lease(app_path)
+        warm = driver_client is not None
+        if not warm:
+            driver_client = launch_client(app_path)
         
         # 存储会话
-        driver_sessions[session_id] = driver_client
+        driver_sessions.add(session_id, driver_client)
         
         return jsonify({
             'sessionId': session_id,
             'status': 'success',
-            'message': 'Session created successfully'
+            'message': 'Session created successfully',
+            'warm': warm,
+            'node': driver_client.winappdriver_url
         })
+    except NoHealthyNodeError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/session/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
     """删除 WinAppDriver 会话"""
-    if session_id in driver_sessions:
-        try:
-            driver_sessions[session_id].quit()
-            del driver_sessions[session_id]
-            return jsonify({'status': 'success', 'message': 'Session deleted'})
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    else:
+    try:
+        driver_sessions.remove(session_id)
+        return jsonify({'status': 'success', 'message': 'Session deleted'})
+    except KeyError:
+        # 会话不存在或在此期间已被回收
         return jsonify({'error': 'Session not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def capture_screenshot(session_id, driver_client):
+    """
+    采集会话截图：有效期内复用结果，并发请求只触发一次 WinAppDriver 采集
+    
+    :return: (PNG 字节, 摘要)
+    """
+    def capture():
+        png_data = driver_client.get_screenshot_bytes()
+        return png_data, hashlib.sha1(png_data).hexdigest()
+    
+    return screenshot_cache.get_or_compute((session_id, 'capture'), driver_client.ui_version, capture)
 
 @app.route('/api/session/<session_id>/screenshot')
 def get_screenshot(session_id):
     """获取屏幕截图"""
-    if session_id not in driver_sessions:
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
         return jsonify({'error': 'Session not found'}), 404
     
     try:
         # 获取截图
-        screenshot_data = driver_sessions[session_id].get_screenshot()
+        png_data, digest = capture_screenshot(session_id, driver_client)
+        quality = app.config['SCREENSHOT_QUALITY']
         
-        # 压缩图片
-        compressed_data = compress_image(screenshot_data, quality=app.config['SCREENSHOT_QUALITY'])
+        # 压缩图片（相同画面与参数的结果直接复用）
+        compressed_data = screenshot_cache.get_or_compute(
+            (session_id, digest, 'JSON', quality), driver_client.ui_version,
+            lambda: base64.b64encode(image_pool.run(f'{session_id}:screenshot', encode_image, png_data,
+                                                    'JPEG', quality)).decode('utf-8')
+        )
         
         return jsonify({
             'status': 'success',
             'screenshot': compressed_data
         })
+    except PoolBusyError as e:
+        return jsonify({'error': str(e)}), 503
+    except StaleFrameError as e:
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/session/<session_id>/screenshot.<image_format>')
+def get_screenshot_image(session_id, image_format):
+    """以图像二进制直接返回截图 (jpg / webp / png)"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    if image_format not in IMAGE_FORMATS:
+        return jsonify({'error': f'Unsupported image format: {image_format}'}), 400
+    
+    pil_format, mimetype = IMAGE_FORMATS[image_format]
+    quality = request.args.get('quality', app.config['SCREENSHOT_QUALITY'], type=int)
+    width = request.args.get('width', type=int)
+    height = request.args.get('height', type=int)
+    # 只指定一边时另一边不限制，按宽高比缩放
+    max_size = (width or sys.maxsize, height or sys.maxsize) if width or height else None
+    
+    try:
+        png_data, digest = capture_screenshot(session_id, driver_client)
+        
+        # ETag 基于原始截图和编码参数，画面未变化时无需重新编码即可返回 304
+        etag = hashlib.sha1(f'{digest}:{pil_format}:{quality}:{max_size}'.encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            if pil_format == 'PNG' and max_size is None:
+                image_data = png_data
+            else:
+                # 单次解码完成缩放与编码，相同画面与参数的结果直接复用
+                image_data = screenshot_cache.get_or_compute(
+                    (session_id, digest, pil_format, quality, max_size), driver_client.ui_version,
+                    lambda: image_pool.run(f'{session_id}:screenshot.{image_format}', process_image, png_data,
+                                           max_size=max_size, image_format=pil_format, quality=quality)
+                )
+            response = Response(image_data, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except PoolBusyError as e:
+        return jsonify({'error': str(e)}), 503
+    except StaleFrameError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/session/<session_id>/screenshot/delta')
+def get_screenshot_delta(session_id):
+    """获取与上一帧相比的增量截图"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    try:
+        png_data, _ = capture_screenshot(session_id, driver_client)
+        encoder = frame_encoders.setdefault(session_id, FrameDeltaEncoder(
+            tile_size=app.config['DELTA_TILE_SIZE'],
+            quality=app.config['SCREENSHOT_QUALITY'],
+            max_changed_ratio=app.config['DELTA_MAX_CHANGED_RATIO']
+        ))
+        # 编码器保存上一帧，需在本进程内执行
+        frame = image_pool.run(f'{session_id}:delta', encoder.encode, png_data,
+                               since=request.args.get('since', type=int), local=True)
+        return jsonify({'status': 'success', **frame})
+    except PoolBusyError as e:
+        return jsonify({'error': str(e)}), 503
+    except StaleFrameError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def get_streamer(session_id, driver_client):
+    """获取或创建会话的推流对象"""
+    with streamers_lock:
+        streamer = screen_streamers.get(session_id)
+        if streamer is None:
+            streamer = ScreenStreamer(
+                capture=driver_client.get_screenshot_bytes,
+                encode=lambda data, quality: image_pool.run(f'{session_id}:stream', encode_image,
+                                                            data, 'JPEG', quality),
+                max_fps=app.config['STREAM_MAX_FPS'],
+                min_fps=app.config['STREAM_MIN_FPS'],
+                quality=app.config['SCREENSHOT_QUALITY'],
+                min_quality=app.config['STREAM_MIN_QUALITY']
+            )
+            screen_streamers[session_id] = streamer
+        return streamer
+
+@app.route('/api/session/<session_id>/stream.mjpg')
+def stream_screen(session_id):
+    """以 MJPEG 推送实时画面"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    streamer = get_streamer(session_id, driver_client)
+    
+    def generate():
+        viewer = streamer.subscribe()
+        try:
+            # 观看实时画面期间保持会话活跃
+            while streamer.viewer_count and driver_sessions.touch(session_id):
+                frame = viewer.next_frame(timeout=1.0)
+                if frame is None:
+                    continue
+                yield (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+                       + str(len(frame)).encode() + b'\r\n\r\n')
+                yield frame
+                yield b'\r\n'
+        finally:
+            streamer.unsubscribe(viewer)
+    
+    response = Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/session/<session_id>/stream/stats')
+def get_stream_stats(session_id):
+    """获取实时画面推流统计"""
+    if driver_sessions.get(session_id) is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    streamer = screen_streamers.get(session_id)
+    return jsonify({
+        'status': 'success',
+        'stream': streamer.stats() if streamer is not None else None
+    })
+
 @app.route('/api/session/<session_id>/source')
 def get_source(session_id):
     """获取UI元素源码"""
-    if session_id not in driver_sessions:
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
         return jsonify({'error': 'Session not found'}), 404
     
     try:
-        source = driver_sessions[session_id].get_page_source()
+        source = driver_client.get_page_source()
+        
+        if request.args.get('mode') != 'diff':
+            # ETag 基于控件树内容，未变化时返回 304，无需再次传输整棵树
+            etag = content_etag(source)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = jsonify({
+                    'status': 'success',
+                    'source': source
+                })
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        # 增量模式：前端回传版本号，版本一致时只返回新增、删除和变化的节点
+        snapshot = driver_client.snapshot
+        root = snapshot.root if snapshot is not None and snapshot.source is source else ET.fromstring(source)
+        tracker = source_trackers.setdefault(session_id, SourceTracker())
+        version, diff = tracker.update(root, since=request.args.get('since', type=int))
+        
+        if diff is None:
+            return jsonify({
+                'status': 'success',
+                'mode': 'full',
+                'version': version,
+                'source': source
+            })
         return jsonify({
             'status': 'success',
-            'source': source
+            'mode': 'diff',
+            'version': version,
+            **diff
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def tree_attrs(value):
+    """
+    解析属性投影参数（逗号分隔的属性名，* 表示全部属性）
+    """
+    return parse_attribute_list(value, app.config['TREE_DEFAULT_ATTRS'])
+
+def tree_response(tree, payload):
+    """
+    返回控件树接口的响应：ETag 由控件树内容与查询参数共同决定，未变化时返回 304
+    """
+    etag = content_etag(f"{tree.etag}?{request.query_string.decode('latin-1')}")
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/session/<session_id>/tree')
+def get_tree(session_id):
+    """按需获取控件树节点及其子节点（分页、限制层数、属性投影）"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    depth = min(max(request.args.get('depth', 1, type=int), 0), app.config['TREE_MAX_DEPTH'])
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', app.config['TREE_PAGE_SIZE'], type=int)
+    limit = min(max(limit, 1), app.config['TREE_MAX_PAGE_SIZE'])
+    node_id = request.args.get('node')
+    
+    try:
+        tree = control_trees.get(session_id, driver_client, refresh=request.args.get('refresh') == '1')
+        if node_id and not tree.has_node(node_id):
+            return jsonify({'error': 'Node not found', 'etag': tree.etag}), 404
+        node = tree.node(node_id, depth=depth, attrs=tree_attrs(request.args.get('attrs')),
+                         offset=offset, limit=limit)
+        return tree_response(tree, {
+            'status': 'success',
+            'etag': tree.etag,
+            'nodeCount': tree.node_count,
+            'node': node
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/session/<session_id>/tree/search')
+def search_tree(session_id):
+    """在控件树中按属性值或控件类型搜索，返回匹配节点及其祖先路径"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'error': 'Missing q parameter'}), 400
+    fields = parse_attribute_list(request.args.get('fields'), ','.join(SEARCH_ATTRIBUTES))
+    limit = request.args.get('limit', app.config['TREE_SEARCH_LIMIT'], type=int)
+    limit = min(max(limit, 1), app.config['TREE_MAX_PAGE_SIZE'])
+    
+    try:
+        tree = control_trees.get(session_id, driver_client, refresh=request.args.get('refresh') == '1')
+        matches, truncated = tree.search(query, fields=fields, attrs=tree_attrs(request.args.get('attrs')), limit=limit)
+        return tree_response(tree, {
+            'status': 'success',
+            'etag': tree.etag,
+            'matches': matches,
+            'truncated': truncated
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -101,18 +654,21 @@ def get_source(session_id):
 @app.route('/api/session/<session_id>/element', methods=['POST'])
 def find_element(session_id):
     """查找元素"""
-    if session_id not in driver_sessions:
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
         return jsonify({'error': 'Session not found'}), 404
     
     data = request.get_json()
     strategy = data.get('strategy')
     locator = data.get('locator')
+    use_snapshot = data.get('useSnapshot', True)
     
     if not strategy or not locator:
         return jsonify({'error': 'Missing strategy or locator parameters'}), 400
     
     try:
-        element = driver_sessions[session_id].find_element(strategy, locator)
+        element = driver_client.find_element(strategy, locator, use_snapshot=use_snapshot)
+        recorder.record(session_id, driver_client, 'find', element_id=element, strategy=strategy, locator=locator)
         return jsonify({
             'status': 'success',
             'elementId': element
@@ -123,19 +679,22 @@ def find_element(session_id):
 @app.route('/api/session/<session_id>/element/<element_id>/click', methods=['POST'])
 def click_element(session_id, element_id):
     """点击元素"""
-    if session_id not in driver_sessions:
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
         return jsonify({'error': 'Session not found'}), 404
     
     try:
-        driver_sessions[session_id].click_element(element_id)
-        return jsonify({'status': 'success', 'message': 'Element clicked'})
+        element_id = driver_client.click_element(element_id)
+        recorder.record(session_id, driver_client, 'click', element_id=element_id)
+        return jsonify({'status': 'success', 'message': 'Element clicked', 'elementId': element_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/session/<session_id>/element/<element_id>/text', methods=['POST'])
 def send_text(session_id, element_id):
     """发送文本到元素"""
-    if session_id not in driver_sessions:
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
         return jsonify({'error': 'Session not found'}), 404
     
     data = request.get_json()
@@ -145,10 +704,282 @@ def send_text(session_id, element_id):
         return jsonify({'error': 'Missing text parameter'}), 400
     
     try:
-        driver_sessions[session_id].send_keys(element_id, text)
-        return jsonify({'status': 'success', 'message': 'Text sent'})
+        element_id = driver_client.send_keys(element_id, text)
+        recorder.record(session_id, driver_client, 'sendKeys', element_id=element_id, text=text)
+        return jsonify({'status': 'success', 'message': 'Text sent', 'elementId': element_id})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/session/<session_id>/batch', methods=['POST'])
+def execute_batch(session_id):
+    """批量执行元素操作"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    data = request.get_json()
+    steps = data.get('steps')
+    stop_on_error = data.get('stopOnError', True)
+    
+    if not isinstance(steps, list) or not steps:
+        return jsonify({'error': 'Missing steps parameter'}), 400
+    
+    for index, step in enumerate(steps):
+        if not isinstance(step, dict) or step.get('action') not in BATCH_ACTIONS:
+            return jsonify({'error': f'Invalid action at step {index}'}), 400
+        if step['action'] == 'wait':
+            # 等待占用请求线程，限制单步最长时间
+            try:
+                timeout = float(step.get('timeout', app.config['WAIT_DEFAULT_TIMEOUT']))
+                step['stableFor'] = float(step.get('stableFor', 0.5))
+            except (TypeError, ValueError):
+                return jsonify({'error': f'timeout and stableFor must be numbers at step {index}'}), 400
+            step['timeout'] = max(0.0, min(timeout, app.config['WAIT_MAX_TIMEOUT']))
+    
+    try:
+        start = time.perf_counter()
+        results = driver_client.execute_batch(steps, stop_on_error=stop_on_error)
+        recorder.record_batch(session_id, driver_client, steps, results)
+        return jsonify({
+            'status': 'success' if all(r['status'] == 'success' for r in results) else 'error',
+            'results': results,
+            'elapsedMs': round((time.perf_counter() - start) * 1000, 3)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/session/<session_id>/wait', methods=['POST'])
+def wait_condition(session_id):
+    """等待元素或画面满足条件（代替固定的等待时间）"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    data = request.get_json()
+    condition = data.get('condition', 'present')
+    
+    if condition not in WAIT_CONDITIONS:
+        return jsonify({'error': f'Unsupported condition: {condition}'}), 400
+    if condition != 'screenshotStable' and (not data.get('strategy') or not data.get('locator')):
+        return jsonify({'error': 'Missing strategy or locator parameter'}), 400
+    
+    try:
+        timeout = min(float(data.get('timeout', app.config['WAIT_DEFAULT_TIMEOUT'])), app.config['WAIT_MAX_TIMEOUT'])
+        result = wait_for(
+            driver_client, condition,
+            timeout=timeout,
+            strategy=data.get('strategy'),
+            locator=data.get('locator'),
+            text=data.get('text'),
+            match=data.get('match', 'equals'),
+            use_snapshot=data.get('useSnapshot', True),
+            stable_for=float(data.get('stableFor', 0.5))
+        )
+        recorder.record(session_id, driver_client, 'wait', element_id=result['value'],
+                        strategy=data.get('strategy'), locator=data.get('locator'), condition=condition,
+                        text=data.get('text'), match=data.get('match'), stableFor=data.get('stableFor'))
+        return jsonify({
+            'status': 'success',
+            'elementId': result['value'],
+            'attempts': result['attempts'],
+            'elapsedMs': result['elapsedMs']
+        })
+    except WaitTimeoutError as e:
+        return jsonify({'error': str(e), 'attempts': e.attempts}), 408
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/session/<session_id>/cache', methods=['GET', 'DELETE'])
+def element_cache(session_id):
+    """查看或清空元素缓存"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    cache = driver_client.element_cache
+    if request.method == 'DELETE':
+        cache.clear()
+    return jsonify({
+        'status': 'success',
+        'cache': cache.stats(),
+        'snapshot': driver_client.snapshot_stats()
+    })
+
+@app.route('/api/session/<session_id>/snapshot', methods=['POST'])
+def refresh_snapshot(session_id):
+    """重新获取页面源码并生成本地查找快照"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    try:
+        snapshot = driver_client.refresh_snapshot()
+        return jsonify({
+            'status': 'success',
+            'snapshot': snapshot.stats() if snapshot is not None else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/session/<session_id>/recording', methods=['POST', 'DELETE'])
+def session_recording(session_id):
+    """开始 (POST) 或停止 (DELETE) 录制会话的命令"""
+    driver_client = driver_sessions.get(session_id)
+    if driver_client is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    try:
+        if request.method == 'DELETE':
+            return jsonify({'status': 'success', 'recording': recorder.stop(session_id)})
+        
+        data = request.get_json(silent=True) or {}
+        name = recorder.start(session_id, driver_client.app_path, name=data.get('name'))
+        return jsonify({'status': 'success', 'name': name})
+    except RecordingError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings')
+def list_recordings():
+    """列出已保存的录制"""
+    try:
+        return jsonify({'status': 'success', 'recordings': recorder.list()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings/<name>')
+def get_recording(name):
+    """获取录制内容"""
+    try:
+        header, events = recorder.load(name)
+        return jsonify({'status': 'success', 'header': header, 'events': events})
+    except RecordingError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def acquire_replay_session(app_path):
+    """
+    为一次回放创建会话：优先租用预热的会话
+    
+    :return: (回放会话 ID, 客户端)
+    """
+    driver_client = warm_pool.lease(app_path) or launch_client(app_path)
+    replay_id = f'replay-{uuid.uuid4()}'
+    with replay_lock:
+        replay_clients[replay_id] = driver_client
+    return replay_id, driver_client
+
+def release_replay_session(replay_id, driver_client):
+    """
+    回放结束后归还或关闭会话
+    """
+    with replay_lock:
+        replay_clients.pop(replay_id, None)
+    warm_pool.release(driver_client.app_path, driver_client)
+
+@app.route('/api/recordings/<name>/replay', methods=['POST'])
+def replay_recording(name):
+    """按录制回放：每个操作前等待元素就绪而不是按录制的间隔等待，多次回放在不同会话上并行"""
+    data = request.get_json(silent=True) or {}
+    
+    # 回放在请求线程中同步执行，次数与并行度都有上限，避免单个请求长时间占用工作线程和 WinAppDriver
+    try:
+        runs = int(data.get('runs', 1))
+        parallel = int(data.get('parallel', 1))
+        timeout = float(data.get('timeout', app.config['WAIT_DEFAULT_TIMEOUT']))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'runs, parallel and timeout must be numbers'}), 400
+    runs = max(1, min(runs, app.config['REPLAY_MAX_RUNS']))
+    parallel = max(1, min(parallel, app.config['REPLAY_MAX_PARALLEL']))
+    timeout = max(0.0, min(timeout, app.config['WAIT_MAX_TIMEOUT']))
+    
+    try:
+        header, events = recorder.load(name)
+        app_path = data.get('appPath') or header.get('appPath')
+        if not app_path:
+            return jsonify({'error': 'Missing appPath parameter'}), 400
+        
+        replayer = Replayer(
+            acquire=lambda: acquire_replay_session(app_path),
+            release=release_replay_session,
+            wait_timeout=timeout
+        )
+        return jsonify({'status': 'success', 'name': name, **replayer.run(events, runs=runs, parallel=parallel)})
+    except RecordingError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stats/images')
+def get_image_pool_stats():
+    """获取截图处理池统计信息"""
+    return jsonify({
+        'status': 'success',
+        'images': image_pool.stats()
+    })
+
+@app.route('/api/stats/screenshots')
+def get_screenshot_cache_stats():
+    """获取截图结果缓存统计信息"""
+    return jsonify({
+        'status': 'success',
+        'screenshots': screenshot_cache.stats()
+    })
+
+@app.route('/api/stats/trees')
+def get_tree_cache_stats():
+    """获取控件树缓存统计信息"""
+    return jsonify({
+        'status': 'success',
+        'trees': control_trees.stats()
+    })
+
+@app.route('/api/stats/sessions')
+def get_session_stats():
+    """获取会话数量统计信息"""
+    return jsonify({
+        'status': 'success',
+        'sessions': driver_sessions.stats()
+    })
+
+@app.route('/api/stats/warm-pool')
+def get_warm_pool_stats():
+    """获取预热会话池统计信息"""
+    return jsonify({
+        'status': 'success',
+        'warmPool': warm_pool.stats()
+    })
+
+@app.route('/api/stats/nodes')
+def get_node_stats():
+    """获取 WinAppDriver 节点统计信息"""
+    return jsonify({
+        'status': 'success',
+        'nodes': node_router.stats()
+    })
+
+@app.route('/api/stats/pool')
+def get_pool_stats():
+    """获取 HTTP 连接池统计信息"""
+    return jsonify({
+        'status': 'success',
+        'pool': transport.stats()
+    })
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus 格式的指标"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,374 @@
+"""
+基于 aiohttp 的异步入口，提供与 app.py 相同的基础会话与元素 API，以及控制台页面使用的
+增量截图、实时画面和控件树分页接口
+
+单个进程即可同时处理大量进行中的 WinAppDriver 命令，慢速的会话启动不会占用工作线程。
+
+运行:
+    python async_app.py
+"""
+import asyncio
+import functools
+import os
+import uuid
+
+import jinja2
+from aiohttp import web
+
+from config import Config
+from utils.async_winappdriver import AsyncHttpTransport, AsyncWinAppDriverClient
+from utils.compression import content_etag
+from utils.control_tree import ControlTreeCache, SEARCH_ATTRIBUTES, parse_attribute_list
+from utils.frame_delta import FrameDeltaEncoder
+from utils.image_utils import compress_image, encode_image
+from utils.screen_stream import ScreenStreamer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 存储会话的异步 WinAppDriver 客户端
+driver_sessions = web.AppKey('driver_sessions', dict)
+transport_key = web.AppKey('transport', AsyncHttpTransport)
+# 每个会话已解析的控件树、帧差编码器与实时画面推流
+control_trees = web.AppKey('control_trees', ControlTreeCache)
+frame_encoders = web.AppKey('frame_encoders', dict)
+screen_streamers = web.AppKey('screen_streamers', dict)
+
+templates = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(BASE_DIR, 'templates')),
+    autoescape=True
+)
+templates.globals['url_for'] = lambda endpoint, filename: f'/static/{filename}'
+
+
+def get_client(request: web.Request) -> AsyncWinAppDriverClient:
+    session_id = request.match_info['session_id']
+    client = request.app[driver_sessions].get(session_id)
+    if client is None:
+        raise web.HTTPNotFound(text='{"error": "Session not found"}', content_type='application/json')
+    return client
+
+
+def query_int(request: web.Request, name: str, default=None):
+    """
+    读取整数查询参数，缺失或无法解析时返回默认值
+    """
+    try:
+        return int(request.query[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def release_session(app: web.Application, session_id: str):
+    """
+    清理会话关联的控件树、帧差编码器与推流
+    """
+    app[control_trees].invalidate(session_id)
+    app[frame_encoders].pop(session_id, None)
+    streamer = app[screen_streamers].pop(session_id, None)
+    if streamer is not None:
+        streamer.stop()
+
+
+async def index(request: web.Request) -> web.Response:
+    """主页 - 显示控制界面"""
+    html = templates.get_template('index.html').render()
+    return web.Response(text=html, content_type='text/html')
+
+
+async def create_session(request: web.Request) -> web.Response:
+    """创建新的 WinAppDriver 会话"""
+    data = await request.json()
+    app_path = data.get('appPath')
+
+    if not app_path:
+        return web.json_response({'error': 'Missing appPath parameter'}, status=400)
+
+    try:
+        session_id = str(uuid.uuid4())
+        driver_client = AsyncWinAppDriverClient(
+            winappdriver_url=Config.WINAPPDRIVER_URL,
+            app_path=app_path,
+            transport=request.app[transport_key],
+            cache_size=Config.ELEMENT_CACHE_SIZE,
+            cache_ttl=Config.ELEMENT_CACHE_TTL
+        )
+        await driver_client.start_application()
+        request.app[driver_sessions][session_id] = driver_client
+
+        return web.json_response({
+            'sessionId': session_id,
+            'status': 'success',
+            'message': 'Session created successfully'
+        })
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def delete_session(request: web.Request) -> web.Response:
+    """删除 WinAppDriver 会话"""
+    client = get_client(request)
+    try:
+        await client.quit()
+        request.app[driver_sessions].pop(request.match_info['session_id'], None)
+        release_session(request.app, request.match_info['session_id'])
+        return web.json_response({'status': 'success', 'message': 'Session deleted'})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def get_screenshot(request: web.Request) -> web.Response:
+    """获取屏幕截图"""
+    client = get_client(request)
+    try:
+        screenshot_data = await client.get_screenshot()
+        # 图像压缩为 CPU 密集操作，放到线程池中执行，避免阻塞事件循环
+        compressed_data = await asyncio.get_running_loop().run_in_executor(
+            None, compress_image, screenshot_data, Config.SCREENSHOT_QUALITY
+        )
+        return web.json_response({'status': 'success', 'screenshot': compressed_data})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def get_screenshot_delta(request: web.Request) -> web.Response:
+    """获取与上一帧相比的增量截图"""
+    client = get_client(request)
+    session_id = request.match_info['session_id']
+    try:
+        png_data = await client.get_screenshot_bytes()
+        encoder = request.app[frame_encoders].setdefault(session_id, FrameDeltaEncoder(
+            tile_size=Config.DELTA_TILE_SIZE,
+            quality=Config.SCREENSHOT_QUALITY,
+            max_changed_ratio=Config.DELTA_MAX_CHANGED_RATIO
+        ))
+        frame = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(encoder.encode, png_data, since=query_int(request, 'since'))
+        )
+        return web.json_response({'status': 'success', **frame})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+def get_streamer(app: web.Application, session_id: str, client: AsyncWinAppDriverClient) -> ScreenStreamer:
+    """获取或创建会话的推流对象，采集线程通过事件循环调用异步客户端"""
+    streamer = app[screen_streamers].get(session_id)
+    if streamer is None:
+        loop = asyncio.get_running_loop()
+
+        def capture():
+            return asyncio.run_coroutine_threadsafe(client.get_screenshot_bytes(), loop).result(
+                timeout=Config.HTTP_READ_TIMEOUT)
+
+        streamer = ScreenStreamer(
+            capture=capture,
+            encode=lambda data, quality: encode_image(data, 'JPEG', quality),
+            max_fps=Config.STREAM_MAX_FPS,
+            min_fps=Config.STREAM_MIN_FPS,
+            quality=Config.SCREENSHOT_QUALITY,
+            min_quality=Config.STREAM_MIN_QUALITY
+        )
+        app[screen_streamers][session_id] = streamer
+    return streamer
+
+
+async def stream_screen(request: web.Request) -> web.StreamResponse:
+    """以 MJPEG 推送实时画面"""
+    client = get_client(request)
+    session_id = request.match_info['session_id']
+    streamer = get_streamer(request.app, session_id, client)
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+        'Cache-Control': 'no-cache'
+    })
+    await response.prepare(request)
+    viewer = streamer.subscribe()
+    try:
+        while streamer.viewer_count and session_id in request.app[driver_sessions]:
+            # 不阻塞事件循环：没有新帧时按最大帧率的两倍轮询
+            frame = viewer.next_frame(timeout=0)
+            if frame is None:
+                await asyncio.sleep(0.5 / streamer.max_fps)
+                continue
+            await response.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+                                 + str(len(frame)).encode() + b'\r\n\r\n' + frame + b'\r\n')
+    except ConnectionResetError:
+        pass  # 观看者已断开
+    finally:
+        streamer.unsubscribe(viewer)
+    return response
+
+
+async def get_source(request: web.Request) -> web.Response:
+    """获取UI元素源码"""
+    client = get_client(request)
+    try:
+        source = await client.get_page_source()
+        return web.json_response({'status': 'success', 'source': source})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def get_control_tree(request: web.Request, client: AsyncWinAppDriverClient):
+    """
+    获取会话的控件树：缓存有效时直接复用，否则重新获取页面源码，解析放到线程池中执行
+    """
+    trees = request.app[control_trees]
+    session_id = request.match_info['session_id']
+    tree = None if request.query.get('refresh') == '1' else trees.cached(session_id, client.ui_version)
+    if tree is None:
+        ui_version = client.ui_version
+        source = await client.get_page_source()
+        tree = await asyncio.get_running_loop().run_in_executor(None, trees.update, session_id, source, ui_version)
+    return tree
+
+
+def tree_response(request: web.Request, tree, payload) -> web.Response:
+    """
+    返回控件树接口的响应：ETag 由控件树内容与查询参数共同决定，未变化时返回 304
+    """
+    etag = content_etag(f"{tree.etag}?{request.query_string}")
+    if any(candidate.value == etag for candidate in request.if_none_match or ()):
+        response = web.Response(status=304)
+    else:
+        response = web.json_response(payload)
+    response.etag = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+async def get_tree(request: web.Request) -> web.Response:
+    """按需获取控件树节点及其子节点（分页、限制层数、属性投影）"""
+    client = get_client(request)
+    depth = min(max(query_int(request, 'depth', 1), 0), Config.TREE_MAX_DEPTH)
+    offset = max(query_int(request, 'offset', 0), 0)
+    limit = min(max(query_int(request, 'limit', Config.TREE_PAGE_SIZE), 1), Config.TREE_MAX_PAGE_SIZE)
+    node_id = request.query.get('node')
+
+    try:
+        tree = await get_control_tree(request, client)
+        if node_id and not tree.has_node(node_id):
+            return web.json_response({'error': 'Node not found', 'etag': tree.etag}, status=404)
+        node = tree.node(node_id, depth=depth, offset=offset, limit=limit,
+                         attrs=parse_attribute_list(request.query.get('attrs'), Config.TREE_DEFAULT_ATTRS))
+        return tree_response(request, tree, {
+            'status': 'success',
+            'etag': tree.etag,
+            'nodeCount': tree.node_count,
+            'node': node
+        })
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def search_tree(request: web.Request) -> web.Response:
+    """在控件树中按属性值或控件类型搜索，返回匹配节点及其祖先路径"""
+    client = get_client(request)
+    query = request.query.get('q', '')
+    if not query:
+        return web.json_response({'error': 'Missing q parameter'}, status=400)
+    fields = parse_attribute_list(request.query.get('fields'), ','.join(SEARCH_ATTRIBUTES))
+    limit = min(max(query_int(request, 'limit', Config.TREE_SEARCH_LIMIT), 1), Config.TREE_MAX_PAGE_SIZE)
+
+    try:
+        tree = await get_control_tree(request, client)
+        matches, truncated = tree.search(query, fields=fields, limit=limit,
+                                         attrs=parse_attribute_list(request.query.get('attrs'), Config.TREE_DEFAULT_ATTRS))
+        return tree_response(request, tree, {
+            'status': 'success',
+            'etag': tree.etag,
+            'matches': matches,
+            'truncated': truncated
+        })
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def find_element(request: web.Request) -> web.Response:
+    """查找元素"""
+    client = get_client(request)
+    data = await request.json()
+    strategy = data.get('strategy')
+    locator = data.get('locator')
+
+    if not strategy or not locator:
+        return web.json_response({'error': 'Missing strategy or locator parameters'}, status=400)
+
+    try:
+        element = await client.find_element(strategy, locator)
+        return web.json_response({'status': 'success', 'elementId': element})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def click_element(request: web.Request) -> web.Response:
+    """点击元素"""
+    client = get_client(request)
+    try:
+        element_id = await client.click_element(request.match_info['element_id'])
+        return web.json_response({'status': 'success', 'message': 'Element clicked', 'elementId': element_id})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def send_text(request: web.Request) -> web.Response:
+    """发送文本到元素"""
+    client = get_client(request)
+    data = await request.json()
+    text = data.get('text')
+
+    if text is None:
+        return web.json_response({'error': 'Missing text parameter'}, status=400)
+
+    try:
+        element_id = await client.send_keys(request.match_info['element_id'], text)
+        return web.json_response({'status': 'success', 'message': 'Text sent', 'elementId': element_id})
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def get_pool_stats(request: web.Request) -> web.Response:
+    """获取 HTTP 连接池统计信息"""
+    return web.json_response({'status': 'success', 'pool': request.app[transport_key].stats()})
+
+
+async def on_cleanup(app: web.Application):
+    # 关闭所有会话及连接池
+    for session_id in list(app[screen_streamers]):
+        release_session(app, session_id)
+    await asyncio.gather(*(client.quit() for client in app[driver_sessions].values()))
+    await app[transport_key].close()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app[driver_sessions] = {}
+    app[control_trees] = ControlTreeCache(max_age=Config.TREE_CACHE_MAX_AGE)
+    app[frame_encoders] = {}
+    app[screen_streamers] = {}
+    app[transport_key] = AsyncHttpTransport(
+        pool_size=Config.ASYNC_HTTP_POOL_SIZE,
+        connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=Config.HTTP_READ_TIMEOUT
+    )
+
+    app.router.add_get('/', index)
+    app.router.add_static('/static', os.path.join(BASE_DIR, 'static'))
+    app.router.add_post('/api/session', create_session)
+    app.router.add_delete('/api/session/{session_id}', delete_session)
+    app.router.add_get('/api/session/{session_id}/screenshot', get_screenshot)
+    app.router.add_get('/api/session/{session_id}/screenshot/delta', get_screenshot_delta)
+    app.router.add_get('/api/session/{session_id}/stream.mjpg', stream_screen)
+    app.router.add_get('/api/session/{session_id}/source', get_source)
+    app.router.add_get('/api/session/{session_id}/tree', get_tree)
+    app.router.add_get('/api/session/{session_id}/tree/search', search_tree)
+    app.router.add_post('/api/session/{session_id}/element', find_element)
+    app.router.add_post('/api/session/{session_id}/element/{element_id}/click', click_element)
+    app.router.add_post('/api/session/{session_id}/element/{element_id}/text', send_text)
+    app.router.add_get('/api/stats/pool', get_pool_stats)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host='0.0.0.0', port=int(os.environ.get('PORT') or '5000'))
@@ -0,0 +1,263 @@
+"""
+端到端 API 负载测试：在本地桩服务上启动 app.py，模拟 N 个并发用户调用 REST API，
+统计每个接口的 p50/p95/p99 延迟与每秒请求数，可保存为 JSON 基线并与之前的基线对比
+
+每个用户创建一个会话，然后按权重随机执行获取控件树、截图、查找元素、点击、输入，结束时删除会话。
+
+用法:
+    python benchmarks/bench_api.py --users 8 --duration 20 --latency 5 --tree-size 500 --screen 1280x720 --out baseline.json
+    python benchmarks/bench_api.py --users 8 --duration 20 --latency 5 --tree-size 500 --screen 1280x720 \
+        --compare baseline.json --tolerance 0.15
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_winappdriver import GROUP_SIZE, parse_screen_size, start_stub_server
+
+# (接口名, 权重)
+SCENARIO = (
+    ('GET /source', 3),
+    ('GET /screenshot.jpg', 2),
+    ('POST /element', 4),
+    ('POST /element/click', 1),
+    ('POST /element/text', 1)
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """
+    最近秩百分位数
+
+    :param sorted_values: 已排序的数值
+    :param p: 百分位 (0-100)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(p / 100.0 * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+class SimulatedUser:
+    def __init__(self, base_url: str, index: int, tree_size: int, timings: dict, errors: dict, lock: threading.Lock):
+        """
+        模拟一个前端用户，使用独立的 keep-alive 连接
+
+        :param base_url: app.py 的地址
+        :param index: 用户序号（随机数种子）
+        :param tree_size: 桩服务生成的控件数量，用于构造查找的定位器
+        """
+        self.base_url = base_url
+        self.http = requests.Session()
+        self.rng = random.Random(index)
+        self.tree_size = tree_size
+        self.timings = timings
+        self.errors = errors
+        self.lock = lock
+        self.session_url = None
+
+    def call(self, name: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+            # 读取完整响应体，计入传输时间
+            response.content
+        except requests.RequestException:
+            response, ok = None, False
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.timings[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+        return response if ok else None
+
+    def locator(self):
+        # 一半查找固定控件（元素缓存命中），一半随机查找生成的控件
+        if self.tree_size and self.rng.random() < 0.5:
+            return 'name', f'Item {self.rng.randrange(self.tree_size)}'
+        return 'accessibility id', self.rng.choice(('num1Button', 'plusButton', 'CalculatorResults'))
+
+    def run(self, deadline: float):
+        response = self.call('POST /session', 'POST', '/api/session', json={'appPath': 'stub.exe'})
+        if response is None:
+            return
+        self.session_url = f"/api/session/{response.json()['sessionId']}"
+        names = [name for name, _ in SCENARIO]
+        weights = [weight for _, weight in SCENARIO]
+        try:
+            while time.perf_counter() < deadline:
+                name = self.rng.choices(names, weights)[0]
+                if name == 'GET /source':
+                    self.call(name, 'GET', f'{self.session_url}/source')
+                elif name == 'GET /screenshot.jpg':
+                    self.call(name, 'GET', f'{self.session_url}/screenshot.jpg', params={'quality': 70})
+                elif name == 'POST /element':
+                    strategy, locator = self.locator()
+                    self.call(name, 'POST', f'{self.session_url}/element',
+                              json={'strategy': strategy, 'locator': locator})
+                elif name == 'POST /element/click':
+                    self.call(name, 'POST', f'{self.session_url}/element/42.1.1/click')
+                else:
+                    self.call(name, 'POST', f'{self.session_url}/element/42.1.3/text', json={'text': 'bench'})
+        finally:
+            self.call('DELETE /session', 'DELETE', self.session_url)
+            self.http.close()
+
+
+def start_app_server(winappdriver_url: str):
+    """
+    指向桩服务导入 app.py，并在后台线程中以多线程 WSGI 服务启动
+
+    :return: (服务对象, 地址)
+    """
+    os.environ['WINAPPDRIVER_URL'] = winappdriver_url
+    os.environ.pop('WINAPPDRIVER_URLS', None)
+    os.environ.pop('WARM_POOL_APPS', None)
+    from werkzeug.serving import make_server
+    import app as app_module
+
+    # 不输出每个请求的访问日志
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://%s:%d' % server.server_address
+
+
+def summarize(timings: dict, errors: dict, duration: float) -> dict:
+    """
+    汇总每个接口的延迟分布与吞吐量
+    """
+    endpoints = {}
+    for name in sorted(timings):
+        values = sorted(timings[name])
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': errors.get(name, 0),
+            'rps': round(len(values) / duration, 2),
+            'meanMs': round(statistics.mean(values), 3),
+            **{f'p{p}Ms': round(percentile(values, p), 3) for p in PERCENTILES}
+        }
+    values = sorted(t for name in timings for t in timings[name])
+    total = {
+        'requests': len(values),
+        'errors': sum(errors.values()),
+        'rps': round(len(values) / duration, 2),
+        **{f'p{p}Ms': round(percentile(values, p), 3) for p in PERCENTILES}
+    }
+    return {'endpoints': endpoints, 'total': total}
+
+
+def print_report(result: dict):
+    print(f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    rows = list(result['endpoints'].items()) + [('TOTAL', result['total'])]
+    for name, row in rows:
+        print(f"{name:<22}{row['requests']:>9}{row['errors']:>8}{row['rps']:>10.1f}"
+              f"{row['p50Ms']:>9.2f}ms{row['p95Ms']:>8.2f}ms{row['p99Ms']:>8.2f}ms")
+
+
+def compare(result: dict, baseline: dict, tolerance: float, min_samples: int = 30) -> list:
+    """
+    与基线对比：p95 / p99 变慢或 rps 下降超过 tolerance 视为退化，
+    请求数少于 min_samples 的接口（如创建、删除会话）百分位数波动大，只显示不判定
+
+    :return: 退化描述列表
+    """
+    regressions = []
+    print(f"\n对比基线 ({baseline.get('createdAt', '?')})，容差 {tolerance:.0%}:")
+    for name, row in list(result['endpoints'].items()) + [('TOTAL', result['total'])]:
+        base = baseline['total'] if name == 'TOTAL' else baseline['endpoints'].get(name)
+        if base is None:
+            continue
+        changes = []
+        for key, higher_is_worse in (('p95Ms', True), ('p99Ms', True), ('rps', False)):
+            if not base[key]:
+                continue
+            change = (row[key] - base[key]) / base[key]
+            changes.append(f"{key} {change:+.1%}")
+            worse = (change > tolerance) if higher_is_worse else (change < -tolerance)
+            if worse and min(row['requests'], base['requests']) >= min_samples:
+                regressions.append(f"{name} {key}: {base[key]} -> {row[key]}")
+        print(f"  {name:<22}{'  '.join(changes)}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='app.py 端到端负载测试')
+    parser.add_argument('--users', type=int, default=8, help='并发用户数')
+    parser.add_argument('--duration', type=float, default=20.0, help='持续时间（秒）')
+    parser.add_argument('--latency', type=float, default=5.0, help='桩服务每个命令的模拟延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='桩服务每个命令额外的随机延迟上限（毫秒）')
+    parser.add_argument('--tree-size', type=int, default=500, help='控件树中额外生成的控件数量')
+    parser.add_argument('--screen', type=parse_screen_size, default=(1280, 720), help='截图分辨率，如 1920x1080')
+    parser.add_argument('--out', help='将结果保存为 JSON 基线')
+    parser.add_argument('--compare', help='与之前保存的 JSON 基线对比，退化时以状态码 1 退出')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='对比基线时允许的变化比例')
+    parser.add_argument('--min-samples', type=int, default=30, help='参与退化判定的接口最少请求数')
+    args = parser.parse_args()
+
+    stub = start_stub_server(latency=args.latency / 1000.0, jitter=args.jitter / 1000.0,
+                             tree_size=args.tree_size, screen_size=args.screen)
+    app_server, base_url = start_app_server('http://%s:%d' % stub.server_address)
+
+    timings, errors, lock = defaultdict(list), defaultdict(int), threading.Lock()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    users = [SimulatedUser(base_url, i, args.tree_size, timings, errors, lock) for i in range(args.users)]
+    threads = [threading.Thread(target=user.run, args=(deadline,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    result = {
+        'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'users': args.users,
+            'durationSeconds': args.duration,
+            'latencyMs': args.latency,
+            'jitterMs': args.jitter,
+            'treeSize': args.tree_size,
+            'groupSize': GROUP_SIZE,
+            'screen': 'x'.join(map(str, args.screen))
+        },
+        **summarize(timings, errors, duration),
+        # WinAppDriver 实际收到的命令数，可看出缓存与快照节省了多少上游调用
+        'upstream': stub.stats()['commands']
+    }
+    print_report(result)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存到 {args.out}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != result['config']:
+            print('警告: 基线的测试参数不同，对比结果仅供参考')
+        regressions = compare(result, baseline, args.tolerance, args.min_samples)
+        for regression in regressions:
+            print(f"  退化: {regression}")
+
+    app_server.shutdown()
+    stub.shutdown()
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,90 @@
+"""
+对比每个 WebDriver 命令使用新连接与共享连接池时的延迟
+
+用法:
+    python benchmarks/bench_transport.py --commands 500 --threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_winappdriver import start_stub_server
+from utils.transport import HttpTransport
+from utils.winappdriver import WinAppDriverClient
+
+
+class UnpooledTransport:
+    """每个请求都新建 TCP 连接（等同于直接调用 requests.get/post）"""
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def run(transport, url: str, commands: int, threads: int) -> list:
+    """
+    每个线程使用独立会话，循环执行 find_element + click_element
+
+    :return: 每个命令的耗时列表（毫秒）
+    """
+    per_thread = commands // threads
+
+    def worker(_):
+        client = WinAppDriverClient(url, app_path='stub.exe', transport=transport)
+        client.start_application()
+        timings = []
+        try:
+            for i in range(per_thread):
+                start = time.perf_counter()
+                if i % 2:
+                    client.click_element('42.1.1')
+                else:
+                    client.element_cache.clear()
+                    client.find_element('name', 'One')
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            client.quit()
+        return timings
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return [t for result in executor.map(worker, range(threads)) for t in result]
+
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<10} commands={len(timings):<6} mean={statistics.mean(timings):.3f}ms "
+          f"p50={statistics.median(timings):.3f}ms p95={p95:.3f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='WinAppDriver 传输层基准测试')
+    parser.add_argument('--commands', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.0, help='桩服务每个命令的模拟延迟（毫秒）')
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency / 1000.0)
+    url = 'http://%s:%d' % server.server_address
+
+    pooled = HttpTransport(pool_size=args.threads)
+    report('unpooled', run(UnpooledTransport(), url, args.commands, args.threads))
+    report('pooled', run(pooled, url, args.commands, args.threads))
+    print('pool stats:', pooled.stats())
+
+    server.shutdown()
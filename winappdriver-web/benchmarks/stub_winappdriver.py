@@ -0,0 +1,330 @@
+"""
+本地 WinAppDriver 桩服务，用于在没有 Windows 主机时进行基准测试
+
+实现 /session、/source、/screenshot、/element、/click、/value 等命令，可配置命令延迟、控件树大小和截图分辨率。
+元素查找使用与客户端相同的 SourceSnapshot 索引，未命中时返回 NoSuchElement。
+
+用法:
+    python benchmarks/stub_winappdriver.py --port 4723 --latency 2
+    python benchmarks/stub_winappdriver.py --latency 5 --jitter 3 --tree-size 2000 --screen 1920x1080
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.source_snapshot import SourceSnapshot
+
+# 1x1 白色 PNG
+BLANK_PNG_BASE64 = (
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=='
+)
+
+SAMPLE_SOURCE = (
+    '<?xml version="1.0" encoding="utf-16"?>'
+    '<Window Name="Calculator" AutomationId="" ClassName="ApplicationFrameWindow" RuntimeId="42.1">'
+    '<Button Name="One" AutomationId="num1Button" ClassName="Button" RuntimeId="42.1.1" />'
+    '<Button Name="Plus" AutomationId="plusButton" ClassName="Button" RuntimeId="42.1.2" />'
+    '<Text Name="Display is 0" AutomationId="CalculatorResults" ClassName="TextBlock" RuntimeId="42.1.3" />'
+    '</Window>'
+)
+
+NO_SUCH_ELEMENT_STATUS = 7
+NO_SUCH_SESSION_STATUS = 6
+STALE_ELEMENT_STATUS = 10
+
+# 生成控件树时每个分组面板包含的控件数
+GROUP_SIZE = 20
+
+GENERATED_CONTROLS = (('Button', 'Button'), ('Text', 'TextBlock'), ('Edit', 'TextBox'), ('CheckBox', 'CheckBox'))
+
+
+def build_source(tree_size: int = 0) -> str:
+    """
+    生成控件树 XML
+
+    前三个控件与 SAMPLE_SOURCE 相同（One / Plus / CalculatorResults），其后追加 tree_size 个控件，
+    每 GROUP_SIZE 个放在一个 Pane 中，Name 为 "Item {序号}"，AutomationId 为 "item{序号}"。
+
+    :param tree_size: 额外生成的控件数量，0 时返回 SAMPLE_SOURCE
+    :return: XML 字符串
+    """
+    if tree_size <= 0:
+        return SAMPLE_SOURCE
+    parts = [SAMPLE_SOURCE[:SAMPLE_SOURCE.rindex('</Window>')]]
+    for group in range((tree_size + GROUP_SIZE - 1) // GROUP_SIZE):
+        group_id = f'42.1.{group + 4}'
+        parts.append(f'<Pane Name="Group {group}" AutomationId="group{group}" ClassName="Panel" RuntimeId="{group_id}">')
+        for offset in range(min(GROUP_SIZE, tree_size - group * GROUP_SIZE)):
+            index = group * GROUP_SIZE + offset
+            tag, class_name = GENERATED_CONTROLS[index % len(GENERATED_CONTROLS)]
+            parts.append(f'<{tag} Name={quoteattr(f"Item {index}")} AutomationId="item{index}" '
+                         f'ClassName="{class_name}" RuntimeId="{group_id}.{offset + 1}" />')
+        parts.append('</Pane>')
+    parts.append('</Window>')
+    return ''.join(parts)
+
+
+def build_png(width: int, height: int, seed: int = 0) -> bytes:
+    """
+    生成指定分辨率的 RGB PNG
+
+    由少量随机行重复组成，压缩后的大小与真实界面截图处于同一量级（纯色图片压缩后过小，会低估编码与传输开销）。
+
+    :return: PNG 字节
+    """
+    rng = random.Random(seed)
+    rows = [b'\x00' + bytes(rng.getrandbits(8) for _ in range(width * 3)) for _ in range(8)]
+    raw = b''.join(rows[(y // 16) % len(rows)] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 以支持 keep-alive
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # 关闭 Nagle，避免 keep-alive 连接上头部与正文分开发送时的延迟确认等待
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _send(self, payload, status=200):
+        latency = self.server.latency
+        if self.server.jitter:
+            latency += random.uniform(0, self.server.jitter)
+        if latency:
+            time.sleep(latency)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _command(self, method):
+        """
+        记录命令并检查会话，会话不存在时返回 None（已发送错误响应）
+        """
+        path = self.path.rstrip('/')
+        command = re.sub(r'^/session/[^/]+', '/session/{id}', path)
+        command = re.sub(r'/element/[^/]+/', '/element/{id}/', command)
+        self.server.record(f'{method} {command}')
+
+        match = re.match(r'^/session/([^/]+)/', path + '/')
+        if match and not (method == 'POST' and path == '/session') and not self.server.has_session(match.group(1)):
+            self._send({'status': NO_SUCH_SESSION_STATUS,
+                        'value': {'message': 'A session is either terminated or not started'}}, 404)
+            return None
+
+        match = re.search(r'/element/([^/]+)/', path)
+        if match and self.server.take_stale(match.group(1)):
+            self._send({'status': STALE_ELEMENT_STATUS, 'value': {
+                'message': 'An element command failed because the referenced element is no longer attached to the DOM.'
+            }}, 404)
+            return None
+        return path
+
+    def do_GET(self):
+        path = self._command('GET')
+        if path is None:
+            return
+        if path == '/status':
+            self._send({'status': 0, 'value': {'build': {'version': 'stub'}}})
+        elif path.endswith('/screenshot'):
+            self._send({'status': 0, 'value': self.server.screenshot})
+        elif path.endswith('/source'):
+            self._send({'status': 0, 'value': self.server.source})
+        elif re.search(r'/element/[^/]+/(displayed|enabled)$', path):
+            self._send({'status': 0, 'value': True})
+        elif re.search(r'/element/[^/]+/text$', path):
+            self._send({'status': 0, 'value': 'Display is 0'})
+        else:
+            self._send({'status': 9, 'value': {'message': 'Unknown command'}}, 404)
+
+    def do_POST(self):
+        body = self._read_body()
+        path = self._command('POST')
+        if path is None:
+            return
+        if path == '/session':
+            session_id = str(uuid.uuid4())
+            self.server.open_session(session_id)
+            self._send({'status': 0, 'sessionId': session_id, 'value': body.get('desiredCapabilities', {})})
+        elif path.endswith('/element'):
+            element_id = self.server.find_element(body.get('using'), body.get('value'))
+            if element_id is None:
+                self._send({'status': NO_SUCH_ELEMENT_STATUS, 'value': {
+                    'message': 'An element could not be located on the page using the given search parameters.'
+                }}, 404)
+            else:
+                self._send({'status': 0, 'value': {'ELEMENT': element_id}})
+        elif re.search(r'/element/[^/]+/(click|value|clear)$', path):
+            self._send({'status': 0, 'value': None})
+        else:
+            self._send({'status': 9, 'value': {'message': 'Unknown command'}}, 404)
+
+    def do_DELETE(self):
+        path = self._command('DELETE')
+        if path is None:
+            return
+        match = re.match(r'^/session/([^/]+)$', path)
+        if match:
+            self.server.close_session(match.group(1))
+        self._send({'status': 0, 'value': None})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 并发基准测试时避免监听队列溢出
+    request_queue_size = 256
+    latency = 0.0
+    jitter = 0.0
+
+    def configure(self, latency: float = 0.0, jitter: float = 0.0, tree_size: int = 0, screen_size=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.set_source(build_source(tree_size))
+        self.screenshot = (base64.b64encode(build_png(*screen_size)).decode('ascii')
+                           if screen_size else BLANK_PNG_BASE64)
+        self.sessions = set()
+        self.commands = Counter()
+        self.stale = set()
+        self._lock = threading.Lock()
+
+    def set_source(self, source: str):
+        """
+        替换控件树（模拟界面变化）
+        """
+        self.snapshot = SourceSnapshot(source)
+        self.source = source
+
+    def expire_element(self, element_id: str):
+        """
+        该元素的下一个命令返回 StaleElementReference（模拟界面重绘后元素失效）
+        """
+        with self._lock:
+            self.stale.add(element_id)
+
+    def take_stale(self, element_id: str) -> bool:
+        with self._lock:
+            if element_id in self.stale:
+                self.stale.discard(element_id)
+                return True
+            return False
+
+    def find_element(self, strategy, locator):
+        """
+        查找元素，返回 RuntimeId；不支持本地查找的策略（如复杂 XPath）返回第一个按钮
+        """
+        if not strategy or not locator:
+            return None
+        found = self.snapshot.find_all(strategy, locator)
+        if found is None:
+            return '42.1.1'
+        return found[0].get('RuntimeId') if found else None
+
+    def record(self, command: str):
+        with self._lock:
+            self.commands[command] += 1
+
+    def open_session(self, session_id: str):
+        with self._lock:
+            self.sessions.add(session_id)
+
+    def close_session(self, session_id: str):
+        with self._lock:
+            self.sessions.discard(session_id)
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self.sessions
+
+    def stats(self) -> dict:
+        """
+        各命令的调用次数与当前会话数
+        """
+        with self._lock:
+            return {'sessions': len(self.sessions), 'commands': dict(self.commands)}
+
+
+def parse_screen_size(value: str):
+    """
+    解析 "1920x1080" 形式的分辨率
+    """
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height)
+
+
+def start_stub_server(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                      tree_size: int = 0, screen_size=None) -> ThreadingHTTPServer:
+    """
+    在后台线程中启动桩服务
+
+    :param host: 监听地址
+    :param port: 监听端口，0 表示随机端口
+    :param latency: 每个命令的模拟延迟（秒）
+    :param jitter: 每个命令额外的随机延迟上限（秒）
+    :param tree_size: 控件树中额外生成的控件数量，见 build_source()
+    :param screen_size: 截图分辨率 (宽, 高)，为空时返回 1x1 PNG
+    :return: 服务对象，server.server_address 为实际地址
+    """
+    server = StubServer((host, port), StubHandler)
+    server.configure(latency, jitter, tree_size, screen_size)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地 WinAppDriver 桩服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4723)
+    parser.add_argument('--latency', type=float, default=0.0, help='每个命令的模拟延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='每个命令额外的随机延迟上限（毫秒）')
+    parser.add_argument('--tree-size', type=int, default=0, help='控件树中额外生成的控件数量')
+    parser.add_argument('--screen', type=parse_screen_size, help='截图分辨率，如 1920x1080，默认 1x1')
+    parser.add_argument('--nodes', type=int, default=1, help='启动的服务数量，端口从 --port 开始依次递增')
+    args = parser.parse_args()
+
+    servers = [start_stub_server(args.host, args.port + i, args.latency / 1000.0, args.jitter / 1000.0,
+                                 args.tree_size, args.screen)
+               for i in range(args.nodes)]
+    urls = ','.join(f"http://{args.host}:{server.server_address[1]}" for server in servers)
+    print(f"Stub WinAppDriver listening on {urls}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
@@ -6,9 +6,78 @@ class Config:
     
     # WinAppDriver 配置
     WINAPPDRIVER_URL = os.environ.get('WINAPPDRIVER_URL') or 'http://127.0.0.1:4723'
+    # 多个节点时用逗号分隔，新会话分配到负载最低的可用节点
+    WINAPPDRIVER_URLS = [url for url in (os.environ.get('WINAPPDRIVER_URLS') or WINAPPDRIVER_URL).split(',') if url]
+    NODE_PROBE_INTERVAL = float(os.environ.get('NODE_PROBE_INTERVAL') or '10')  # 节点 /status 探测间隔（秒）
+    NODE_PROBE_TIMEOUT = float(os.environ.get('NODE_PROBE_TIMEOUT') or '2')  # 节点探测超时（秒）
+    
+    # 预热会话池配置
+    WARM_POOL_APPS = [app_id for app_id in (os.environ.get('WARM_POOL_APPS') or '').split(',') if app_id]  # 需要预热的应用 ID，逗号分隔
+    WARM_POOL_SIZE = int(os.environ.get('WARM_POOL_SIZE') or '2')  # 每个应用保持的空闲会话数
+    WARM_POOL_RESET_HOOK = os.environ.get('WARM_POOL_RESET_HOOK') or ''  # 归还会话时的重置函数 (模块:函数)，为空时关闭并重新启动
+    
+    # HTTP 连接池配置
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE') or '20')  # 每个 WinAppDriver 地址的最大连接数
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT') or '5')  # 连接超时（秒）
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT') or '60')  # 读取超时（秒）
+    ASYNC_HTTP_POOL_SIZE = int(os.environ.get('ASYNC_HTTP_POOL_SIZE') or '200')  # async_app.py 的最大并发连接数
+    
+    # 元素缓存配置
+    ELEMENT_CACHE_SIZE = int(os.environ.get('ELEMENT_CACHE_SIZE') or '256')  # 每个会话最多缓存的定位器数量
+    ELEMENT_CACHE_TTL = float(os.environ.get('ELEMENT_CACHE_TTL') or '30')  # 缓存有效期（秒），0 表示不过期
+    
+    # 页面源码快照配置（本地查找元素）
+    SNAPSHOT_POLICY = os.environ.get('SNAPSHOT_POLICY') or 'passive'  # off / passive / refresh
+    SNAPSHOT_MAX_AGE = float(os.environ.get('SNAPSHOT_MAX_AGE') or '5')  # 快照最长使用时间（秒）
+    
+    # 等待配置
+    WAIT_DEFAULT_TIMEOUT = float(os.environ.get('WAIT_DEFAULT_TIMEOUT') or '10')  # 默认等待期限（秒）
+    WAIT_MAX_TIMEOUT = float(os.environ.get('WAIT_MAX_TIMEOUT') or '60')  # 单次等待的最长期限（秒）
+    
+    # 录制与回放配置
+    RECORDINGS_DIR = os.environ.get('RECORDINGS_DIR') or 'recordings'  # 录制文件目录
+    REPLAY_MAX_PARALLEL = int(os.environ.get('REPLAY_MAX_PARALLEL') or '8')  # 单次回放请求最多同时使用的会话数
+    REPLAY_MAX_RUNS = int(os.environ.get('REPLAY_MAX_RUNS') or '100')  # 单次回放请求最多的回放次数
+    
+    # 控件树分页接口配置
+    TREE_CACHE_MAX_AGE = float(os.environ.get('TREE_CACHE_MAX_AGE') or '30')  # 界面未操作时复用已解析控件树的最长时间（秒）
+    TREE_PAGE_SIZE = int(os.environ.get('TREE_PAGE_SIZE') or '200')  # 每个节点默认返回的子节点数
+    TREE_MAX_PAGE_SIZE = int(os.environ.get('TREE_MAX_PAGE_SIZE') or '1000')  # 每个节点最多返回的子节点数
+    TREE_MAX_DEPTH = int(os.environ.get('TREE_MAX_DEPTH') or '5')  # 单次请求最多展开的层数
+    TREE_DEFAULT_ATTRS = os.environ.get('TREE_DEFAULT_ATTRS') or 'Name,AutomationId,ClassName'  # 默认返回的属性，* 表示全部
+    TREE_SEARCH_LIMIT = int(os.environ.get('TREE_SEARCH_LIMIT') or '50')  # 搜索默认返回的结果数
     
     # 截图配置
     SCREENSHOT_QUALITY = int(os.environ.get('SCREENSHOT_QUALITY') or '80')  # JPEG 质量 0-100
+    SCREENSHOT_CACHE_TTL = float(os.environ.get('SCREENSHOT_CACHE_TTL') or '1')  # 截图结果缓存有效期（秒）
+    
+    # 截图处理池配置
+    IMAGE_POOL_MODE = os.environ.get('IMAGE_POOL_MODE') or 'thread'  # thread / process
+    IMAGE_POOL_WORKERS = int(os.environ.get('IMAGE_POOL_WORKERS') or '0') or None  # 默认 CPU 核数
+    IMAGE_POOL_QUEUE = int(os.environ.get('IMAGE_POOL_QUEUE') or '32')  # 最大排队任务数
+    
+    # 增量截图配置
+    DELTA_TILE_SIZE = int(os.environ.get('DELTA_TILE_SIZE') or '32')  # 比较块大小（像素）
+    DELTA_MAX_CHANGED_RATIO = float(os.environ.get('DELTA_MAX_CHANGED_RATIO') or '0.5')  # 超过该变化比例时返回整帧
+    
+    # 实时画面推流配置
+    STREAM_MAX_FPS = float(os.environ.get('STREAM_MAX_FPS') or '5')  # 最大帧率
+    STREAM_MIN_FPS = float(os.environ.get('STREAM_MIN_FPS') or '0.5')  # 观看者积压时的最小帧率
+    STREAM_MIN_QUALITY = int(os.environ.get('STREAM_MIN_QUALITY') or '30')  # 观看者积压时的最低 JPEG 质量
+    
+    # 响应压缩配置（br 需要安装 brotli）
+    COMPRESSION_ENABLED = (os.environ.get('COMPRESSION_ENABLED') or 'true').lower() == 'true'  # 是否按 Accept-Encoding 压缩响应
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or '1024')  # 小于该大小的响应不压缩（字节）
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL') or '6')  # 动态响应的 gzip 级别 (1-9)
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY') or '5')  # 动态响应的 brotli 质量 (0-11)
+    
+    # 请求指标配置
+    SERVER_TIMING = (os.environ.get('SERVER_TIMING') or 'true').lower() == 'true'  # 是否返回 Server-Timing 响应头（浏览器开发者工具显示耗时分段）
     
     # 会话超时配置（秒）
-    SESSION_TIMEOUT = int(os.environ.get('SESSION_TIMEOUT') or '3600')
+    SESSION_TIMEOUT = int(os.environ.get('SESSION_TIMEOUT') or '3600')  # 空闲超过该时间的会话自动关闭，0 表示不回收
+    MAX_SESSIONS = int(os.environ.get('MAX_SESSIONS') or '20')  # 最大会话数，超出时关闭最久未使用的会话，0 表示不限制
+    
+    # 会话状态存储：memory（单进程）或 sqlite:///路径（同一主机的多个工作进程共享）
+    SESSION_STORE = os.environ.get('SESSION_STORE') or 'memory'
+    SESSION_STORE_SYNC_INTERVAL = float(os.environ.get('SESSION_STORE_SYNC_INTERVAL') or '5')  # 写回会话状态的最短间隔（秒）
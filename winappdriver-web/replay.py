@@ -0,0 +1,80 @@
+"""
+命令行回放录制文件，直接连接 WinAppDriver（不需要启动 app.py），适合在持续集成中批量运行回归流程
+
+用法:
+    python replay.py recordings/calc.jsonl --runs 20 --parallel 4
+    WINAPPDRIVER_URLS=http://host1:4723,http://host2:4723 python replay.py recordings/calc.jsonl --runs 20 --parallel 8
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+
+from config import Config
+from utils.recorder import Replayer, load_recording
+from utils.transport import configure_shared_transport
+from utils.winappdriver import WinAppDriverClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回放录制的 WinAppDriver 命令')
+    parser.add_argument('recording', help='录制文件 (.jsonl)')
+    parser.add_argument('--runs', type=int, default=1, help='回放次数')
+    parser.add_argument('--parallel', type=int, default=1, help='同时回放的会话数')
+    parser.add_argument('--app-path', help='应用路径，默认使用录制时的应用')
+    parser.add_argument('--timeout', type=float, default=Config.WAIT_DEFAULT_TIMEOUT, help='每次等待元素就绪的期限（秒）')
+    parser.add_argument('--json', help='将结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    try:
+        header, events = load_recording(args.recording)
+    except ValueError as e:
+        parser.error(f'{args.recording}: {e}')
+    app_path = args.app_path or header.get('appPath')
+    if not app_path:
+        parser.error('录制文件中没有应用路径，请指定 --app-path')
+
+    transport = configure_shared_transport(
+        pool_size=max(Config.HTTP_POOL_SIZE, args.parallel),
+        connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=Config.HTTP_READ_TIMEOUT
+    )
+    # 多个节点时依次分配
+    nodes = itertools.cycle(Config.WINAPPDRIVER_URLS)
+    nodes_lock = threading.Lock()
+
+    def acquire():
+        with nodes_lock:
+            node_url = next(nodes)
+        client = WinAppDriverClient(node_url, app_path=app_path, transport=transport,
+                                    cache_size=Config.ELEMENT_CACHE_SIZE, cache_ttl=Config.ELEMENT_CACHE_TTL,
+                                    snapshot_policy=Config.SNAPSHOT_POLICY, snapshot_max_age=Config.SNAPSHOT_MAX_AGE)
+        client.start_application()
+        return client.session_id, client
+
+    def release(session_id, client):
+        try:
+            client.quit()
+        except Exception:
+            pass
+
+    replayer = Replayer(acquire, release, wait_timeout=args.timeout)
+    result = replayer.run(events, runs=args.runs, parallel=args.parallel)
+
+    for run in result['runs']:
+        detail = f"{run['elapsedMs']:.0f} ms" if 'elapsedMs' in run else ''
+        if run['status'] != 'passed':
+            detail += f" 步骤 {run.get('failedStep')}: {run.get('error')}"
+        print(f"#{run['run']:<4} {run['status']:<7} {detail}")
+    print(f"通过 {result['passed']}，失败 {result['failed']}，用时 {result['elapsedMs'] / 1000:.1f} 秒，"
+          f"{result['runsPerMinute']} 次/分钟")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if result['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
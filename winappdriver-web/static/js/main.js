@@ -1,12 +1,20 @@
 // 全局变量
 let sessionId = null;
 let currentElementId = null;
+let liveStreaming = false;
+let frameVersion = null;  // 画布上当前帧的版本号，用于增量截图
+
+// 控件树按需展开状态
+let treeEtag = null;             // 当前显示的控件树内容哈希，变化后重新加载
+let expandedNodes = new Set();   // 已展开的节点标识，刷新后恢复
+let selectedNodeId = null;
 
 // DOM 元素
 const appPathInput = document.getElementById('appPath');
 const startSessionBtn = document.getElementById('startSessionBtn');
 const stopSessionBtn = document.getElementById('stopSessionBtn');
 const refreshScreenshotBtn = document.getElementById('refreshScreenshotBtn');
+const liveStreamBtn = document.getElementById('liveStreamBtn');
 const refreshSourceBtn = document.getElementById('refreshSourceBtn');
 const elementStrategySelect = document.getElementById('elementStrategy');
 const elementLocatorInput = document.getElementById('elementLocator');
@@ -15,15 +23,25 @@ const clickElementBtn = document.getElementById('clickElementBtn');
 const textInput = document.getElementById('textInput');
 const sendTextBtn = document.getElementById('sendTextBtn');
 const screenshotImg = document.getElementById('screenshot');
+const screenshotCanvas = document.getElementById('screenshotCanvas');
+const screenshotCtx = screenshotCanvas.getContext('2d');
 const loadingIndicator = document.getElementById('loadingIndicator');
 const sourceTreeDiv = document.getElementById('sourceTree');
+const treeSearchInput = document.getElementById('treeSearchInput');
+const treeSearchBtn = document.getElementById('treeSearchBtn');
+const treeSearchResults = document.getElementById('treeSearchResults');
 
 // 事件监听器
 document.addEventListener('DOMContentLoaded', function() {
     startSessionBtn.addEventListener('click', startSession);
     stopSessionBtn.addEventListener('click', stopSession);
     refreshScreenshotBtn.addEventListener('click', refreshScreenshot);
+    liveStreamBtn.addEventListener('click', toggleLiveStream);
     refreshSourceBtn.addEventListener('click', refreshSource);
+    treeSearchBtn.addEventListener('click', searchTree);
+    treeSearchInput.addEventListener('keydown', event => {
+        if (event.key === 'Enter') searchTree();
+    });
     findElementBtn.addEventListener('click', findElement);
     clickElementBtn.addEventListener('click', clickElement);
     sendTextBtn.addEventListener('click', sendText);
@@ -86,6 +104,7 @@ async function stopSession() {
         const data = await response.json();
         
         if (response.ok) {
+            stopLiveStream();
             sessionId = null;
             currentElementId = null;
             updateSessionControls(false);
@@ -110,15 +129,26 @@ async function refreshScreenshot() {
         return;
     }
     
+    // 实时画面模式下截图会自动更新
+    if (liveStreaming) {
+        return;
+    }
+    
     try {
         showLoading(true);
         
-        const response = await fetch(`/api/session/${sessionId}/screenshot`);
+        // 携带画布上的帧版本号，服务端只返回变化的区域
+        let url = `/api/session/${sessionId}/screenshot/delta`;
+        if (frameVersion !== null) {
+            url += `?since=${frameVersion}`;
+        }
+        const response = await fetch(url);
         const data = await response.json();
         
         if (response.ok) {
             // 显示截图
-            screenshotImg.src = `data:image/jpeg;base64,${data.screenshot}`;
+            await applyFrame(data);
+            frameVersion = data.version;
         } else {
             throw new Error(data.error || '获取截图失败');
         }
@@ -130,7 +160,67 @@ async function refreshScreenshot() {
     }
 }
 
-// 刷新控件树
+// 将增量截图绘制到画布
+async function applyFrame(frame) {
+    if (frame.type === 'full') {
+        screenshotCanvas.width = frame.width;
+        screenshotCanvas.height = frame.height;
+        await drawFrameImage(frame.data, 0, 0);
+    } else if (frame.type === 'delta') {
+        await Promise.all(frame.regions.map(region => drawFrameImage(region.data, region.x, region.y)));
+    }
+    screenshotCanvas.classList.remove('hidden');
+    screenshotImg.classList.add('hidden');
+}
+
+function drawFrameImage(data, x, y) {
+    return new Promise((resolve, reject) => {
+        const image = new Image();
+        image.onload = () => {
+            screenshotCtx.drawImage(image, x, y);
+            resolve();
+        };
+        image.onerror = () => reject(new Error('截图解码失败'));
+        image.src = `data:image/jpeg;base64,${data}`;
+    });
+}
+
+// 开启/关闭实时画面
+function toggleLiveStream() {
+    if (!sessionId) {
+        alert('请先启动会话');
+        return;
+    }
+    
+    if (liveStreaming) {
+        stopLiveStream();
+    } else {
+        // 服务端以 MJPEG 持续推送画面，多个页面共享同一个采集循环
+        liveStreaming = true;
+        liveStreamBtn.textContent = '停止实时画面';
+        refreshScreenshotBtn.disabled = true;
+        screenshotCanvas.classList.add('hidden');
+        screenshotImg.classList.remove('hidden');
+        screenshotImg.src = `/api/session/${sessionId}/stream.mjpg`;
+    }
+}
+
+// 停止实时画面（断开连接后服务端自动移除观看者）
+function stopLiveStream() {
+    if (!liveStreaming) {
+        return;
+    }
+    liveStreaming = false;
+    liveStreamBtn.textContent = '实时画面';
+    refreshScreenshotBtn.disabled = !sessionId;
+    screenshotImg.src = '';
+    if (frameVersion !== null) {
+        screenshotImg.classList.add('hidden');
+        screenshotCanvas.classList.remove('hidden');
+    }
+}
+
+// 刷新控件树（只加载根节点和第一层，其余节点展开时再按需获取）
 async function refreshSource() {
     if (!sessionId) {
         alert('请先启动会话');
@@ -140,16 +230,22 @@ async function refreshSource() {
     try {
         showLoading(true);
         
-        const response = await fetch(`/api/session/${sessionId}/source`);
-        const data = await response.json();
+        const data = await fetchTree({ depth: 1, refresh: 1 });
+        treeEtag = data.etag;
+        sourceTreeDiv.innerHTML = '';
+        sourceTreeDiv.appendChild(createTreeNode(data.node));
         
-        if (response.ok) {
-            // 显示控件树sourceTreeDiv.innerHTML = `<pre>${formatXml(data.source)}</pre>`;
-            const rawxml = data.source;
-            const formattedXml = formatXml(rawxml);
-            sourceTreeDiv.textContent = formattedXml;
-        } else {
-            throw new Error(data.error || '获取控件树失败');
+        // 恢复刷新前展开的节点（父节点先于子节点展开）
+        const expanded = Array.from(expandedNodes);
+        expandedNodes = new Set();
+        for (const nodeId of expanded) {
+            const item = findTreeItem(nodeId);
+            if (item) {
+                await expandTreeNode(item);
+            }
+        }
+        if (selectedNodeId) {
+            markSelectedNode(findTreeItem(selectedNodeId));
         }
     } catch (error) {
         console.error('获取控件树失败:', error);
@@ -159,6 +255,59 @@ async function refreshSource() {
     }
 }
 
+// 搜索控件树
+async function searchTree() {
+    if (!sessionId) {
+        alert('请先启动会话');
+        return;
+    }
+    
+    const query = treeSearchInput.value.trim();
+    if (!query) {
+        treeSearchResults.innerHTML = '';
+        return;
+    }
+    
+    try {
+        showLoading(true);
+        
+        const response = await fetch(`/api/session/${sessionId}/tree/search?` + new URLSearchParams({ q: query }));
+        const data = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(data.error || '搜索控件树失败');
+        }
+        if (treeEtag !== null && data.etag !== treeEtag) {
+            // 控件树已变化，重新加载后再定位结果
+            await refreshSource();
+        }
+        
+        treeSearchResults.innerHTML = '';
+        if (data.matches.length === 0) {
+            treeSearchResults.textContent = '没有匹配的控件';
+            return;
+        }
+        for (const match of data.matches) {
+            const row = document.createElement('div');
+            row.className = 'tree-search-result';
+            row.textContent = treeNodeLabel(match.node);
+            row.addEventListener('click', () => revealTreeNode(match.path));
+            treeSearchResults.appendChild(row);
+        }
+        if (data.truncated) {
+            const more = document.createElement('div');
+            more.className = 'tree-more';
+            more.textContent = `只显示前 ${data.matches.length} 个结果`;
+            treeSearchResults.appendChild(more);
+        }
+    } catch (error) {
+        console.error('搜索控件树失败:', error);
+        alert('搜索控件树失败: ' + error.message);
+    } finally {
+        showLoading(false);
+    }
+}
+
 // 查找元素
 async function findElement() {
     if (!sessionId) {
@@ -222,6 +371,8 @@ async function clickElement() {
         const data = await response.json();
         
         if (response.ok) {
+            // 元素失效后服务端会重新查找，更新为新的元素 ID
+            currentElementId = data.elementId || currentElementId;
             alert('元素点击成功');
             // 刷新截图以显示变化
             await refreshScreenshot();
@@ -264,6 +415,7 @@ async function sendText() {
         const data = await response.json();
         
         if (response.ok) {
+            currentElementId = data.elementId || currentElementId;
             alert('文本发送成功');
             // 清空文本输入框
             textInput.value = '';
@@ -285,7 +437,9 @@ function updateSessionControls(active) {
     startSessionBtn.disabled = active;
     stopSessionBtn.disabled = !active;
     refreshScreenshotBtn.disabled = !active;
+    liveStreamBtn.disabled = !active;
     refreshSourceBtn.disabled = !active;
+    treeSearchBtn.disabled = !active;
     findElementBtn.disabled = !active;
 }
 
@@ -307,67 +461,200 @@ function showLoading(show) {
 // 清除截图
 function clearScreenshot() {
     screenshotImg.src = '';
+    screenshotImg.classList.remove('hidden');
+    frameVersion = null;
+    screenshotCtx.clearRect(0, 0, screenshotCanvas.width, screenshotCanvas.height);
+    screenshotCanvas.classList.add('hidden');
 }
 
 // 清除控件树
 function clearSourceTree() {
+    treeEtag = null;
+    expandedNodes = new Set();
+    selectedNodeId = null;
     sourceTreeDiv.innerHTML = '<p>尚未加载控件树</p>';
+    treeSearchResults.innerHTML = '';
 }
 
-// 格式化 XML
-function formatXml(xml) {
+// 请求控件树节点，参数见 /api/session/<id>/tree
+async function fetchTree(params) {
+    const response = await fetch(`/api/session/${sessionId}/tree?` + new URLSearchParams(params));
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.error || '获取控件树失败');
+    }
+    return data;
+}
+
+// 节点显示文本：控件类型 "Name" #AutomationId
+function treeNodeLabel(node) {
+    let label = node.tag;
+    if (node.attributes.Name) {
+        label += ` "${node.attributes.Name}"`;
+    }
+    if (node.attributes.AutomationId) {
+        label += ` #${node.attributes.AutomationId}`;
+    }
+    if (node.attributes.ClassName) {
+        label += ` (${node.attributes.ClassName})`;
+    }
+    return label;
+}
+
+// 创建节点元素，已返回的子节点一并创建
+function createTreeNode(node) {
+    const item = document.createElement('div');
+    item.className = 'tree-node';
+    item.dataset.id = node.id;
+    
+    const row = document.createElement('div');
+    row.className = 'tree-row';
+    const toggle = document.createElement('span');
+    toggle.className = 'tree-toggle';
+    toggle.textContent = node.childCount > 0 ? '▸' : ' ';
+    const label = document.createElement('span');
+    label.className = 'tree-label';
+    label.textContent = treeNodeLabel(node);
+    label.title = node.id;
+    if (node.childCount > 0) {
+        const count = document.createElement('span');
+        count.className = 'tree-count';
+        count.textContent = ` ${node.childCount}`;
+        label.appendChild(count);
+    }
+    row.appendChild(toggle);
+    row.appendChild(label);
+    item.appendChild(row);
+    
+    const children = document.createElement('div');
+    children.className = 'tree-children hidden';
+    item.appendChild(children);
+    
+    if (node.childCount > 0) {
+        toggle.addEventListener('click', () => toggleTreeNode(item));
+    }
+    label.addEventListener('click', () => selectTreeNode(item));
+    
+    if (node.children) {
+        appendTreeChildren(item, node);
+        setTreeNodeExpanded(item, true);
+    }
+    return item;
+}
+
+// 追加一页子节点，还有剩余时添加"加载更多"
+function appendTreeChildren(item, node) {
+    const children = item.querySelector(':scope > .tree-children');
+    for (const child of node.children) {
+        children.appendChild(createTreeNode(child));
+    }
+    item.dataset.loaded = 'true';
+    if (node.nextOffset !== undefined) {
+        item.dataset.nextOffset = node.nextOffset;
+        const more = document.createElement('div');
+        more.className = 'tree-more';
+        more.textContent = `加载更多（剩余 ${node.childCount - node.nextOffset} 个）`;
+        more.addEventListener('click', () => loadMoreTreeChildren(item));
+        children.appendChild(more);
+    } else {
+        delete item.dataset.nextOffset;
+    }
+}
+
+// 加载下一页子节点
+async function loadMoreTreeChildren(item) {
+    const more = item.querySelector(':scope > .tree-children > .tree-more');
+    if (more) {
+        more.remove();
+    }
+    return loadTreeChildren(item, Number(item.dataset.nextOffset));
+}
+
+// 获取节点的一页子节点
+async function loadTreeChildren(item, offset) {
     try {
-        const parser = new DOMParser();
-        const xmlDoc = parser.parseFromString(xml, "text/xml");
-        // --- 新增：过滤属性的逻辑 ---
-        const allowedAttrs = ['ClassName', 'RuntimeId', 'Name'];
-        
-        // 递归遍历所有节点
-        const walk = (node) => {
-            if (node.attributes) {
-                // 将属性名转为数组进行遍历，因为直接删除属性会影响循环
-                const attrs = Array.from(node.attributes);
-                for (const attr of attrs) {
-                    if (!allowedAttrs.includes(attr.name)) {
-                        node.removeAttribute(attr.name);
-                    }
-                }
-            }
-            node.childNodes.forEach(walk);
-        };
-        walk(xmlDoc.documentElement);
-        // -----------------------
+        const data = await fetchTree({ node: item.dataset.id, depth: 1, offset: offset });
+        if (treeEtag !== null && data.etag !== treeEtag) {
+            // 控件树已变化，节点位置可能不同，整体重新加载
+            await refreshSource();
+            return false;
+        }
+        appendTreeChildren(item, data.node);
+        return true;
+    } catch (error) {
+        console.error('获取子节点失败:', error);
+        alert('获取子节点失败: ' + error.message);
+        return false;
+    }
+}
 
-        const serializer = new XMLSerializer();
-        const formatted = serializer.serializeToString(xmlDoc);
-        
-        // 以下为你原有的缩进逻辑
-        let indent = 0;
-        let result = '';
-        // 移除多余空白并分割标签
-        const lines = formatted.replace(/>\s*</g, '><').split(/>(?=<)/);
-        
-        for (let i = 0; i < lines.length; i++) {
-            let line = lines[i];
-            if (!line.startsWith('<')) line = '<' + line;
-            if (!line.endsWith('>')) line = line + '>';
-
-            // 匹配闭合标签 </Tag>
-            if (line.match(/^<\//)) {
-                indent--;
-            }
-            
-            result += '  '.repeat(Math.max(0, indent)) + line + '\n';
-            
-            // 匹配起始标签 <Tag> 且不是自闭合标签 <Tag/>
-            if (line.match(/^<[^/!][^>]*[^/]>$/)) {
-                indent++;
+function setTreeNodeExpanded(item, expanded) {
+    item.querySelector(':scope > .tree-children').classList.toggle('hidden', !expanded);
+    item.querySelector(':scope > .tree-row > .tree-toggle').textContent = expanded ? '▾' : '▸';
+    if (expanded) {
+        expandedNodes.add(item.dataset.id);
+    } else {
+        expandedNodes.delete(item.dataset.id);
+    }
+}
+
+// 展开节点，首次展开时获取子节点
+async function expandTreeNode(item) {
+    if (!item.dataset.loaded && !(await loadTreeChildren(item, 0))) {
+        return;
+    }
+    setTreeNodeExpanded(item, true);
+}
+
+async function toggleTreeNode(item) {
+    if (item.querySelector(':scope > .tree-children').classList.contains('hidden')) {
+        await expandTreeNode(item);
+    } else {
+        setTreeNodeExpanded(item, false);
+    }
+}
+
+function findTreeItem(nodeId) {
+    return sourceTreeDiv.querySelector(`.tree-node[data-id="${CSS.escape(nodeId)}"]`);
+}
+
+function markSelectedNode(item) {
+    sourceTreeDiv.querySelectorAll('.tree-row.selected').forEach(row => row.classList.remove('selected'));
+    if (item) {
+        item.querySelector(':scope > .tree-row').classList.add('selected');
+    }
+}
+
+// 选中节点：有 RuntimeId 的节点可直接作为元素 ID 点击或输入
+function selectTreeNode(item) {
+    selectedNodeId = item.dataset.id;
+    markSelectedNode(item);
+    if (!selectedNodeId.includes('/')) {
+        currentElementId = selectedNodeId;
+        updateElementControls(true);
+    }
+}
+
+// 依次展开祖先节点并定位到搜索结果，目标不在已加载的分页中时继续加载
+async function revealTreeNode(path) {
+    for (let i = 0; i < path.length; i++) {
+        let item = findTreeItem(path[i]);
+        const parent = i > 0 ? findTreeItem(path[i - 1]) : null;
+        while (!item && parent && parent.dataset.nextOffset !== undefined) {
+            if (!(await loadMoreTreeChildren(parent))) {
+                return;
             }
+            item = findTreeItem(path[i]);
+        }
+        if (!item) {
+            alert('控件树已变化，请重新搜索');
+            return;
+        }
+        if (i < path.length - 1) {
+            await expandTreeNode(item);
+        } else {
+            selectTreeNode(item);
+            item.scrollIntoView({ block: 'center' });
         }
-        
-        return result.trim();
-    } catch (e) {
-        // 如果格式化失败，返回原始 XML
-        return xml;
     }
 }
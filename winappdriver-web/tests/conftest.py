@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+# 测试从任意目录运行时都能导入 app、utils 与 benchmarks
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_winappdriver import start_stub_server
+
+
+@pytest.fixture(scope='session')
+def stub():
+    """
+    本地 WinAppDriver 桩服务（控件树超过压缩阈值，便于测试响应压缩）
+    """
+    server = start_stub_server(tree_size=60)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(scope='session')
+def app_module(stub, tmp_path_factory):
+    """
+    连接到桩服务的 app 模块（配置在导入时读取，因此先设置环境变量）
+    """
+    os.environ['WINAPPDRIVER_URL'] = 'http://%s:%d' % stub.server_address
+    os.environ.pop('WINAPPDRIVER_URLS', None)
+    os.environ['RECORDINGS_DIR'] = str(tmp_path_factory.mktemp('recordings'))
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def session_id(client):
+    """
+    新建一个会话，测试结束后关闭
+    """
+    response = client.post('/api/session', json={'appPath': 'Calculator'})
+    assert response.status_code == 200
+    session_id = response.json['sessionId']
+    yield session_id
+    client.delete(f'/api/session/{session_id}')
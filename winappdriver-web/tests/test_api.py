@@ -0,0 +1,99 @@
+import gzip
+
+import pytest
+
+
+@pytest.mark.parametrize('steps', [
+    None,
+    [],
+    [{'action': 'drag'}],
+    [{'action': 'wait', 'strategy': 'name', 'locator': 'One', 'timeout': 'abc'}],
+    [{'action': 'wait', 'strategy': 'name', 'locator': 'One', 'timeout': None}],
+    [{'action': 'wait', 'strategy': 'name', 'locator': 'One', 'stableFor': 'soon'}],
+])
+def test_batch_rejects_invalid_steps(client, session_id, steps):
+    response = client.post(f'/api/session/{session_id}/batch', json={'steps': steps})
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+def test_batch_runs_steps(client, session_id):
+    response = client.post(f'/api/session/{session_id}/batch', json={'steps': [
+        {'action': 'find', 'strategy': 'name', 'locator': 'One', 'as': 'one'},
+        {'action': 'click', 'element': '$one'},
+        {'action': 'wait', 'strategy': 'name', 'locator': 'Plus', 'timeout': '1'},
+    ]})
+    assert response.status_code == 200
+    assert response.json['status'] == 'success'
+
+
+def test_unknown_session(client):
+    assert client.get('/api/session/missing/source').status_code == 404
+    assert client.post('/api/session/missing/batch', json={'steps': []}).status_code == 404
+
+
+def test_stale_element_is_found_again(client, session_id, stub):
+    url = f'/api/session/{session_id}'
+    element_id = client.post(f'{url}/element', json={'strategy': 'name', 'locator': 'One'}).json['elementId']
+    clicks = stub.stats()['commands'].get('POST /session/{id}/element/{id}/click', 0)
+
+    stub.expire_element(element_id)
+    response = client.post(f'{url}/element/{element_id}/click')
+    assert response.status_code == 200
+    assert response.json['elementId'] == element_id
+    # 失效的一次与重新查找后的一次
+    assert stub.stats()['commands']['POST /session/{id}/element/{id}/click'] == clicks + 2
+    assert client.get(f'{url}/cache').json['cache']['invalidations'] == 1
+
+
+def test_source_etag(client, session_id):
+    url = f'/api/session/{session_id}/source'
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert not response.data
+
+
+def test_source_etag_survives_compression(client, session_id):
+    url = f'/api/session/{session_id}/source'
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['ETag'].startswith('W/')
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_compression_negotiation(client, session_id):
+    url = f'/api/session/{session_id}/source'
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+
+    identity = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in identity.headers
+
+
+def test_small_responses_are_not_compressed(client, session_id):
+    response = client.get(f'/api/session/{session_id}/cache', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_lru_eviction(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.driver_sessions, 'max_sessions', 2)
+    created = [client.post('/api/session', json={'appPath': 'Calculator'}).json['sessionId'] for _ in range(2)]
+    # 访问第一个会话后再创建新会话，被关闭的应是第二个
+    assert client.get(f'/api/session/{created[0]}/cache').status_code == 200
+    created.append(client.post('/api/session', json={'appPath': 'Calculator'}).json['sessionId'])
+    try:
+        assert client.get(f'/api/session/{created[0]}/cache').status_code == 200
+        assert client.get(f'/api/session/{created[1]}/cache').status_code == 404
+        assert client.get(f'/api/session/{created[2]}/cache').status_code == 200
+    finally:
+        for session_id in created:
+            client.delete(f'/api/session/{session_id}')
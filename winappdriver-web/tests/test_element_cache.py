@@ -0,0 +1,43 @@
+import time
+
+from utils.element_cache import ElementCache
+
+
+def test_lru_eviction():
+    cache = ElementCache(max_size=2, ttl=0)
+    cache.put('name:One', '1')
+    cache.put('name:Two', '2')
+    assert cache.get('name:One') == '1'
+    cache.put('name:Three', '3')
+
+    assert 'name:Two' not in cache
+    assert cache.get('name:One') == '1'
+    assert cache.get('name:Three') == '3'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiry():
+    cache = ElementCache(ttl=0.05)
+    cache.put('name:One', '1')
+    time.sleep(0.1)
+    assert cache.get('name:One') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_invalidate_element_returns_key():
+    cache = ElementCache()
+    cache.put('name:One', '1')
+    assert cache.invalidate_element('1') == 'name:One'
+    assert cache.invalidate_element('1') is None
+    assert cache.get('name:One') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_export_load():
+    cache = ElementCache(ttl=30)
+    cache.put('name:One', '1')
+    cache.put('name:Two', '2')
+    restored = ElementCache(ttl=30)
+    restored.load(cache.export())
+    assert restored.get('name:Two') == '2'
+    assert restored.key_for('1') == 'name:One'
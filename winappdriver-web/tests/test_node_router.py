@@ -0,0 +1,33 @@
+from collections import Counter
+
+from utils.node_router import NodeRouter
+from utils.transport import HttpTransport
+
+
+def test_probes_do_not_count_as_command_latency(stub):
+    url = 'http://%s:%d' % stub.server_address
+    transport = HttpTransport()
+    router = NodeRouter([url], transport, session_counter=Counter, probe_interval=0)
+
+    router.probe()
+    node = router.stats()['nodes'][url]
+    assert node['probes'] == 1
+    assert node['probeLatencyMs'] is not None
+    assert node['latencyMs'] is None
+
+    transport.get(f'{url}/status')
+    assert router.stats()['nodes'][url]['latencyMs'] is not None
+    transport.close()
+
+
+def test_unhealthy_node_is_skipped(stub):
+    url = 'http://%s:%d' % stub.server_address
+    dead = 'http://127.0.0.1:1'
+    transport = HttpTransport(connect_timeout=0.5)
+    router = NodeRouter([dead, url], transport, session_counter=Counter, probe_interval=0, failure_threshold=1)
+
+    router.probe()
+    assert router.stats()['nodes'][dead]['healthy'] is False
+    assert router.acquire() == url
+    router.settle(url)
+    transport.close()
@@ -0,0 +1,58 @@
+import json
+import pathlib
+
+import pytest
+
+from utils.recorder import compile_steps, load_recording
+
+
+def write_recording(path, *records):
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('\n'.join(json.dumps(record) for record in records) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_compile_steps_waits_before_actions():
+    steps = compile_steps([
+        {'action': 'find', 'strategy': 'name', 'locator': 'One'},
+        {'action': 'click', 'strategy': 'name', 'locator': 'One'},
+        {'action': 'sendKeys', 'elementId': '42', 'text': 'abc'},
+    ], wait_timeout=3)
+    assert steps == [
+        {'action': 'wait', 'condition': 'present', 'timeout': 3, 'strategy': 'name', 'locator': 'One'},
+        {'action': 'wait', 'condition': 'enabled', 'timeout': 3, 'as': 'target', 'strategy': 'name', 'locator': 'One'},
+        {'action': 'click', 'element': '$target'},
+        {'action': 'sendKeys', 'element': '42', 'text': 'abc'},
+    ]
+
+
+def test_compile_steps_rejects_locator_without_strategy():
+    with pytest.raises(ValueError, match='event 1'):
+        compile_steps([{'action': 'find', 'strategy': 'name', 'locator': 'One'},
+                       {'action': 'click', 'locator': 'One'}])
+
+
+def test_load_recording_reports_line_number(tmp_path):
+    path = write_recording(tmp_path / 'bad.jsonl',
+                           {'type': 'header', 'version': 1, 'appPath': 'Calculator'},
+                           {'action': 'find', 'strategy': 'name', 'locator': 'One'},
+                           {'action': 'click', 'locator': 'One'})
+    with pytest.raises(ValueError, match='line 3'):
+        load_recording(path)
+
+
+def test_load_recording_reports_invalid_json(tmp_path):
+    path = tmp_path / 'broken.jsonl'
+    path.write_text('{"type": "header", "version": 1}\n{"action": \n', encoding='utf-8')
+    with pytest.raises(ValueError, match='line 2'):
+        load_recording(str(path))
+
+
+def test_replay_rejects_invalid_recording(client, app_module):
+    write_recording(app_module.recorder.path('invalid'),
+                    {'type': 'header', 'version': 1, 'appPath': 'Calculator'},
+                    {'action': 'click', 'locator': 'One'})
+    response = client.post('/api/recordings/invalid/replay', json={})
+    assert response.status_code == 400
+    assert 'line 2' in response.json['error']
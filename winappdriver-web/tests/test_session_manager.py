@@ -0,0 +1,112 @@
+import time
+
+from utils.session_manager import SessionManager
+from utils.session_store import SqliteSessionStore
+
+
+class FakeClient:
+    def __init__(self, name='client'):
+        self.name = name
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+    def to_state(self):
+        return {'name': self.name}
+
+
+def make_manager(**kwargs):
+    evicted = []
+    manager = SessionManager(on_evict=lambda session_id, client, reason: evicted.append((session_id, reason)),
+                             **kwargs)
+    return manager, evicted
+
+
+def test_lru_eviction_closes_least_recently_used():
+    manager, evicted = make_manager(max_sessions=2)
+    clients = {name: FakeClient(name) for name in 'abc'}
+    manager.add('a', clients['a'])
+    manager.add('b', clients['b'])
+    manager['a']
+    manager.add('c', clients['c'])
+
+    assert 'b' not in manager
+    assert 'a' in manager and 'c' in manager
+    assert clients['b'].quit_calls == 1
+    assert evicted == [('b', 'lru')]
+    assert manager.stats()['evictedLru'] == 1
+    manager.shutdown()
+
+
+def test_reap_closes_idle_sessions():
+    manager, evicted = make_manager(idle_timeout=0.1)
+    manager.add('a', FakeClient())
+    manager.add('b', FakeClient())
+    time.sleep(0.15)
+    manager.touch('b')
+
+    assert manager.reap() == 1
+    assert 'a' not in manager
+    assert 'b' in manager
+    assert evicted == [('a', 'idle')]
+    manager.shutdown()
+
+
+def test_reaper_thread_runs():
+    manager, evicted = make_manager(idle_timeout=0.05, reap_interval=0.05)
+    manager.add('a', FakeClient())
+    deadline = time.monotonic() + 2
+    while 'a' in manager and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert evicted == [('a', 'idle')]
+    manager.shutdown()
+
+
+def test_remove_closes_session():
+    manager, evicted = make_manager()
+    client = FakeClient()
+    manager.add('a', client)
+    manager.remove('a')
+    assert client.quit_calls == 1
+    assert evicted == [('a', 'closed')]
+    assert len(manager) == 0
+
+
+def test_shared_store_restores_and_forgets(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    first, _ = make_manager(store=SqliteSessionStore(path), restore=lambda state: FakeClient(state['name']))
+    second, evicted = make_manager(store=SqliteSessionStore(path), restore=lambda state: FakeClient(state['name']))
+
+    first.add('a', FakeClient('a'))
+    assert second['a'].name == 'a'
+    assert second.stats()['restored'] == 1
+
+    # 会话由另一个进程关闭后，本地副本随之释放
+    first.remove('a')
+    assert 'a' not in second
+    assert evicted == [('a', 'forgotten')]
+    first.shutdown()
+    second.shutdown()
+
+
+def test_lru_eviction_uses_shared_last_used(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    first, evicted = make_manager(max_sessions=2, store=SqliteSessionStore(path), sync_interval=0,
+                                  restore=lambda state: FakeClient(state['name']))
+    second, _ = make_manager(store=SqliteSessionStore(path), sync_interval=0,
+                             restore=lambda state: FakeClient(state['name']))
+
+    first.add('a', FakeClient('a'))
+    time.sleep(0.01)
+    first.add('b', FakeClient('b'))
+    time.sleep(0.01)
+    # 另一个进程正在使用 a，本进程中 a 虽然最久未使用，也不应被关闭
+    assert second.touch('a')
+    time.sleep(0.01)
+    first.add('c', FakeClient('c'))
+
+    assert evicted == [('b', 'lru')]
+    assert 'a' in first
+    first.shutdown()
+    second.shutdown()
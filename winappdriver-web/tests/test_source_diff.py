@@ -0,0 +1,166 @@
+import random
+import sys
+import xml.etree.ElementTree as ET
+
+from utils.source_diff import SourceTracker, diff_trees, flatten_tree
+
+
+def apply_diff(old, diff):
+    """
+    按 diff_trees 文档中的顺序把差异应用到旧节点表上，返回新的节点表
+    """
+    nodes = {node_id: dict(node, attrs=dict(node['attrs'])) for node_id, node in old.items()}
+    children = {}
+    for node_id, node in old.items():
+        children.setdefault(node['parent'], []).append(node_id)
+
+    def detach(node_id):
+        children[nodes[node_id]['parent']].remove(node_id)
+
+    def attach(node_id, parent, after):
+        siblings = children.setdefault(parent, [])
+        siblings.insert(siblings.index(after) + 1 if after is not None else 0, node_id)
+        nodes[node_id]['parent'] = parent
+
+    # 1. 删除子树
+    for node_id in diff['removed']:
+        detach(node_id)
+        stack = [node_id]
+        while stack:
+            current = stack.pop()
+            stack.extend(children.pop(current, []))
+            del nodes[current]
+
+    # 2. 按 seq 依次新建/移动节点
+    steps = [('added', entry) for entry in diff['added']] + [('changed', entry) for entry in diff['changed']]
+    for kind, entry in sorted(steps, key=lambda step: step[1]['seq']):
+        node_id = entry['id']
+        if kind == 'added':
+            assert node_id not in nodes
+            nodes[node_id] = {'id': node_id, 'tag': entry['tag'], 'attrs': dict(entry['attrs']), 'parent': None}
+            if entry['parent'] is not None:
+                attach(node_id, entry['parent'], entry['after'])
+            continue
+        if 'attrs' in entry:
+            nodes[node_id]['attrs'] = dict(entry['attrs'])
+        if 'parent' in entry:
+            detach(node_id)
+            attach(node_id, entry['parent'], entry['after'])
+
+    # 重新计算 after，输出与 flatten_tree 相同的结构（文档顺序）
+    result = {}
+    roots = [node_id for node_id, node in nodes.items() if node['parent'] is None]
+    stack = list(reversed(roots))
+    while stack:
+        node_id = stack.pop()
+        node = nodes[node_id]
+        siblings = children.get(node['parent'], []) if node['parent'] is not None else [node_id]
+        position = siblings.index(node_id)
+        result[node_id] = {
+            'id': node_id,
+            'tag': node['tag'],
+            'attrs': node['attrs'],
+            'parent': node['parent'],
+            'after': siblings[position - 1] if position else None
+        }
+        stack.extend(reversed(children.get(node_id, [])))
+    return result
+
+
+def assert_round_trip(old_xml, new_xml):
+    old = flatten_tree(ET.fromstring(old_xml))
+    new = flatten_tree(ET.fromstring(new_xml))
+    applied = apply_diff(old, diff_trees(old, new))
+    assert applied == new
+    assert list(applied) == list(new)
+
+
+def test_move_out_of_removed_container():
+    old_xml = '<Window RuntimeId="1"><Pane RuntimeId="p"><Button RuntimeId="b"/></Pane></Window>'
+    new_xml = '<Window RuntimeId="1"><Button RuntimeId="b"/></Window>'
+    diff = diff_trees(flatten_tree(ET.fromstring(old_xml)), flatten_tree(ET.fromstring(new_xml)))
+    assert diff['removed'] == ['p']
+    assert [node['id'] for node in diff['added']] == ['b']
+    assert diff['changed'] == []
+    assert_round_trip(old_xml, new_xml)
+
+
+def test_container_tag_change_keeps_children():
+    assert_round_trip(
+        '<Window RuntimeId="1"><Pane RuntimeId="p"><Button RuntimeId="b"/><Text/></Pane></Window>',
+        '<Window RuntimeId="1"><Group RuntimeId="p"><Button RuntimeId="b"/><Text/></Group></Window>'
+    )
+
+
+def test_sibling_reorder():
+    assert_round_trip(
+        '<Window RuntimeId="1"><Button RuntimeId="a"/><Button RuntimeId="b"/><Button RuntimeId="c"/></Window>',
+        '<Window RuntimeId="1"><Button RuntimeId="c"/><Button RuntimeId="a"/><Button RuntimeId="b"/></Window>'
+    )
+
+
+def random_tree(rng, ids, size):
+    root = ET.Element('Window', RuntimeId='root')
+    elements = [root]
+    for _ in range(size):
+        parent = rng.choice(elements)
+        tag = rng.choice(['Pane', 'Button', 'Text'])
+        child = ET.Element(tag, Name=rng.choice(['a', 'b']))
+        if rng.random() < 0.8:
+            child.set('RuntimeId', rng.choice(ids))
+        parent.insert(rng.randint(0, len(parent)), child)
+        elements.append(child)
+    return root
+
+
+def test_random_round_trip():
+    rng = random.Random(1234)
+    ids = [str(index) for index in range(12)]
+    for _ in range(2000):
+        old = flatten_tree(random_tree(rng, ids, rng.randint(0, 10)))
+        new = flatten_tree(random_tree(rng, ids, rng.randint(0, 10)))
+        assert apply_diff(old, diff_trees(old, new)) == new
+
+
+def test_deep_tree_flatten():
+    depth = sys.getrecursionlimit() * 2
+    root = element = ET.Element('Window', RuntimeId='root')
+    for index in range(depth):
+        element = ET.SubElement(element, 'Pane', RuntimeId=str(index))
+    nodes = flatten_tree(root)
+    assert len(nodes) == depth + 1
+    assert nodes[str(depth - 1)]['parent'] == str(depth - 2)
+
+
+def test_tracker_versions():
+    tracker = SourceTracker()
+    version, diff = tracker.update(ET.fromstring('<Window RuntimeId="1"/>'))
+    assert diff is None
+    version, diff = tracker.update(ET.fromstring('<Window RuntimeId="1"><Button RuntimeId="b"/></Window>'), version)
+    assert [node['id'] for node in diff['added']] == ['b']
+
+
+def test_source_diff_api_round_trip(client, session_id, stub):
+    original = stub.source
+    url = f'/api/session/{session_id}/source'
+    try:
+        first = client.get(url, query_string={'mode': 'diff'}).json
+        assert first['mode'] == 'full'
+
+        # 第一个分组面板消失，其中的控件移到窗口下，并修改一个控件的名称
+        root = ET.fromstring(original)
+        group = root.find('Pane')
+        for index, child in enumerate(list(group)):
+            group.remove(child)
+            root.insert(index, child)
+        root.remove(group)
+        root.find('Button').set('Name', 'Renamed')
+        stub.set_source(ET.tostring(root, encoding='unicode'))
+
+        second = client.get(url, query_string={'mode': 'diff', 'since': first['version']}).json
+        assert second['mode'] == 'diff'
+        assert second['version'] != first['version']
+        old = flatten_tree(ET.fromstring(first['source']))
+        assert apply_diff(old, second) == flatten_tree(root)
+    finally:
+        stub.set_source(original)
@@ -0,0 +1,30 @@
+import threading
+
+from utils.transport import HttpTransport
+
+
+def test_threads_share_one_connection_pool(stub):
+    url = 'http://%s:%d' % stub.server_address
+    transport = HttpTransport(pool_size=4)
+    sessions = []
+
+    def worker():
+        for _ in range(5):
+            assert transport.get(f'{url}/status').status_code == 200
+        sessions.append(transport._session())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 每个线程一个 Session，连接来自同一个池，且不超过池大小
+    assert len({id(session) for session in sessions}) == 4
+    stats = transport.stats()
+    assert stats['requests'] == 20
+    assert stats['errors'] == 0
+    host = stats['hosts'][url]
+    assert host['requests'] == 20
+    assert host['connectionsCreated'] <= 4
+    transport.close()
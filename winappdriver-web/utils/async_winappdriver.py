@@ -0,0 +1,228 @@
+import base64
+import json
+from typing import Optional, Dict, Any
+
+import aiohttp
+
+from utils.element_cache import ElementCache
+from utils.winappdriver import DEFAULT_CAPABILITIES, is_stale_element_text
+
+
+class AsyncHttpTransport:
+    def __init__(self, pool_size: int = 100, connect_timeout: float = 5.0, read_timeout: float = 60.0):
+        """
+        初始化异步 HTTP 传输层（aiohttp 连接池），需在事件循环内使用
+
+        :param pool_size: 同时打开的最大连接数
+        :param connect_timeout: 建立连接超时（秒）
+        :param read_timeout: 读取响应超时（秒）
+        """
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def request(self, method: str, url: str, **kwargs):
+        """
+        发送请求并读取响应
+
+        :return: (状态码, 响应文本)
+        """
+        self._requests += 1
+        self._in_flight += 1
+        try:
+            async with self._get_session().request(method, url, **kwargs) as response:
+                return response.status, await response.text()
+        except aiohttp.ClientError:
+            self._errors += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计信息
+        """
+        return {
+            'poolSize': self.pool_size,
+            'requests': self._requests,
+            'errors': self._errors,
+            'inFlight': self._in_flight
+        }
+
+    async def close(self):
+        """
+        关闭所有连接
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class AsyncWinAppDriverClient:
+    def __init__(self, winappdriver_url: str, app_path: str = None, transport: AsyncHttpTransport = None,
+                 cache_size: int = 256, cache_ttl: float = 30.0):
+        """
+        初始化异步 WinAppDriver 客户端，接口与 WinAppDriverClient 一致
+
+        :param winappdriver_url: WinAppDriver 服务地址
+        :param app_path: 要启动的应用程序路径
+        :param transport: 异步 HTTP 传输层，多个客户端应共享同一个
+        :param cache_size: 元素缓存的最大条目数
+        :param cache_ttl: 元素缓存的有效期（秒）
+        """
+        self.winappdriver_url = winappdriver_url.rstrip('/')
+        self.app_path = app_path
+        self.transport = transport or AsyncHttpTransport()
+        self.session_id = None
+        self.element_cache = ElementCache(max_size=cache_size, ttl=cache_ttl)  # 缓存元素 ID
+        self.ui_version = 0  # 每次点击/输入/清除后递增，用于判断缓存的截图与控件树是否仍然有效
+
+    def _session_url(self, path: str = '') -> str:
+        if not self.session_id:
+            raise Exception("No active session")
+        return f"{self.winappdriver_url}/session/{self.session_id}{path}"
+
+    async def _json(self, method: str, url: str, error: str, **kwargs) -> Dict[str, Any]:
+        status, text = await self.transport.request(method, url, **kwargs)
+        if status != 200:
+            raise Exception(f"{error}: {text}")
+        return json.loads(text) if text else {}
+
+    async def start_application(self) -> Dict[str, Any]:
+        """
+        启动应用程序并创建会话
+
+        :return: 会话响应
+        """
+        if not self.app_path:
+            raise ValueError("Application path is required to start application")
+
+        data = await self._json(
+            'POST',
+            f"{self.winappdriver_url}/session",
+            "Failed to start application",
+            json={"desiredCapabilities": dict(DEFAULT_CAPABILITIES)}
+        )
+        self.session_id = data.get('sessionId')
+        return data
+
+    async def quit(self):
+        """
+        关闭会话
+        """
+        if self.session_id:
+            try:
+                await self.transport.request('DELETE', self._session_url())
+            except Exception:
+                pass  # 忽略关闭会话时的错误
+            finally:
+                self.session_id = None
+                self.element_cache.clear()
+
+    async def get_screenshot(self) -> str:
+        """
+        获取屏幕截图并返回 base64 编码的数据
+
+        :return: Base64 编码的 PNG 截图数据
+        """
+        data = await self._json('GET', self._session_url('/screenshot'), "Failed to get screenshot")
+        return data.get('value', '')
+
+    async def get_screenshot_bytes(self) -> bytes:
+        """
+        获取屏幕截图的原始字节
+
+        :return: PNG 截图数据
+        """
+        return base64.b64decode(await self.get_screenshot())
+
+    async def get_page_source(self) -> str:
+        """
+        获取当前页面的源码
+
+        :return: 页面源码 XML
+        """
+        data = await self._json('GET', self._session_url('/source'), "Failed to get page source")
+        return data.get('value', '')
+
+    async def find_element(self, strategy: str, locator: str) -> str:
+        """
+        查找元素
+
+        :param strategy: 查找策略 (e.g., "name", "id", "xpath")
+        :param locator: 查找定位器
+        :return: 元素 ID
+        """
+        url = self._session_url('/element')
+        cache_key = f"{strategy}:{locator}"
+        element_id = self.element_cache.get(cache_key)
+        if element_id:
+            return element_id
+
+        data = await self._json('POST', url, "Failed to find element", json={"using": strategy, "value": locator})
+        element_id = (data.get('value') or {}).get('ELEMENT')
+        if not element_id:
+            raise Exception("Element not found")
+        self.element_cache.put(cache_key, element_id)
+        return element_id
+
+    async def click_element(self, element_id: str) -> str:
+        """
+        点击元素
+
+        :param element_id: 元素 ID
+        :return: 实际操作的元素 ID（元素失效并重新查找后会变化）
+        """
+        return await self._element_command(element_id, 'click', "Failed to click element")
+
+    async def send_keys(self, element_id: str, text: str) -> str:
+        """
+        发送文本到元素
+
+        :param element_id: 元素 ID
+        :param text: 要发送的文本
+        :return: 实际操作的元素 ID（元素失效并重新查找后会变化）
+        """
+        return await self._element_command(
+            element_id, 'value', "Failed to send keys",
+            payload={"value": list(text)}  # WinAppDriver 期望字符列表
+        )
+
+    async def clear_element(self, element_id: str) -> str:
+        """
+        清除元素内容
+
+        :param element_id: 元素 ID
+        :return: 实际操作的元素 ID（元素失效并重新查找后会变化）
+        """
+        return await self._element_command(element_id, 'clear', "Failed to clear element")
+
+    async def _element_command(self, element_id: str, command: str, error_message: str,
+                               payload: Optional[Dict[str, Any]] = None) -> str:
+        """
+        执行元素命令；元素已失效且来自缓存时，重新查找并重试一次
+        """
+        url = self._session_url(f'/element/{element_id}/{command}')
+        # 操作可能改变界面
+        self.ui_version += 1
+        status, text = await self.transport.request('POST', url, json=payload)
+
+        if status != 200 and is_stale_element_text(text):
+            cache_key = self.element_cache.invalidate_element(element_id)
+            if cache_key:
+                strategy, locator = cache_key.split(':', 1)
+                element_id = await self.find_element(strategy, locator)
+                url = self._session_url(f'/element/{element_id}/{command}')
+                status, text = await self.transport.request('POST', url, json=payload)
+
+        if status != 200:
+            raise Exception(f"{error_message}: {text}")
+        return element_id
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    # 未安装 brotli 时只使用 gzip
+    brotli = None
+
+# 值得压缩的响应类型（图像已经是压缩格式）
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+def available_encodings() -> List[str]:
+    """
+    服务端支持的编码，按优先级排列（客户端给出相同权重时优先 br）
+    """
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """
+    压缩响应体
+
+    :param data: 原始字节
+    :param encoding: br / gzip
+    :param gzip_level: gzip 压缩级别 (1-9)
+    :param brotli_quality: brotli 压缩质量 (0-11)，动态内容使用中等质量以免压缩耗时超过节省的传输时间
+    :return: 压缩后的字节
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    if encoding == 'gzip':
+        # mtime=0 使相同内容的压缩结果一致
+        return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def content_etag(data) -> str:
+    """
+    基于内容的 ETag
+
+    :param data: 字节或字符串
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+class StaticAsset:
+    def __init__(self, data: bytes, mimetype: str, signature: Tuple[float, int]):
+        self.data = data
+        self.mimetype = mimetype
+        self.etag = content_etag(data)
+        self.signature = signature
+        # 编码 -> 压缩结果，首次请求该编码时生成
+        self.variants: Dict[str, bytes] = {}
+
+
+class StaticAssetCache:
+    def __init__(self, root: str, min_size: int = 1024, gzip_level: int = 9, brotli_quality: int = 11):
+        """
+        静态文件缓存：按内容哈希生成 ETag，压缩结果只生成一次
+
+        文件修改时间或大小变化时重新读取。静态文件只压缩一次，因此使用最高压缩级别。
+
+        :param root: 静态文件目录
+        :param min_size: 小于该大小的文件不压缩（字节）
+        """
+        self.root = root
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> StaticAsset:
+        """
+        :raises NotFound: 文件不存在或路径越界
+        """
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+        stat = os.stat(path)
+        signature = (stat.st_mtime, stat.st_size)
+
+        asset = self._assets.get(path)
+        if asset is None or asset.signature != signature:
+            with open(path, 'rb') as f:
+                data = f.read()
+            mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            asset = StaticAsset(data, mimetype, signature)
+            with self._lock:
+                self._assets[path] = asset
+        return asset
+
+    def variant(self, asset: StaticAsset, encodings: Iterable[str]) -> Tuple[Optional[str], bytes]:
+        """
+        选择返回的编码
+
+        :param encodings: 客户端可接受的编码（按优先级）
+        :return: (编码，None 表示不压缩, 响应体)
+        """
+        if len(asset.data) < self.min_size or not is_compressible(asset.mimetype):
+            return None, asset.data
+        for encoding in encodings:
+            if encoding not in available_encodings():
+                continue
+            data = asset.variants.get(encoding)
+            if data is None:
+                data = compress(asset.data, encoding, self.gzip_level, self.brotli_quality)
+                with self._lock:
+                    asset.variants[encoding] = data
+            return encoding, data
+        return None, asset.data
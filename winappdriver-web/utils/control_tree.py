@@ -0,0 +1,262 @@
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.compression import content_etag
+from utils.metrics import span
+
+# 搜索时默认匹配的属性（另外总是匹配控件类型，即标签名）
+SEARCH_ATTRIBUTES = ('Name', 'AutomationId', 'ClassName')
+
+
+def parse_attribute_list(value: Optional[str], default: str) -> Optional[List[str]]:
+    """
+    解析逗号分隔的属性名参数
+
+    :param value: 请求参数，None 时使用 default
+    :param default: 默认值
+    :return: 属性名列表，"*" 返回 None 表示全部属性
+    """
+    value = value if value is not None else default
+    if value.strip() == '*':
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class ControlTree:
+    def __init__(self, root: ET.Element, etag: str, ui_version: int = 0):
+        """
+        已解析的控件树，按节点标识按需返回子节点，供检查器逐层展开
+
+        节点标识规则与 flatten_tree 一致：优先使用 RuntimeId，没有时使用 "父节点标识/标签[序号]"。
+
+        :param root: 控件树根节点
+        :param etag: 页面源码的内容哈希
+        :param ui_version: 获取页面源码时客户端的界面版本号
+        """
+        self.root = root
+        self.etag = etag
+        self.ui_version = ui_version
+        self.checked_at = time.monotonic()
+
+        self._elements: Dict[str, ET.Element] = {}
+        self._ids: Dict[ET.Element, str] = {}
+        self._parents: Dict[str, Optional[str]] = {}
+
+        self.root_id = root.get('RuntimeId') or f"/{root.tag}"
+        # 非递归的先序遍历（很深的控件树不受递归深度限制），标识的分配顺序与 flatten_tree 相同
+        stack = [(root, None, 0)]
+        while stack:
+            element, parent_id, index = stack.pop()
+            if parent_id is None:
+                node_id = self.root_id
+            else:
+                node_id = element.get('RuntimeId')
+                if not node_id or node_id in self._elements:
+                    node_id = f"{parent_id}/{element.tag}[{index}]"
+            self._elements[node_id] = element
+            self._ids[element] = node_id
+            self._parents[node_id] = parent_id
+
+            tag_counts = {}
+            children = []
+            for child in element:
+                child_index = tag_counts.get(child.tag, 0)
+                tag_counts[child.tag] = child_index + 1
+                children.append((child, node_id, child_index))
+            stack.extend(reversed(children))
+
+    @property
+    def node_count(self) -> int:
+        return len(self._elements)
+
+    def age(self) -> float:
+        """
+        距上次确认控件树未变化的时间（秒）
+        """
+        return time.monotonic() - self.checked_at
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self._elements
+
+    def path(self, node_id: str) -> List[str]:
+        """
+        从根节点到该节点的标识列表（含自身），前端据此依次展开祖先节点
+        """
+        path = []
+        while node_id is not None:
+            path.append(node_id)
+            node_id = self._parents[node_id]
+        path.reverse()
+        return path
+
+    def node(self, node_id: Optional[str] = None, depth: int = 1, attrs: Optional[Iterable[str]] = None,
+             offset: int = 0, limit: int = 200) -> Dict[str, Any]:
+        """
+        返回节点及其下 depth 层子节点
+
+        :param node_id: 节点标识，默认根节点
+        :param depth: 展开的层数，0 表示只返回节点本身
+        :param attrs: 返回的属性名，None 表示全部属性
+        :param offset: 该节点子节点的起始序号（分页）
+        :param limit: 每个节点最多返回的子节点数，更深的层级只返回前 limit 个
+        :return: {id, tag, attributes, childCount, children?, nextOffset?}
+        :raises KeyError: 节点不存在
+        """
+        node_id = node_id or self.root_id
+        element = self._elements[node_id]
+        attrs = list(attrs) if attrs is not None else None
+        return self._serialize(element, node_id, depth, attrs, offset, limit)
+
+    def _serialize(self, element: ET.Element, node_id: str, depth: int, attrs: Optional[List[str]],
+                   offset: int, limit: int) -> Dict[str, Any]:
+        if attrs is None:
+            attributes = dict(element.attrib)
+        else:
+            attributes = {name: element.get(name) for name in attrs if element.get(name) is not None}
+        result = {
+            'id': node_id,
+            'tag': element.tag,
+            'attributes': attributes,
+            'childCount': len(element)
+        }
+        if depth > 0 and len(element):
+            page = element[offset:offset + limit]
+            result['children'] = [self._serialize(child, self._ids[child], depth - 1, attrs, 0, limit)
+                                  for child in page]
+            if offset + limit < len(element):
+                result['nextOffset'] = offset + limit
+        return result
+
+    def search(self, query: str, fields: Optional[Iterable[str]] = SEARCH_ATTRIBUTES,
+               attrs: Optional[Iterable[str]] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        按属性值或控件类型查找节点（不区分大小写的子串匹配，文档顺序）
+
+        :param query: 查找的文本
+        :param fields: 匹配的属性名，None 表示全部属性
+        :param attrs: 结果中返回的属性名，None 表示全部属性
+        :param limit: 最多返回的结果数
+        :return: ([{node, path}], 是否还有更多结果)
+        """
+        query = query.lower()
+        fields = list(fields) if fields is not None else None
+        attrs = list(attrs) if attrs is not None else None
+        matches = []
+        for element in self.root.iter():
+            values = element.attrib.values() if fields is None else (element.get(name) or '' for name in fields)
+            if query in element.tag.lower() or any(query in value.lower() for value in values):
+                if len(matches) == limit:
+                    return matches, True
+                node_id = self._ids[element]
+                matches.append({
+                    'node': self._serialize(element, node_id, 0, attrs, 0, 0),
+                    'path': self.path(node_id)
+                })
+        return matches, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'nodes': self.node_count,
+            'etag': self.etag,
+            'uiVersion': self.ui_version,
+            'ageSeconds': round(self.age(), 3)
+        }
+
+
+class ControlTreeCache:
+    def __init__(self, max_age: float = 30.0):
+        """
+        每个会话缓存一棵已解析的控件树，逐层展开与搜索时复用，不必每次请求都获取并解析整棵树
+
+        缓存在界面版本变化（点击/输入/清除）或超过 max_age 后重新获取页面源码；
+        源码内容未变化时继续使用原来的树，节点标识保持不变。
+
+        :param max_age: 不重新获取页面源码的最长时间（秒），0 表示每次都重新获取
+        """
+        self.max_age = max_age
+        self._trees: Dict[str, ControlTree] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.unchanged = 0
+        self.rebuilds = 0
+
+    def get(self, session_id: str, driver_client, refresh: bool = False) -> ControlTree:
+        """
+        获取会话的控件树
+
+        :param session_id: 会话 ID
+        :param driver_client: 会话的 WinAppDriverClient
+        :param refresh: 是否强制重新获取页面源码
+        """
+        with self._lock:
+            session_lock = self._locks.setdefault(session_id, threading.Lock())
+
+        # 同一会话的并发请求（如同时展开多个节点）只获取一次页面源码
+        with session_lock:
+            tree = None if refresh else self.cached(session_id, driver_client.ui_version)
+            if tree is not None:
+                return tree
+
+            ui_version = driver_client.ui_version
+            source = driver_client.get_page_source()
+            # 快照已解析过同一份源码时直接复用
+            snapshot = driver_client.snapshot
+            root = snapshot.root if snapshot is not None and snapshot.source is source else None
+            return self.update(session_id, source, ui_version, root)
+
+    def cached(self, session_id: str, ui_version: int) -> Optional[ControlTree]:
+        """
+        返回仍然有效的缓存（界面版本未变化且未超过 max_age），否则返回 None
+        """
+        tree = self._trees.get(session_id)
+        if tree is not None and tree.ui_version == ui_version and tree.age() <= self.max_age:
+            self.hits += 1
+            return tree
+        return None
+
+    def update(self, session_id: str, source: str, ui_version: int, root: Optional[ET.Element] = None) -> ControlTree:
+        """
+        用重新获取的页面源码更新缓存；内容未变化时继续使用原来的树
+
+        :param source: 页面源码 XML
+        :param ui_version: 获取页面源码前客户端的界面版本号
+        :param root: 已解析的根节点（可选）
+        """
+        etag = content_etag(source)
+        tree = self._trees.get(session_id)
+        if tree is not None and tree.etag == etag:
+            tree.ui_version = ui_version
+            tree.checked_at = time.monotonic()
+            self.unchanged += 1
+            return tree
+
+        if root is None:
+            with span('decode'):
+                root = ET.fromstring(source)
+        tree = ControlTree(root, etag, ui_version)
+        with self._lock:
+            self._trees[session_id] = tree
+        self.rebuilds += 1
+        return tree
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._locks.pop(session_id, None)
+            self._trees.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            trees = list(self._trees.values())
+        return {
+            'maxAge': self.max_age,
+            'sessions': len(trees),
+            'nodes': sum(tree.node_count for tree in trees),
+            'hits': self.hits,
+            'unchanged': self.unchanged,
+            'rebuilds': self.rebuilds
+        }
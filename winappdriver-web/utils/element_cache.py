@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+
+
+class ElementCache:
+    def __init__(self, max_size: int = 256, ttl: float = 30.0):
+        """
+        初始化元素缓存（LRU 淘汰 + 过期时间）
+
+        :param max_size: 最多缓存的定位器数量
+        :param ttl: 每条缓存的有效期（秒），0 表示不过期
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # 缓存键 -> (元素 ID, 过期时间)
+        self._keys_by_element = {}  # 元素 ID -> 缓存键
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的元素 ID
+
+        :param key: 缓存键 (strategy:locator)
+        :return: 元素 ID，未命中或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            element_id, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return element_id
+
+    def put(self, key: str, element_id: str):
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+
+        :param key: 缓存键 (strategy:locator)
+        :param element_id: 元素 ID
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + self.ttl if self.ttl else 0
+            self._entries[key] = (element_id, expires_at)
+            self._keys_by_element[element_id] = key
+
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        """
+        使指定定位器的缓存失效
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_element(self, element_id: str) -> Optional[str]:
+        """
+        使指定元素 ID 的缓存失效
+
+        :param element_id: 元素 ID
+        :return: 该元素对应的缓存键，便于重新查找；不在缓存中时返回 None
+        """
+        with self._lock:
+            key = self._keys_by_element.get(element_id)
+            if key is not None:
+                self._remove(key)
+                self.invalidations += 1
+            return key
+
+    def key_for(self, element_id: str) -> Optional[str]:
+        """
+        获取元素 ID 对应的缓存键
+        """
+        with self._lock:
+            return self._keys_by_element.get(element_id)
+
+    def export(self) -> List[List[Any]]:
+        """
+        导出未过期的条目，用于跨进程共享会话状态
+
+        :return: [[缓存键, 元素 ID, 过期时间 (Unix 时间戳，0 表示不过期)], ...]，按最近使用排序
+        """
+        now = time.monotonic()
+        wall = time.time()
+        with self._lock:
+            return [[key, element_id, wall + expires_at - now if expires_at else 0]
+                    for key, (element_id, expires_at) in self._entries.items()
+                    if not expires_at or expires_at > now]
+
+    def load(self, entries: List[List[Any]]):
+        """
+        导入 export() 导出的条目，已过期的条目被忽略
+        """
+        now = time.monotonic()
+        wall = time.time()
+        with self._lock:
+            for key, element_id, expires_at in entries:
+                if expires_at and expires_at <= wall:
+                    continue
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (element_id, now + expires_at - wall if expires_at else 0)
+                self._keys_by_element[element_id] = key
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_element.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _remove(self, key: str):
+        element_id, _ = self._entries.pop(key)
+        if self._keys_by_element.get(element_id) == key:
+            del self._keys_by_element[element_id]
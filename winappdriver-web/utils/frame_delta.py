@@ -0,0 +1,143 @@
+import base64
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils.image_utils import open_rgb_image, save_image
+
+
+def changed_tiles(previous: np.ndarray, current: np.ndarray, tile_size: int) -> np.ndarray:
+    """
+    按块比较两帧画面
+
+    :param previous: 上一帧 (H, W, 3)
+    :param current: 当前帧 (H, W, 3)
+    :param tile_size: 块大小（像素）
+    :return: 每个块是否变化的布尔矩阵 (行数, 列数)
+    """
+    height, width = current.shape[:2]
+    changed = np.any(previous != current, axis=2)
+
+    # 补齐到块大小的整数倍后按块归约
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    padded = np.zeros((rows * tile_size, cols * tile_size), dtype=bool)
+    padded[:height, :width] = changed
+    return padded.reshape(rows, tile_size, cols, tile_size).any(axis=(1, 3))
+
+
+def tile_boxes(tiles: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """
+    将变化的块合并为矩形区域：先合并每行中连续的块，再合并上下相邻且列范围相同的区域
+
+    :param tiles: 块变化矩阵
+    :return: [(起始行, 起始列, 行数, 列数)]
+    """
+    boxes = []
+    open_boxes = {}  # (起始列, 结束列) -> [起始行, 起始列, 行数, 列数]
+    for row in range(tiles.shape[0]):
+        runs = []
+        padded = np.concatenate(([False], tiles[row], [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        for start, end in zip(edges[::2], edges[1::2]):
+            runs.append((int(start), int(end)))
+
+        next_open = {}
+        for run in runs:
+            box = open_boxes.pop(run, None)
+            if box is None:
+                box = [row, run[0], 0, run[1] - run[0]]
+            box[2] += 1
+            next_open[run] = box
+        boxes.extend(tuple(box) for box in open_boxes.values())
+        open_boxes = next_open
+    boxes.extend(tuple(box) for box in open_boxes.values())
+    return boxes
+
+
+class FrameDeltaEncoder:
+    def __init__(self, tile_size: int = 32, quality: int = 80, max_changed_ratio: float = 0.5):
+        """
+        初始化帧差编码器：与上一帧比较，只输出变化区域
+
+        :param tile_size: 比较块大小（像素）
+        :param quality: 区域图像的 JPEG 质量
+        :param max_changed_ratio: 变化块比例超过该值时直接返回整帧
+        """
+        self.tile_size = tile_size
+        self.quality = quality
+        self.max_changed_ratio = max_changed_ratio
+        self.version = 0
+        self._previous: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.full_frames = 0
+        self.delta_frames = 0
+        self.unchanged_frames = 0
+
+    def encode(self, image_data: bytes, since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        编码一帧
+
+        :param image_data: 原始截图字节 (PNG)
+        :param since: 前端当前持有的版本号
+        :return: {type: unchanged} / {type: delta, regions: [...]} / {type: full, data}，均带 version、width、height
+        """
+        image = open_rgb_image(image_data)
+        frame = np.asarray(image)
+        height, width = frame.shape[:2]
+
+        with self._lock:
+            previous = self._previous
+            if previous is None or previous.shape != frame.shape or since != self.version:
+                return self._full(image, frame)
+
+            tiles = changed_tiles(previous, frame, self.tile_size)
+            if not tiles.any():
+                self.unchanged_frames += 1
+                return {'type': 'unchanged', 'version': self.version, 'width': width, 'height': height}
+            if tiles.mean() > self.max_changed_ratio:
+                return self._full(image, frame)
+
+            regions = []
+            for row, col, rows, cols in tile_boxes(tiles):
+                x = col * self.tile_size
+                y = row * self.tile_size
+                right = min(width, (col + cols) * self.tile_size)
+                bottom = min(height, (row + rows) * self.tile_size)
+                region = Image.fromarray(frame[y:bottom, x:right])
+                regions.append({
+                    'x': x,
+                    'y': y,
+                    'width': right - x,
+                    'height': bottom - y,
+                    'data': base64.b64encode(save_image(region, 'JPEG', self.quality)).decode('ascii')
+                })
+
+            self._previous = frame
+            self.version += 1
+            self.delta_frames += 1
+            return {'type': 'delta', 'version': self.version, 'width': width, 'height': height, 'regions': regions}
+
+    def _full(self, image: Image.Image, frame: np.ndarray) -> Dict[str, Any]:
+        self._previous = frame
+        self.version += 1
+        self.full_frames += 1
+        return {
+            'type': 'full',
+            'version': self.version,
+            'width': frame.shape[1],
+            'height': frame.shape[0],
+            'data': base64.b64encode(save_image(image, 'JPEG', self.quality)).decode('ascii')
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'fullFrames': self.full_frames,
+            'deltaFrames': self.delta_frames,
+            'unchangedFrames': self.unchanged_frames
+        }
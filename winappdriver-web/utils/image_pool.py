@@ -0,0 +1,150 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Optional, Dict, Any
+
+from utils.metrics import span
+
+
+class PoolBusyError(Exception):
+    """图像处理队列已满"""
+
+
+class StaleFrameError(Exception):
+    """同一会话已有更新的请求，本次处理被丢弃"""
+
+
+class ImageWorkerPool:
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 32, mode: str = 'thread'):
+        """
+        初始化截图处理池，将解码/编码移出请求线程
+
+        :param workers: 并行处理的数量，默认 CPU 核数
+        :param max_queue: 等待处理的最大任务数，超出时拒绝
+        :param mode: thread 使用线程池（依赖 Pillow 编解码时释放 GIL），process 使用进程池
+        """
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unsupported image pool mode: {mode}")
+
+        self.workers = workers or os.cpu_count() or 4
+        self.max_queue = max_queue
+        self.mode = mode
+
+        # 调度线程负责丢弃过期任务；进程模式下再把任务转交给进程池
+        self._dispatcher = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-worker')
+        self._processes = ProcessPoolExecutor(max_workers=self.workers) if mode == 'process' else None
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self._latest = {}  # 任务键 -> 最新的请求序号
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped_stale = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_encode = 0.0
+        self.max_encode = 0.0
+
+    def run(self, key: str, fn: Callable, *args, local: bool = False, timeout: Optional[float] = None, **kwargs):
+        """
+        提交任务并等待结果
+
+        :param key: 任务键（通常为会话 ID + 用途），同一键上的新任务会使旧的排队任务过期
+        :param fn: 处理函数，进程模式下需可被 pickle
+        :param local: 进程模式下仍在调度线程中执行（用于依赖进程内状态的函数）
+        :param timeout: 等待结果的超时（秒）
+        :return: 处理结果
+        :raises PoolBusyError: 队列已满
+        :raises StaleFrameError: 任务开始前已有更新的同键任务
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError("Image processing queue is full")
+
+        with self._lock:
+            generation = next(self._sequence)
+            self._latest[key] = generation
+            self.queued += 1
+
+        try:
+            future = self._dispatcher.submit(self._execute, key, generation, time.perf_counter(),
+                                             fn, args, kwargs, local)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+        # 排队与处理时间都计入当前请求的 encode 分段
+        with span('encode'):
+            return future.result(timeout=timeout)
+
+    def _execute(self, key, generation, submitted, fn, args, kwargs, local):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.total_wait += started - submitted
+            stale = self._latest.get(key) != generation
+            if stale:
+                self.dropped_stale += 1
+            else:
+                self.running += 1
+
+        try:
+            if stale:
+                raise StaleFrameError("Superseded by a newer request")
+            try:
+                if self._processes is not None and not local:
+                    result = self._processes.submit(fn, *args, **kwargs).result()
+                else:
+                    result = fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.completed += 1
+                self.total_encode += elapsed
+                self.max_encode = max(self.max_encode, elapsed)
+            return result
+        finally:
+            with self._lock:
+                if not stale:
+                    self.running -= 1
+                if self._latest.get(key) == generation:
+                    del self._latest[key]
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取队列深度与处理耗时统计
+        """
+        with self._lock:
+            finished = self.completed + self.failed
+            started = finished + self.dropped_stale + self.running
+            return {
+                'mode': self.mode,
+                'workers': self.workers,
+                'maxQueue': self.max_queue,
+                'queueDepth': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'droppedStale': self.dropped_stale,
+                'rejected': self.rejected,
+                'avgWaitMs': round(self.total_wait / started * 1000, 3) if started else 0.0,
+                'avgEncodeMs': round(self.total_encode / self.completed * 1000, 3) if self.completed else 0.0,
+                'maxEncodeMs': round(self.max_encode * 1000, 3)
+            }
+
+    def shutdown(self):
+        self._dispatcher.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
@@ -1,66 +1,120 @@
 import base64
 from io import BytesIO
 from PIL import Image
-import re
+from typing import Optional, Tuple, Union
+
+# URL 扩展名 -> (PIL 格式, Content-Type)
+IMAGE_FORMATS = {
+    'jpg': ('JPEG', 'image/jpeg'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+    'png': ('PNG', 'image/png')
+}
+
+ImageData = Union[str, bytes, bytearray, memoryview]
+
+def process_image(image_data: ImageData, max_size: Optional[Tuple[int, int]] = None, image_format: str = 'JPEG',
+                  quality: int = 80, reduce_on_decode: bool = True) -> bytes:
+    """
+    一次解码完成缩放、去除透明通道和编码
+
+    :param image_data: 图像数据；str 视为 base64（可带数据 URI 前缀），bytes/memoryview 视为原始图像字节
+    :param max_size: 最大尺寸 (宽, 高)，保持宽高比缩小；None 表示不缩放
+    :param image_format: 输出格式 (JPEG / WEBP / PNG)
+    :param quality: 压缩质量 (0-100)
+    :param reduce_on_decode: 大幅缩小时先在解码阶段降采样（JPEG draft 模式 / 整数倍 reduce），再精细缩放
+    :return: 编码后的图像字节
+    """
+    if isinstance(image_data, str):
+        image_data = _decode_base64(image_data)
+
+    # 打开图像（BytesIO 可直接接收 bytes/memoryview）
+    image = Image.open(BytesIO(image_data))
+
+    # 缩放在去除透明通道之前进行，减少需要处理的像素
+    if max_size and (image.width > max_size[0] or image.height > max_size[1]):
+        if reduce_on_decode:
+            image.draft('RGB', max_size)
+        image.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=2.0 if reduce_on_decode else None)
+
+    image = _flatten_to_rgb(image)
+    return save_image(image, image_format=image_format, quality=quality)
 
 def compress_image(base64_image_data: str, quality: int = 80) -> str:
     """
     压缩 base64 编码的图像数据
-    
+
     :param base64_image_data: Base64 编码的图像数据
     :param quality: JPEG 压缩质量 (0-100)
     :return: 压缩后的 Base64 图像数据
     """
-    # 移除数据 URI 前缀（如果存在）
-    if base64_image_data.startswith('data:image'):
-        # 提取 base64 数据部分
-        base64_image_data = re.sub('^data:image/.+;base64,', '', base64_image_data)
-    
-    # 解码 base64 数据
-    image_data = base64.b64decode(base64_image_data)
-    
-    # 打开图像
-    image = Image.open(BytesIO(image_data))
-    
-    # 转换为 RGB（如果需要）
-    if image.mode in ('RGBA', 'LA', 'P'):
-        # 创建白色背景
-        background = Image.new('RGB', image.size, (255, 255, 255))
-        if image.mode == 'P':
-            image = image.convert('RGBA')
-        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
-        image = background
-    
-    # 压缩图像
-    output_buffer = BytesIO()
-    image.save(output_buffer, format='JPEG', quality=quality, optimize=True)
-    compressed_image_data = output_buffer.getvalue()
-    
+    compressed_image_data = process_image(base64_image_data, image_format='JPEG', quality=quality)
+
     # 返回 base64 编码的压缩图像
     return base64.b64encode(compressed_image_data).decode('utf-8')
 
+def encode_image(image_data: ImageData, image_format: str = 'JPEG', quality: int = 80) -> bytes:
+    """
+    将原始图像字节重新编码为指定格式，不经过 base64
+
+    :param image_data: 原始图像字节 (PNG 等)
+    :param image_format: 输出格式 (JPEG / WEBP)
+    :param quality: 压缩质量 (0-100)
+    :return: 编码后的图像字节
+    """
+    return process_image(image_data, image_format=image_format, quality=quality)
+
 def resize_image(base64_image_data: str, max_width: int = 800, max_height: int = 600) -> str:
     """
     调整图像大小以适应指定的最大尺寸
-    
+
     :param base64_image_data: Base64 编码的图像数据
     :param max_width: 最大宽度
     :param max_height: 最大高度
     :return: 调整大小后的 Base64 图像数据
     """
+    resized_image_data = process_image(base64_image_data, max_size=(max_width, max_height),
+                                       image_format='JPEG', quality=80)
+
+    # 返回 base64 编码的调整大小的图像
+    return base64.b64encode(resized_image_data).decode('utf-8')
+
+def open_rgb_image(image_data: ImageData) -> Image.Image:
+    """
+    打开图像字节并转换为 RGB，透明部分填充白色背景
+
+    :param image_data: 原始图像字节
+    :return: RGB 图像
+    """
+    if isinstance(image_data, str):
+        image_data = _decode_base64(image_data)
+    return _flatten_to_rgb(Image.open(BytesIO(image_data)))
+
+def save_image(image: Image.Image, image_format: str = 'JPEG', quality: int = 80) -> bytes:
+    """
+    将图像编码为指定格式
+
+    :param image: 图像
+    :param image_format: 输出格式 (JPEG / WEBP / PNG)
+    :param quality: 压缩质量 (0-100)
+    :return: 编码后的图像字节
+    """
+    output_buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.save(output_buffer, format='JPEG', quality=quality, optimize=True)
+    elif image_format == 'PNG':
+        image.save(output_buffer, format='PNG')
+    else:
+        image.save(output_buffer, format=image_format, quality=quality)
+    return output_buffer.getvalue()
+
+def _decode_base64(base64_image_data: str) -> bytes:
     # 移除数据 URI 前缀（如果存在）
     if base64_image_data.startswith('data:image'):
-        base64_image_data = re.sub('^data:image/.+;base64,', '', base64_image_data)
-    
-    # 解码 base64 数据
-    image_data = base64.b64decode(base64_image_data)
-    
-    # 打开图像
-    image = Image.open(BytesIO(image_data))
-    
-    # 计算新尺寸保持宽高比
-    image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-    
+        base64_image_data = base64_image_data[base64_image_data.index(',') + 1:]
+    return base64.b64decode(base64_image_data)
+
+def _flatten_to_rgb(image: Image.Image) -> Image.Image:
     # 转换为 RGB（如果需要）
     if image.mode in ('RGBA', 'LA', 'P'):
         # 创建白色背景
@@ -69,11 +123,6 @@ def resize_image(base64_image_data: str, max_width: int = 800, max_height: int =
             image = image.convert('RGBA')
         background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
         image = background
-    
-    # 保存调整大小的图像
-    output_buffer = BytesIO()
-    image.save(output_buffer, format='JPEG', quality=80, optimize=True)
-    resized_image_data = output_buffer.getvalue()
-    
-    # 返回 base64 编码的调整大小的图像
-    return base64.b64encode(resized_image_data).decode('utf-8')
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
@@ -0,0 +1,219 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 请求耗时分段：WinAppDriver 往返、解析上游响应（JSON / base64 / XML）、图像编码（含排队）、序列化响应 JSON、压缩响应
+SPANS = ('upstream', 'decode', 'encode', 'serialize', 'compress')
+
+# 直方图桶上限（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 采集函数返回的指标：(名称, 类型, 说明, [(标签, 值)])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+_local = threading.local()
+
+
+class RequestSpans:
+    def __init__(self):
+        """
+        单个请求的耗时分段，仅在处理该请求的线程中读写
+        """
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """
+        生成 Server-Timing 头，浏览器开发者工具的 Timing 面板可直接显示
+
+        :param total: 请求总耗时（秒），默认到当前为止
+        """
+        total = self.elapsed() if total is None else total
+        parts = [f'{name};dur={self.durations[name] * 1000:.2f}' for name in SPANS if name in self.durations]
+        # 未归入任何分段的耗时（路由、缓存查找、Flask 本身等）
+        other = total - sum(self.durations.values())
+        parts.append(f'app;dur={max(other, 0.0) * 1000:.2f}')
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def begin_request() -> RequestSpans:
+    """
+    开始记录当前线程处理的请求
+    """
+    _local.spans = RequestSpans()
+    return _local.spans
+
+
+def end_request() -> Optional[RequestSpans]:
+    """
+    结束记录并返回当前请求的耗时分段
+    """
+    spans = getattr(_local, 'spans', None)
+    _local.spans = None
+    return spans
+
+
+def current_spans() -> Optional[RequestSpans]:
+    return getattr(_local, 'spans', None)
+
+
+def record_span(name: str, seconds: float):
+    """
+    将耗时计入当前请求（不在请求中时忽略，如后台线程）
+    """
+    spans = current_spans()
+    if spans is not None:
+        spans.add(name, seconds)
+
+
+@contextmanager
+def span(name: str):
+    """
+    计时代码块并计入当前请求的分段
+    """
+    if current_spans() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result, running = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((_format_value(bound), running))
+        result.append(('+Inf', self.count))
+        return result
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = 'winappdriver_web', buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        请求指标注册表，以 Prometheus 文本格式输出
+
+        请求数与耗时直方图在请求结束时记录；会话数、缓存命中率等状态由采集函数在抓取时读取。
+
+        :param prefix: 指标名前缀
+        :param buckets: 直方图桶上限（秒）
+        """
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._durations: Dict[Tuple[str, str], Histogram] = {}
+        self._spans: Dict[Tuple[str, str], Histogram] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+
+    def add_collector(self, collector: Callable[[], List[Sample]]):
+        """
+        注册抓取时调用的采集函数，返回 [(名称, 类型, 说明, [(标签, 值)])]，名称不含前缀
+        """
+        self._collectors.append(collector)
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float,
+                        spans: Optional[RequestSpans] = None):
+        """
+        记录一次请求
+
+        :param endpoint: 路由名（而不是网址，避免会话 ID 导致标签无限增长）
+        :param method: HTTP 方法
+        :param status: 响应状态码
+        :param seconds: 总耗时（秒）
+        :param spans: 请求的耗时分段
+        """
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._histogram(self._durations, (endpoint, method)).observe(seconds)
+            if spans is not None:
+                for name, value in spans.durations.items():
+                    self._histogram(self._spans, (endpoint, name)).observe(value)
+
+    def _histogram(self, table, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    def render(self) -> str:
+        """
+        输出 Prometheus 文本格式 (text/plain; version=0.0.4)
+        """
+        lines = []
+        with self._lock:
+            self._render_samples(lines, 'http_requests_total', 'counter', '按路由、方法、状态码统计的请求数',
+                                 [({'endpoint': e, 'method': m, 'status': s}, v)
+                                  for (e, m, s), v in sorted(self._requests.items())])
+            self._render_histograms(lines, 'http_request_duration_seconds', '请求总耗时',
+                                    [({'endpoint': e, 'method': m}, h) for (e, m), h in sorted(self._durations.items())])
+            self._render_histograms(lines, 'http_request_span_seconds', '请求耗时分段 (upstream/decode/encode/serialize/compress)',
+                                    [({'endpoint': e, 'span': s}, h) for (e, s), h in sorted(self._spans.items())])
+
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                self._render_samples(lines, name, kind, help_text, samples)
+        return '\n'.join(lines) + '\n'
+
+    def _render_samples(self, lines, name, kind, help_text, samples):
+        full_name = f'{self.prefix}_{name}'
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{full_name}{_format_labels(labels)} {_format_value(value)}')
+
+    def _render_histograms(self, lines, name, help_text, samples):
+        full_name = f'{self.prefix}_{name}'
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} histogram')
+        for labels, histogram in samples:
+            for bound, count in histogram.cumulative():
+                lines.append(f'{full_name}_bucket{_format_labels({**labels, "le": bound})} {count}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {histogram.count}')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Any, List, Optional
+
+import requests
+
+from utils.transport import HttpTransport
+
+
+class NoHealthyNodeError(Exception):
+    """没有可用的 WinAppDriver 节点"""
+
+
+class _Node:
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True  # 首次探测前视为可用
+        self.pending = 0  # 正在启动应用的会话数
+        self.latency = None  # 最近命令耗时的指数加权平均（秒）
+        self.probe_latency = None  # 最近 /status 探测耗时的指数加权平均（秒），不参与评分
+        self.last_probe = None
+        self.consecutive_failures = 0
+
+        # 统计信息
+        self.assigned = 0
+        self.probes = 0
+        self.probe_failures = 0
+
+
+class NodeRouter:
+    def __init__(self, urls: List[str], transport: HttpTransport, session_counter: Callable[[], Counter],
+                 probe_interval: float = 10.0, probe_timeout: float = 2.0, failure_threshold: int = 2,
+                 latency_alpha: float = 0.3):
+        """
+        初始化 WinAppDriver 节点路由：新会话分配到负载最低的可用节点
+
+        :param urls: WinAppDriver 节点地址列表
+        :param transport: HTTP 传输层，用于探测节点并统计各节点的命令耗时
+        :param session_counter: 返回各节点当前会话数的函数 (节点地址 -> 会话数)
+        :param probe_interval: /status 探测间隔（秒），0 表示不探测
+        :param probe_timeout: 探测超时（秒）
+        :param failure_threshold: 连续探测失败多少次后标记为不可用
+        :param latency_alpha: 命令耗时平均的平滑系数，越大越偏向最近的请求
+        """
+        if not urls:
+            raise ValueError("At least one WinAppDriver node is required")
+
+        self.transport = transport
+        self.session_counter = session_counter
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.latency_alpha = latency_alpha
+
+        self._nodes: Dict[str, _Node] = {}
+        for url in urls:
+            url = url.rstrip('/')
+            self._nodes[url] = _Node(url)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._probing = threading.local()  # 探测请求由本线程发出时为 True，观察者据此跳过
+
+        transport.add_observer(self._observe)
+        self._prober: Optional[threading.Thread] = None
+        if probe_interval and len(self._nodes) > 1:
+            self._prober = threading.Thread(target=self._run_probes, name='node-prober', daemon=True)
+            self._prober.start()
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._nodes)
+
+    def acquire(self) -> str:
+        """
+        选择负载最低的可用节点：按 (会话数 + 1) × 最近命令耗时 评分，评分相同时选择会话数少的节点
+
+        调用方启动应用后需调用 settle() 释放预占的名额
+
+        :return: 节点地址
+        :raises NoHealthyNodeError: 所有节点都不可用
+        """
+        counts = self.session_counter()
+        with self._lock:
+            healthy = [node for node in self._nodes.values() if node.healthy]
+            if not healthy:
+                raise NoHealthyNodeError("No healthy WinAppDriver node available")
+
+            # 没有耗时数据的节点使用已知节点的平均值，避免新节点被过度或完全不分配
+            known = [node.latency for node in healthy if node.latency is not None]
+            default_latency = sum(known) / len(known) if known else 0.0
+
+            def score(node):
+                sessions = counts.get(node.url, 0) + node.pending
+                latency = node.latency if node.latency is not None else default_latency
+                return (sessions + 1) * (latency + 0.001), sessions
+
+            node = min(healthy, key=score)
+            node.pending += 1
+            node.assigned += 1
+            return node.url
+
+    def settle(self, url: str):
+        """
+        应用启动完成（或失败）后释放 acquire() 预占的名额
+        """
+        with self._lock:
+            node = self._nodes.get(url)
+            if node is not None and node.pending > 0:
+                node.pending -= 1
+
+    def probe(self):
+        """
+        探测所有节点的 /status
+        """
+        for node in list(self._nodes.values()):
+            start = time.perf_counter()
+            self._probing.active = True
+            try:
+                response = self.transport.get(f"{node.url}/status", timeout=self.probe_timeout)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            finally:
+                self._probing.active = False
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                node.probes += 1
+                node.last_probe = time.time()
+                if ok:
+                    node.probe_latency = self._average(node.probe_latency, elapsed)
+                    node.consecutive_failures = 0
+                    node.healthy = True
+                else:
+                    node.probe_failures += 1
+                    node.consecutive_failures += 1
+                    if node.consecutive_failures >= self.failure_threshold:
+                        node.healthy = False
+
+    def shutdown(self):
+        self._stopped.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取每个节点的健康状态、会话数与最近命令耗时
+        """
+        counts = self.session_counter()
+        with self._lock:
+            return {
+                'probeInterval': self.probe_interval,
+                'nodes': {
+                    url: {
+                        'healthy': node.healthy,
+                        'sessions': counts.get(url, 0),
+                        'pending': node.pending,
+                        'assigned': node.assigned,
+                        'latencyMs': round(node.latency * 1000, 3) if node.latency is not None else None,
+                        'probeLatencyMs': round(node.probe_latency * 1000, 3) if node.probe_latency is not None else None,
+                        'lastProbe': node.last_probe,
+                        'probes': node.probes,
+                        'probeFailures': node.probe_failures
+                    }
+                    for url, node in self._nodes.items()
+                }
+            }
+
+    def _observe(self, method: str, url: str, elapsed: float, error: bool):
+        # 创建会话需要等待应用启动，探测只是空闲的 /status 往返，耗时都不代表节点的命令延迟
+        if (method == 'POST' and url.endswith('/session')) or getattr(self._probing, 'active', False):
+            return
+        for node_url, node in self._nodes.items():
+            if url.startswith(node_url + '/'):
+                with self._lock:
+                    if not error:
+                        node.latency = self._average(node.latency, elapsed)
+                return
+
+    def _average(self, average: Optional[float], elapsed: float) -> float:
+        if average is None:
+            return elapsed
+        return average + self.latency_alpha * (elapsed - average)
+
+    def _run_probes(self):
+        while True:
+            try:
+                self.probe()
+            except Exception:
+                pass
+            if self._stopped.wait(self.probe_interval):
+                return
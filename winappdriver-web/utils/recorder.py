@@ -0,0 +1,394 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RECORDING_VERSION = 1
+
+RECORDING_SUFFIX = '.jsonl'
+
+# 录制的操作；find / wait 回放时同样等待元素，click / sendKeys / clear 回放前等待元素可用
+RECORDED_ACTIONS = ('find', 'click', 'sendKeys', 'clear', 'wait')
+
+NAME_PATTERN = re.compile(r'^[\w.-]{1,100}$')
+
+logger = logging.getLogger(__name__)
+
+
+class RecordingError(Exception):
+    """录制状态错误（重复开始、未在录制或文件不存在）"""
+
+
+def locator_for(client, element_id: str) -> Optional[Tuple[str, str]]:
+    """
+    根据元素 ID 找回定位器：优先使用元素缓存中查找该元素时的定位器，其次使用快照中的 AutomationId / Name
+
+    :return: (strategy, locator)，无法确定时返回 None
+    """
+    cache_key = client.element_cache.key_for(element_id)
+    if cache_key:
+        strategy, locator = cache_key.split(':', 1)
+        return strategy, locator
+    snapshot = client.snapshot
+    element = snapshot.get_element(element_id) if snapshot is not None else None
+    if element is not None:
+        if element.get('AutomationId'):
+            return 'accessibility id', element.get('AutomationId')
+        if element.get('Name'):
+            return 'name', element.get('Name')
+    return None
+
+
+class Recording:
+    def __init__(self, path: str, session_id: str, app_path: Optional[str]):
+        """
+        单个会话的录制文件，第一行为文件头，之后每个操作一行，写入后立即刷新
+
+        :param path: 文件路径
+        :param session_id: 会话 ID
+        :param app_path: 应用路径（回放时创建会话使用）
+        """
+        self.path = path
+        self.started = time.monotonic()
+        self.events = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({
+            'type': 'header',
+            'version': RECORDING_VERSION,
+            'appPath': app_path,
+            'sessionId': session_id,
+            'recordedAt': time.strftime('%Y-%m-%dT%H:%M:%S')
+        })
+
+    def append(self, event: Dict[str, Any]):
+        with self._lock:
+            # 相对时间仅供参考，回放时不按录制的间隔等待
+            self._write({'t': round(time.monotonic() - self.started, 3), **event})
+            self.events += 1
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def close(self) -> Dict[str, Any]:
+        with self._lock:
+            self._file.close()
+        return {
+            'name': os.path.basename(self.path)[:-len(RECORDING_SUFFIX)],
+            'events': self.events,
+            'durationSeconds': round(time.monotonic() - self.started, 3)
+        }
+
+
+class SessionRecorder:
+    def __init__(self, directory: str):
+        """
+        按会话录制控制台发出的命令（定位器、操作、输入和相对时间），保存为 JSONL
+
+        :param directory: 录制文件目录
+        """
+        self.directory = directory
+        self._recordings: Dict[str, Recording] = {}
+        self._lock = threading.Lock()
+        self.errors = 0  # 写入失败而丢弃的操作数
+
+    def path(self, name: str) -> str:
+        if not NAME_PATTERN.match(name or ''):
+            raise ValueError(f"Invalid recording name: {name}")
+        return os.path.join(self.directory, name + RECORDING_SUFFIX)
+
+    def start(self, session_id: str, app_path: Optional[str] = None, name: Optional[str] = None) -> str:
+        """
+        开始录制会话
+
+        :param name: 录制名称，默认按时间生成；同名文件会被覆盖
+        :return: 录制名称
+        """
+        name = name or f"recording-{time.strftime('%Y%m%d-%H%M%S')}-{session_id[:8]}"
+        path = self.path(name)
+        with self._lock:
+            if session_id in self._recordings:
+                raise RecordingError("Session is already being recorded")
+            os.makedirs(self.directory, exist_ok=True)
+            self._recordings[session_id] = Recording(path, session_id, app_path)
+        return name
+
+    def stop(self, session_id: str) -> Dict[str, Any]:
+        """
+        停止录制
+
+        :return: {name, events, durationSeconds}
+        """
+        with self._lock:
+            recording = self._recordings.pop(session_id, None)
+        if recording is None:
+            raise RecordingError("Session is not being recorded")
+        return recording.close()
+
+    def is_recording(self, session_id: str) -> bool:
+        return session_id in self._recordings
+
+    def record(self, session_id: str, client, action: str, element_id: Optional[str] = None,
+               strategy: Optional[str] = None, locator: Optional[str] = None, **fields):
+        """
+        记录一个成功执行的操作（会话未在录制时忽略）
+
+        录制只是附带功能：写入失败（磁盘错误、与 stop() 关闭文件同时发生等）时记录日志并丢弃该操作，
+        不影响已经执行成功的操作的响应。
+
+        :param client: 会话的 WinAppDriverClient，用于将元素 ID 转换为定位器
+        :param action: 见 RECORDED_ACTIONS
+        :param element_id: 操作的元素 ID（没有定位器时使用）
+        :param fields: 其他字段，如 text、condition、match
+        """
+        recording = self._recordings.get(session_id)
+        if recording is None:
+            return
+        try:
+            self._append(recording, client, action, element_id, strategy, locator, fields)
+        except Exception:
+            self.errors += 1
+            logger.warning("Failed to record %s for session %s", action, session_id, exc_info=True)
+
+    def _append(self, recording: Recording, client, action: str, element_id: Optional[str],
+                strategy: Optional[str], locator: Optional[str], fields: Dict[str, Any]):
+        if not (strategy and locator) and element_id:
+            found = locator_for(client, element_id)
+            if found is not None:
+                strategy, locator = found
+        event = {'action': action}
+        if strategy and locator:
+            event['strategy'] = strategy
+            event['locator'] = locator
+        elif element_id:
+            # 无法确定定位器，回放时只能按原元素 ID 尝试
+            event['elementId'] = element_id
+        event.update({key: value for key, value in fields.items() if value is not None})
+        recording.append(event)
+
+    def record_batch(self, session_id: str, client, steps: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+        """
+        记录批量执行中成功的步骤，元素引用 ($别名 / $序号) 按执行结果还原
+        """
+        if not self.is_recording(session_id):
+            return
+        try:
+            self._record_steps(session_id, client, steps, results)
+        except Exception:
+            self.errors += 1
+            logger.warning("Failed to record batch for session %s", session_id, exc_info=True)
+
+    def _record_steps(self, session_id: str, client, steps: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+        refs = {}
+        for index, (step, result) in enumerate(zip(steps, results)):
+            if result.get('status') != 'success':
+                continue
+            action = step.get('action')
+            element = step.get('element')
+            # 每个成功的步骤都返回实际操作的元素 ID（元素失效重新查找后与引用的 ID 不同）
+            value = result.get('value')
+            if value is not None:
+                if element and action != 'find':
+                    stale = refs.get(element[1:]) if element.startswith('$') else element
+                    refs.update({key: value for key, ref in refs.items() if ref == stale})
+                refs[str(index)] = value
+                if step.get('as'):
+                    refs[step['as']] = value
+                element_id = value
+            else:
+                element_id = refs.get(element[1:]) if element and element.startswith('$') else element
+            fields = {'text': step.get('text')}
+            if action == 'wait':
+                fields.update(condition=step.get('condition', 'present'), match=step.get('match'),
+                              stableFor=step.get('stableFor'))
+            self.record(session_id, client, action, element_id=element_id,
+                        strategy=step.get('strategy'), locator=step.get('locator'), **fields)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        列出已保存的录制
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        recordings = []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(RECORDING_SUFFIX):
+                path = os.path.join(self.directory, filename)
+                recordings.append({
+                    'name': filename[:-len(RECORDING_SUFFIX)],
+                    'bytes': os.path.getsize(path),
+                    'modified': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(os.path.getmtime(path)))
+                })
+        return recordings
+
+    def load(self, name: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        path = self.path(name)
+        if not os.path.isfile(path):
+            raise RecordingError(f"Recording not found: {name}")
+        return load_recording(path)
+
+    def shutdown(self):
+        with self._lock:
+            recordings, self._recordings = list(self._recordings.values()), {}
+        for recording in recordings:
+            recording.close()
+
+
+def load_recording(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    读取录制文件
+
+    :return: (文件头, 操作列表)
+    :raises ValueError: 某一行不是有效的 JSON 或不是有效的操作（错误信息包含行号）
+    """
+    header, events = {}, []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON at line {line_number}: {e}")
+            if not isinstance(record, dict):
+                raise ValueError(f"Invalid record at line {line_number}: expected an object")
+            if record.get('type') == 'header':
+                header = record
+                continue
+            error = validate_event(record)
+            if error:
+                raise ValueError(f"Invalid event at line {line_number}: {error}")
+            events.append(record)
+    if header.get('version', RECORDING_VERSION) > RECORDING_VERSION:
+        raise RecordingError(f"Unsupported recording version: {header.get('version')}")
+    return header, events
+
+
+def validate_event(event: Dict[str, Any]) -> Optional[str]:
+    """
+    检查录制的操作能否回放
+
+    :return: 错误信息，有效时返回 None
+    """
+    action = event.get('action')
+    if action not in RECORDED_ACTIONS:
+        return f"unsupported action: {action}"
+    if event.get('locator') and not event.get('strategy'):
+        return f"{action} has a locator but no strategy"
+    return None
+
+
+def compile_steps(events: List[Dict[str, Any]], wait_timeout: float = 10.0) -> List[Dict[str, Any]]:
+    """
+    将录制的操作转换为批量执行步骤：不使用录制的时间间隔，而是在每个操作前等待元素就绪
+
+    - find 转换为等待元素出现
+    - click / sendKeys / clear 先等待元素可用，再对等待返回的元素执行操作
+    - wait 按录制的条件执行，期限使用 wait_timeout
+
+    :param events: 录制的操作
+    :param wait_timeout: 每次等待的期限（秒）
+    :return: execute_batch() 的步骤列表
+    """
+    steps = []
+    for index, event in enumerate(events):
+        action = event.get('action')
+        if action not in RECORDED_ACTIONS:
+            raise RecordingError(f"Unsupported recorded action: {action}")
+        error = validate_event(event)
+        if error:
+            raise ValueError(f"Invalid event {index}: {error}")
+        locator = {'strategy': event['strategy'], 'locator': event['locator']} if event.get('locator') else None
+
+        if action == 'wait':
+            step = {'action': 'wait', 'condition': event.get('condition', 'present'), 'timeout': wait_timeout}
+            for key in ('text', 'match', 'stableFor'):
+                if key in event:
+                    step[key] = event[key]
+            steps.append({**step, **(locator or {})})
+        elif action == 'find':
+            if locator is not None:
+                steps.append({'action': 'wait', 'condition': 'present', 'timeout': wait_timeout, **locator})
+        else:
+            if locator is not None:
+                steps.append({'action': 'wait', 'condition': 'enabled', 'timeout': wait_timeout,
+                              'as': 'target', **locator})
+                step = {'action': action, 'element': '$target'}
+            else:
+                step = {'action': action, 'element': event.get('elementId')}
+            if action == 'sendKeys':
+                step['text'] = event.get('text', '')
+            steps.append(step)
+    return steps
+
+
+class Replayer:
+    def __init__(self, acquire: Callable[[], Tuple[str, Any]], release: Callable[[str, Any], None],
+                 wait_timeout: float = 10.0):
+        """
+        回放录制的操作，多个回放可在不同会话上并行
+
+        :param acquire: 为一次回放提供会话，返回 (会话 ID, WinAppDriverClient)
+        :param release: 回放结束后释放会话 (会话 ID, 客户端)
+        :param wait_timeout: 每次等待元素就绪的期限（秒）
+        """
+        self.acquire = acquire
+        self.release = release
+        self.wait_timeout = wait_timeout
+
+    def replay(self, client, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        在一个会话上执行一次回放
+
+        :return: {status, steps, failedStep, error, elapsedMs}
+        """
+        start = time.perf_counter()
+        results = client.execute_batch(steps, stop_on_error=True)
+        failed = next((result for result in results if result['status'] == 'error'), None)
+        return {
+            'status': 'failed' if failed else 'passed',
+            'steps': len(steps),
+            'failedStep': failed['index'] if failed else None,
+            'error': failed['error'] if failed else None,
+            'elapsedMs': round((time.perf_counter() - start) * 1000, 3)
+        }
+
+    def run(self, events: List[Dict[str, Any]], runs: int = 1, parallel: int = 1) -> Dict[str, Any]:
+        """
+        执行 runs 次回放，最多 parallel 个会话同时进行
+
+        :return: {passed, failed, elapsedMs, runsPerMinute, runs: [...]}
+        """
+        steps = compile_steps(events, self.wait_timeout)
+
+        def run_once(index):
+            session_id = None
+            try:
+                session_id, client = self.acquire()
+            except Exception as e:
+                return {'run': index, 'status': 'error', 'error': f"Failed to create session: {e}"}
+            try:
+                return {'run': index, 'sessionId': session_id, **self.replay(client, steps)}
+            except Exception as e:
+                return {'run': index, 'sessionId': session_id, 'status': 'error', 'error': str(e)}
+            finally:
+                self.release(session_id, client)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, runs)), thread_name_prefix='replay') as executor:
+            results = list(executor.map(run_once, range(runs)))
+        elapsed = time.perf_counter() - start
+        passed = sum(1 for result in results if result['status'] == 'passed')
+        return {
+            'passed': passed,
+            'failed': len(results) - passed,
+            'elapsedMs': round(elapsed * 1000, 3),
+            'runsPerMinute': round(len(results) / elapsed * 60, 1) if elapsed else 0.0,
+            'runs': results
+        }
@@ -0,0 +1,189 @@
+import hashlib
+import queue
+import threading
+import time
+from typing import Callable, Optional, Dict, Any
+
+
+class StreamViewer:
+    def __init__(self):
+        """
+        单个观看者，只保留最新一帧；消费不及时时旧帧被丢弃
+        """
+        self.frames = queue.Queue(maxsize=1)
+        self.dropped = 0
+
+    def offer(self, frame: bytes) -> bool:
+        """
+        推送一帧
+
+        :return: 是否因观看者消费过慢而丢弃了旧帧
+        """
+        dropped = False
+        try:
+            self.frames.get_nowait()
+            self.dropped += 1
+            dropped = True
+        except queue.Empty:
+            pass
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            pass
+        return dropped
+
+    def next_frame(self, timeout: float) -> Optional[bytes]:
+        """
+        等待下一帧
+
+        :return: 帧数据，超时返回 None
+        """
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ScreenStreamer:
+    def __init__(self, capture: Callable[[], bytes], encode: Callable[[bytes, int], bytes],
+                 max_fps: float = 5.0, min_fps: float = 0.5, quality: int = 80, min_quality: int = 30):
+        """
+        初始化会话的屏幕推流：一个后台采集循环，多个观看者共享
+
+        :param capture: 采集原始截图的函数，返回 PNG 字节
+        :param encode: 编码函数 (原始字节, 质量) -> JPEG 字节
+        :param max_fps: 最大帧率
+        :param min_fps: 观看者积压时可降到的最小帧率
+        :param quality: 最高 JPEG 质量
+        :param min_quality: 观看者积压时可降到的最低 JPEG 质量
+        """
+        self.capture = capture
+        self.encode = encode
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.max_quality = quality
+        self.min_quality = min_quality
+
+        self.fps = max_fps
+        self.quality = quality
+        self._viewers = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._last_digest = None
+        self._last_frame: Optional[bytes] = None
+
+        # 统计信息
+        self.frames_captured = 0
+        self.frames_sent = 0
+        self.frames_unchanged = 0
+        self.capture_errors = 0
+        self.encode_errors = 0
+
+    def subscribe(self) -> StreamViewer:
+        """
+        添加观看者，必要时启动采集循环
+
+        :return: 观看者对象
+        """
+        viewer = StreamViewer()
+        with self._lock:
+            if self._last_frame is not None:
+                viewer.offer(self._last_frame)
+            self._viewers.add(viewer)
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return viewer
+
+    def unsubscribe(self, viewer: StreamViewer):
+        """
+        移除观看者；没有观看者时采集循环自动退出
+        """
+        with self._lock:
+            self._viewers.discard(viewer)
+
+    def stop(self):
+        """
+        停止推流（会话关闭时调用）
+        """
+        with self._lock:
+            self._stopped = True
+            self._viewers.clear()
+
+    @property
+    def viewer_count(self) -> int:
+        return len(self._viewers)
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            # 循环因任何原因退出后清除线程，下一个观看者订阅时重新启动
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if self._stopped or not self._viewers:
+                    return
+                viewers = list(self._viewers)
+
+            started = time.monotonic()
+            try:
+                raw = self.capture()
+                self.frames_captured += 1
+            except Exception:
+                self.capture_errors += 1
+                time.sleep(1.0)
+                continue
+
+            # 画面未变化时不重新编码、不推送，观看者保留上一帧
+            digest = hashlib.sha1(raw).digest()
+            if digest == self._last_digest:
+                self.frames_unchanged += 1
+            else:
+                try:
+                    frame = self.encode(raw, self.quality)
+                except Exception:
+                    # 处理池繁忙等编码失败时跳过该帧，稍后重新采集
+                    self.encode_errors += 1
+                    time.sleep(1.0)
+                    continue
+                self._last_digest = digest
+                self._last_frame = frame
+                congested = False
+                for viewer in viewers:
+                    congested = viewer.offer(frame) or congested
+                self.frames_sent += 1
+                self._adapt(congested)
+
+            delay = 1.0 / self.fps - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def _adapt(self, congested: bool):
+        """
+        根据观看者积压情况调整帧率和质量：有积压时快速下降，顺畅时缓慢恢复
+        """
+        if congested:
+            self.fps = max(self.min_fps, self.fps * 0.7)
+            self.quality = max(self.min_quality, self.quality - 10)
+        else:
+            self.fps = min(self.max_fps, self.fps * 1.1)
+            self.quality = min(self.max_quality, self.quality + 2)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'viewers': self.viewer_count,
+            'running': self._thread is not None,
+            'fps': round(self.fps, 2),
+            'quality': self.quality,
+            'framesCaptured': self.frames_captured,
+            'framesSent': self.frames_sent,
+            'framesUnchanged': self.frames_unchanged,
+            'captureErrors': self.capture_errors,
+            'encodeErrors': self.encode_errors
+        }
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class ScreenshotCache:
+    def __init__(self, ttl: float = 1.0):
+        """
+        初始化截图结果缓存：短时间内相同参数的请求复用结果，并发的相同请求只触发一次采集
+
+        :param ttl: 缓存有效期（秒），0 表示只合并并发请求不缓存
+        """
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[Any, float, int]] = {}  # 键 -> (结果, 过期时间, 界面版本)
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_compute(self, key: Tuple[Hashable, ...], ui_version: int, compute: Callable[[], Any]) -> Any:
+        """
+        读取缓存，未命中时计算；同一键的并发请求等待同一次计算结果
+
+        :param key: 缓存键，第一个元素为会话 ID，其余为质量、尺寸、格式等参数
+        :param ui_version: 会话当前的界面版本号，点击/输入/清除后递增，旧版本的结果不再使用
+        :param compute: 采集并编码截图的函数
+        :return: 计算结果
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, version = entry
+                if version == ui_version and expires_at > time.monotonic():
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            if self.ttl:
+                with self._lock:
+                    self._purge_expired()
+                    self._entries[key] = (flight.result, time.monotonic() + self.ttl, ui_version)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, session_id: str):
+        """
+        清除会话的所有缓存结果
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == session_id]:
+                del self._entries[key]
+
+    def _purge_expired(self):
+        # 键中包含截图摘要，旧画面的结果不会再被访问，写入时顺带清理
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[1] <= now]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {
+                'ttl': self.ttl,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hitRatio': round((self.hits + self.coalesced) / requests, 4) if requests else 0.0
+            }
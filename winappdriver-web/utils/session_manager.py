@@ -0,0 +1,318 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.session_store import SessionStore
+
+
+class SessionManager:
+    def __init__(self, idle_timeout: float = 3600, max_sessions: int = 0,
+                 on_evict: Optional[Callable[[str, Any, str], None]] = None, reap_interval: Optional[float] = None,
+                 close: Optional[Callable[[Any], None]] = None, store: Optional[SessionStore] = None,
+                 restore: Optional[Callable[[Dict[str, Any]], Any]] = None, sync_interval: float = 5.0):
+        """
+        初始化会话管理器：记录每个会话的最后使用时间，后台回收空闲会话，并限制会话总数
+
+        :param idle_timeout: 空闲超时（秒），超过后自动关闭会话；0 表示不回收
+        :param max_sessions: 最大会话数，超出时关闭最久未使用的会话；0 表示不限制
+        :param on_evict: 会话被移除后的回调 (会话 ID, 客户端, 原因)，用于清理其他按会话存储的数据
+        :param reap_interval: 检查空闲会话的间隔（秒），默认为超时的四分之一（不超过 60 秒）
+        :param close: 关闭会话的函数 (客户端)，默认调用 quit()；使用预热池时改为归还到池中
+        :param store: 会话状态存储，客户端需实现 to_state()；共享存储中的会话可由其他进程创建、使用和关闭
+        :param restore: 根据存储的状态重建客户端的函数 (状态) -> 客户端
+        :param sync_interval: 会话使用期间向存储写回状态与最后使用时间的最短间隔（秒）
+        """
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.on_evict = on_evict
+        self.close = close
+        self.reap_interval = reap_interval or min(60.0, max(1.0, idle_timeout / 4))
+        self.store = store
+        self.restore = restore
+        self.sync_interval = sync_interval
+
+        self._sessions: 'OrderedDict[str, Any]' = OrderedDict()  # 按最后使用时间排序，最久未使用的在前
+        self._last_used: Dict[str, float] = {}
+        self._synced: Dict[str, float] = {}  # 会话 ID -> 最近一次写回存储的时间
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+        # 统计信息
+        self.created = 0
+        self.closed = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.restored = 0
+        self.closed_remotely = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._resolve(session_id, touch=False) is not None
+
+    def __getitem__(self, session_id: str):
+        """
+        获取会话客户端并刷新最后使用时间；本进程中没有时从共享存储重建
+        """
+        client = self._resolve(session_id)
+        if client is None:
+            raise KeyError(session_id)
+        return client
+
+    def get(self, session_id: str):
+        """
+        获取会话客户端并刷新最后使用时间，会话不存在时返回 None
+
+        使用共享存储时每次查找都会读取存储，请求处理中应只调用一次并复用返回的客户端，
+        而不是先用 in 判断再用 [] 获取。
+        """
+        return self._resolve(session_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def clients(self) -> list:
+        """
+        获取所有会话客户端的快照
+        """
+        with self._lock:
+            return list(self._sessions.values())
+
+    def touch(self, session_id: str) -> bool:
+        """
+        刷新会话的最后使用时间（如实时画面观看期间）
+
+        :return: 会话是否存在
+        """
+        client = self._resolve(session_id)
+        if client is None:
+            return False
+        self.sync(session_id)
+        return True
+
+    def sync(self, session_id: str, force: bool = False):
+        """
+        将会话状态（元素缓存）与最后使用时间写回存储；未达到写回间隔时跳过
+
+        :param session_id: 会话 ID
+        :param force: 忽略写回间隔
+        """
+        if self.store is None:
+            return
+        with self._lock:
+            client = self._sessions.get(session_id)
+            if client is None:
+                return
+            now = time.monotonic()
+            if not force and now - self._synced.get(session_id, 0.0) < self.sync_interval:
+                return
+            self._synced[session_id] = now
+        self.store.put(session_id, client.to_state())
+
+    def add(self, session_id: str, client):
+        """
+        添加会话；超出最大会话数时关闭最久未使用的会话（使用共享存储时参考存储中的最后使用时间）
+        """
+        with self._lock:
+            self._sessions[session_id] = client
+            self._touch(session_id)
+            self.created += 1
+        self.sync(session_id, force=True)
+        self._ensure_reaper()
+
+        while True:
+            with self._lock:
+                if not self.max_sessions or len(self._sessions) <= self.max_sessions:
+                    return
+                candidates = [(other_id, self._last_used[other_id])
+                              for other_id in self._sessions if other_id != session_id]
+            victim_id = self._lru_victim(candidates)
+            with self._lock:
+                victim = self._sessions.pop(victim_id, None)
+                if victim is None:
+                    continue
+                del self._last_used[victim_id]
+                self._synced.pop(victim_id, None)
+                self.evicted_lru += 1
+            self._close(victim_id, victim, 'lru')
+
+    def remove(self, session_id: str):
+        """
+        移除并关闭会话
+
+        :raises KeyError: 会话不存在
+        """
+        client = self[session_id]
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise KeyError(session_id)
+            del self._last_used[session_id]
+            self._synced.pop(session_id, None)
+            self.closed += 1
+        self._close(session_id, client, 'closed')
+
+    def reap(self) -> int:
+        """
+        关闭所有空闲超时的会话
+
+        :return: 关闭的会话数
+        """
+        if not self.idle_timeout:
+            return 0
+
+        deadline = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            for session_id, client in self._sessions.items():
+                if self._last_used[session_id] > deadline:
+                    break
+                expired.append((session_id, client))
+            for session_id, _ in expired:
+                del self._sessions[session_id]
+                del self._last_used[session_id]
+                self._synced.pop(session_id, None)
+
+        closed = 0
+        for session_id, client in expired:
+            if self.store is not None and self.store.shared:
+                # 其他进程仍在使用的会话只释放本地副本，需要时再从存储重建
+                last_used = self.store.last_used(session_id)
+                if last_used is None or last_used > time.time() - self.idle_timeout:
+                    self._forget(session_id, client)
+                    continue
+            with self._lock:
+                self.evicted_idle += 1
+            self._close(session_id, client, 'idle')
+            closed += 1
+        return closed
+
+    def shutdown(self):
+        """
+        停止后台回收并关闭所有会话
+        """
+        self._stopped.set()
+        with self._lock:
+            sessions = list(self._sessions.items())
+            self._sessions.clear()
+            self._last_used.clear()
+        for session_id, client in sessions:
+            self._close(session_id, client, 'shutdown')
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取会话数量统计
+        """
+        with self._lock:
+            now = time.monotonic()
+            oldest_idle = now - self._last_used[next(iter(self._sessions))] if self._sessions else 0.0
+            return {
+                'live': len(self._sessions),
+                'maxSessions': self.max_sessions,
+                'idleTimeout': self.idle_timeout,
+                'created': self.created,
+                'closed': self.closed,
+                'evicted': self.evicted_idle + self.evicted_lru,
+                'evictedIdle': self.evicted_idle,
+                'evictedLru': self.evicted_lru,
+                'restored': self.restored,
+                'closedRemotely': self.closed_remotely,
+                'store': self.store.stats() if self.store is not None else None,
+                'oldestIdleSeconds': round(oldest_idle, 3)
+            }
+
+    def _resolve(self, session_id: str, touch: bool = True):
+        with self._lock:
+            client = self._sessions.get(session_id)
+            if client is not None and (self.store is None or not self.store.shared):
+                if touch:
+                    self._touch(session_id)
+                return client
+        if self.store is None or not self.store.shared:
+            return None
+
+        # 共享存储中的会话可能已被其他进程关闭，或由其他进程创建
+        state = self.store.get(session_id)
+        if state is None:
+            if client is not None:
+                self._forget(session_id, client)
+                with self._lock:
+                    self.closed_remotely += 1
+            return None
+        if client is None:
+            if self.restore is None:
+                return None
+            client = self.restore(state)
+            with self._lock:
+                existing = self._sessions.get(session_id)
+                if existing is not None:
+                    client = existing
+                else:
+                    self._sessions[session_id] = client
+                    self._synced[session_id] = time.monotonic()
+                    self.restored += 1
+                self._touch(session_id)
+            self._ensure_reaper()
+        elif touch:
+            with self._lock:
+                if session_id in self._sessions:
+                    self._touch(session_id)
+        return client
+
+    def _lru_victim(self, candidates: List[Tuple[str, float]]) -> str:
+        """
+        选择最久未使用的会话
+
+        共享存储中的会话可能正在被其他进程使用，本进程的使用顺序不能代表真实的最后使用时间，
+        因此取本地与存储中最后使用时间的较晚者。
+
+        :param candidates: [(会话 ID, 本地最后使用时间 (monotonic))]，按本地最后使用时间排序
+        """
+        if self.store is None or not self.store.shared:
+            return candidates[0][0]
+        # 本地时间换算为 Unix 时间戳后与存储比较
+        offset = time.time() - time.monotonic()
+        return min(candidates, key=lambda candidate: max(candidate[1] + offset,
+                                                         self.store.last_used(candidate[0]) or 0.0))[0]
+
+    def _forget(self, session_id: str, client):
+        # 只移除本地副本，不关闭远程会话
+        with self._lock:
+            if self._sessions.get(session_id) is client:
+                del self._sessions[session_id]
+                del self._last_used[session_id]
+                self._synced.pop(session_id, None)
+        if self.on_evict is not None:
+            self.on_evict(session_id, client, 'forgotten')
+
+    def _touch(self, session_id: str):
+        self._last_used[session_id] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+    def _close(self, session_id: str, client, reason: str):
+        # 关闭失败（如应用已退出）时仍然清理关联数据
+        try:
+            if self.close is not None:
+                self.close(client)
+            else:
+                client.quit()
+        except Exception:
+            pass
+        if self.store is not None:
+            self.store.delete(session_id)
+        if self.on_evict is not None:
+            self.on_evict(session_id, client, reason)
+
+    def _ensure_reaper(self):
+        if not self.idle_timeout or self._reaper is not None:
+            return
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._run_reaper, name='session-reaper', daemon=True)
+                self._reaper.start()
+
+    def _run_reaper(self):
+        while not self._stopped.wait(self.reap_interval):
+            try:
+                self.reap()
+            except Exception:
+                pass
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class SessionStore(ABC):
+    """
+    会话状态存储：会话 ID -> 可重建 WinAppDriverClient 的状态 (WinAppDriver 地址、远程会话 ID、元素缓存)
+    """
+
+    # 是否在多个进程间共享；共享存储中的会话可能被其他进程关闭
+    shared = False
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取会话状态
+
+        :return: 状态，不存在时返回 None
+        """
+
+    @abstractmethod
+    def put(self, session_id: str, state: Dict[str, Any]):
+        """
+        写入会话状态并刷新最后使用时间
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """
+        删除会话状态
+        """
+
+    @abstractmethod
+    def last_used(self, session_id: str) -> Optional[float]:
+        """
+        获取会话的最后使用时间 (Unix 时间戳)
+
+        :return: 时间戳，不存在时返回 None
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """
+        存储统计信息
+        """
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self):
+        """
+        初始化进程内存储（单进程部署）
+        """
+        self._sessions: Dict[str, tuple] = {}  # 会话 ID -> (状态, 最后使用时间)
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry[0] if entry is not None else None
+
+    def put(self, session_id: str, state: Dict[str, Any]):
+        with self._lock:
+            self._sessions[session_id] = (state, time.time())
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def last_used(self, session_id: str) -> Optional[float]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry[1] if entry is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': 'memory', 'sessions': len(self._sessions)}
+
+
+class SqliteSessionStore(SessionStore):
+    shared = True
+
+    def __init__(self, path: str):
+        """
+        初始化 SQLite 存储，同一主机上的多个工作进程共享会话
+
+        :param path: 数据库文件路径
+        """
+        self.path = path
+        self._local = threading.local()  # 每个线程一个连接
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        connection = self._connection()
+        # WAL 模式下读写互不阻塞
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'session_id TEXT PRIMARY KEY, state TEXT NOT NULL, last_used REAL NOT NULL)'
+        )
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            'SELECT state FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, session_id: str, state: Dict[str, Any]):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO sessions (session_id, state, last_used) VALUES (?, ?, ?)',
+            (session_id, json.dumps(state), time.time())
+        )
+
+    def delete(self, session_id: str):
+        self._connection().execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def last_used(self, session_id: str) -> Optional[float]:
+        row = self._connection().execute(
+            'SELECT last_used FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        count = self._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        return {'backend': 'sqlite', 'path': self.path, 'sessions': count}
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # isolation_level=None 为自动提交，每条语句即一个事务
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+
+def create_session_store(url: str) -> SessionStore:
+    """
+    根据配置创建会话存储
+
+    :param url: "memory" 或 "sqlite:///路径"
+    :return: 会话存储
+    """
+    if not url or url == 'memory':
+        return MemorySessionStore()
+    if url.startswith('sqlite:///'):
+        return SqliteSessionStore(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported session store: {url}")
@@ -0,0 +1,132 @@
+import threading
+import xml.etree.ElementTree as ET
+from typing import Optional, Dict, Any, List, Tuple
+
+
+def flatten_tree(root: ET.Element) -> Dict[str, Dict[str, Any]]:
+    """
+    将控件树展开为按文档顺序排列的节点表
+
+    节点标识优先使用 RuntimeId；没有 RuntimeId 的节点使用 "父节点标识/标签[序号]"。
+
+    :param root: 控件树根节点
+    :return: 节点标识 -> {tag, attrs, parent, after}，after 为前一个兄弟节点的标识
+    """
+    nodes = {}
+    last_child: Dict[str, str] = {}  # 父节点标识 -> 已遍历的最后一个子节点标识
+
+    # 非递归的先序遍历，很深的控件树不受递归深度限制
+    stack = [(root, None, 0)]
+    while stack:
+        element, parent_id, index = stack.pop()
+        if parent_id is None:
+            node_id = root.get('RuntimeId') or f"/{root.tag}"
+        else:
+            node_id = element.get('RuntimeId')
+            if not node_id or node_id in nodes:
+                node_id = f"{parent_id}/{element.tag}[{index}]"
+        nodes[node_id] = {
+            'id': node_id,
+            'tag': element.tag,
+            'attrs': dict(element.attrib),
+            'parent': parent_id,
+            'after': last_child.get(parent_id) if parent_id is not None else None
+        }
+        if parent_id is not None:
+            last_child[parent_id] = node_id
+
+        tag_counts = {}
+        children = []
+        for child in element:
+            child_index = tag_counts.get(child.tag, 0)
+            tag_counts[child.tag] = child_index + 1
+            children.append((child, node_id, child_index))
+        stack.extend(reversed(children))
+    return nodes
+
+
+def diff_trees(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, List]:
+    """
+    计算两棵展开后控件树之间的结构差异
+
+    前端按以下顺序应用即可得到新的控件树：
+
+    1. 删除 removed 中的每个节点及其全部子孙节点；
+    2. 将 added 与 changed 按 seq（节点在新控件树中的文档顺序）合并后依次处理：
+       added 新建节点，changed 带 parent 时连同子树移动；节点放在 parent 下 after 之后，after 为 null 时作为第一个子节点；
+       changed 带 attrs 时整体替换属性。
+
+    被删除子树中仍然存在的节点（移出被删除的容器，或所在容器的控件类型改变）在第 1 步中随容器删除，
+    因此作为 added 返回完整节点，而不是 changed。
+
+    :param old: 上一次的节点表
+    :param new: 当前的节点表
+    :return: {added: [节点 + seq], removed: [节点标识], changed: [{id, seq, attrs?, parent?, after?}]}，
+             parent 与 after 总是同时返回
+    """
+    # 消失或控件类型改变的节点
+    gone = {node_id for node_id, node in old.items()
+            if node_id not in new or new[node_id]['tag'] != node['tag']}
+    # 仅返回最上层的删除节点；dropped 为随删除的子树一起被删掉的节点（节点表为文档顺序，父节点先于子节点）
+    removed = []
+    dropped = set()
+    for node_id, node in old.items():
+        if node['parent'] in dropped:
+            dropped.add(node_id)
+        elif node_id in gone:
+            removed.append(node_id)
+            dropped.add(node_id)
+
+    added = []
+    changed = []
+    for seq, (node_id, node) in enumerate(new.items()):
+        previous = old.get(node_id)
+        if previous is None or node_id in dropped:
+            added.append({**node, 'seq': seq})
+            continue
+
+        change = {}
+        if previous['attrs'] != node['attrs']:
+            change['attrs'] = node['attrs']
+        # 父节点或前一个兄弟节点变化（包括同一父节点下的重新排序）时都需要移动节点
+        if previous['parent'] != node['parent'] or previous['after'] != node['after']:
+            change['parent'] = node['parent']
+            change['after'] = node['after']
+        if change:
+            change['id'] = node_id
+            change['seq'] = seq
+            changed.append(change)
+
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+class SourceTracker:
+    def __init__(self):
+        """
+        保存会话最近一次返回给前端的控件树，用于生成增量差异
+        """
+        self.version = 0
+        self._nodes: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def update(self, root: ET.Element, since: Optional[int] = None) -> Tuple[int, Optional[Dict[str, List]]]:
+        """
+        记录新的控件树
+
+        :param root: 当前控件树根节点
+        :param since: 前端持有的版本号
+        :return: (当前版本号, 差异)；版本号不匹配时差异为 None，需要返回完整源码
+        """
+        nodes = flatten_tree(root)
+        with self._lock:
+            if self._nodes is None or since != self.version:
+                if self._nodes is None or nodes != self._nodes:
+                    self.version += 1
+                self._nodes = nodes
+                return self.version, None
+
+            diff = diff_trees(self._nodes, nodes)
+            if diff['added'] or diff['removed'] or diff['changed']:
+                self.version += 1
+                self._nodes = nodes
+            return self.version, diff
@@ -0,0 +1,106 @@
+import time
+import xml.etree.ElementTree as ET
+from typing import Optional, Dict, Any, List
+
+# 定位策略 -> 索引属性（ControlType 对应 XML 标签名）
+STRATEGY_ATTRIBUTES = {
+    'name': 'Name',
+    'accessibility id': 'AutomationId',
+    'class name': 'ClassName',
+    'tag name': 'ControlType'
+}
+
+INDEXED_ATTRIBUTES = ('Name', 'AutomationId', 'ClassName', 'ControlType')
+
+
+class SourceSnapshot:
+    def __init__(self, source: str, ui_version: int = 0):
+        """
+        解析一次 /source 返回的 XML，并对常用属性建立索引以便本地查找
+
+        WinAppDriver 的元素 ID 与控件的 RuntimeId 一致，因此本地命中后可直接返回 RuntimeId 作为元素 ID。
+
+        :param source: 页面源码 XML
+        :param ui_version: 生成快照时客户端的界面版本号
+        """
+        self.source = source
+        self.ui_version = ui_version
+        self.created_at = time.monotonic()
+
+        self.root = ET.fromstring(source)
+        # 包装一层根节点，使 "//Tag" 和 "/Tag" 形式的 XPath 也能匹配到根元素
+        self._document = ET.Element('document')
+        self._document.append(self.root)
+
+        self._indexes: Dict[str, Dict[str, List[ET.Element]]] = {attr: {} for attr in INDEXED_ATTRIBUTES}
+        self._by_runtime_id: Dict[str, ET.Element] = {}
+        self.node_count = 0
+
+        for element in self.root.iter():
+            self.node_count += 1
+            for attr in INDEXED_ATTRIBUTES:
+                value = element.tag if attr == 'ControlType' else element.get(attr)
+                if value:
+                    self._indexes[attr].setdefault(value, []).append(element)
+            runtime_id = element.get('RuntimeId')
+            if runtime_id:
+                self._by_runtime_id[runtime_id] = element
+
+    def age(self) -> float:
+        """
+        快照已存在的时间（秒）
+        """
+        return time.monotonic() - self.created_at
+
+    def find_all(self, strategy: str, locator: str) -> Optional[List[ET.Element]]:
+        """
+        在本地查找所有匹配的节点（文档顺序）
+
+        :param strategy: 查找策略 (name / accessibility id / class name / tag name / id / xpath)
+        :param locator: 查找定位器
+        :return: 匹配的节点列表；策略或 XPath 语法无法在本地处理时返回 None
+        """
+        if strategy in STRATEGY_ATTRIBUTES:
+            return list(self._indexes[STRATEGY_ATTRIBUTES[strategy]].get(locator, []))
+
+        if strategy == 'id':
+            element = self._by_runtime_id.get(locator)
+            return [element] if element is not None else []
+
+        if strategy == 'xpath':
+            if not locator.startswith('/'):
+                return None
+            try:
+                return self._document.findall('.' + locator)
+            except (SyntaxError, KeyError):
+                # ElementTree 仅支持 XPath 子集，其余交给服务端处理
+                return None
+
+        return None
+
+    def find(self, strategy: str, locator: str) -> Optional[str]:
+        """
+        在本地查找第一个匹配的元素
+
+        :param strategy: 查找策略
+        :param locator: 查找定位器
+        :return: 元素 ID (RuntimeId)，未命中时返回 None
+        """
+        elements = self.find_all(strategy, locator)
+        if not elements:
+            return None
+        return elements[0].get('RuntimeId') or None
+
+    def get_element(self, runtime_id: str) -> Optional[ET.Element]:
+        """
+        按 RuntimeId 获取节点
+        """
+        return self._by_runtime_id.get(runtime_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'nodes': self.node_count,
+            'ageSeconds': round(self.age(), 3),
+            'uiVersion': self.ui_version,
+            'sourceBytes': len(self.source)
+        }
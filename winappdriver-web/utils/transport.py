@@ -0,0 +1,150 @@
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpTransport:
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_hosts: int = 10):
+        """
+        初始化共享 HTTP 传输层（基于 requests.Session 的 keep-alive 连接池）
+
+        requests.Session 的 Cookie 与默认参数不是线程安全的，因此每个线程使用自己的 Session；
+        所有 Session 挂载同一个 HTTPAdapter，连接池（urllib3，线程安全）仍由所有线程共享。
+        同时请求同一地址的线程数超过 pool_size 时会临时新建连接，用完后丢弃，pool_size 应不小于工作线程数。
+
+        :param pool_size: 每个 WinAppDriver 地址保持的最大连接数
+        :param connect_timeout: 建立连接超时（秒）
+        :param read_timeout: 读取响应超时（秒），需大于 ms:waitForAppLaunch
+        :param max_hosts: 缓存连接池的 WinAppDriver 地址数量
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=pool_size)
+        self._local = threading.local()  # 每个线程一个 Session
+
+        # 统计信息
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._total_time = 0.0
+        self._observers = []
+
+    def add_observer(self, observer: Callable[[str, str, float, bool], None]):
+        """
+        注册请求完成后的回调 (方法, 地址, 耗时秒数, 是否出错)，如按节点统计命令延迟
+        """
+        self._observers.append(observer)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送请求，复用连接池中的连接
+
+        :param method: HTTP 方法
+        :param url: 请求地址
+        :return: 响应对象
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        error = False
+        try:
+            return self._session().request(method, url, **kwargs)
+        except requests.RequestException:
+            error = True
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._requests += 1
+                self._total_time += elapsed
+            for observer in self._observers:
+                observer(method, url, elapsed, error)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计信息
+
+        :return: 请求数、错误数、平均耗时以及每个地址的连接情况
+        """
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                'connectionsCreated': pool.num_connections,
+                'requests': pool.num_requests,
+                'idleConnections': pool.pool.qsize() if pool.pool is not None else 0
+            }
+
+        with self._lock:
+            return {
+                'poolSize': self.pool_size,
+                'connectTimeout': self.timeout[0],
+                'readTimeout': self.timeout[1],
+                'requests': self._requests,
+                'errors': self._errors,
+                'avgLatencyMs': round(self._total_time / self._requests * 1000, 3) if self._requests else 0.0,
+                'hosts': hosts
+            }
+
+    def close(self):
+        """
+        关闭所有连接
+        """
+        self._adapter.close()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+
+
+# 进程内共享的传输层，所有会话复用
+_shared_transport: Optional[HttpTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport() -> HttpTransport:
+    """
+    获取共享传输层（不存在时使用默认参数创建）
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
+
+
+def configure_shared_transport(**kwargs) -> HttpTransport:
+    """
+    使用指定参数重新创建共享传输层
+
+    :return: 新的共享传输层
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is not None:
+            _shared_transport.close()
+        _shared_transport = HttpTransport(**kwargs)
+        return _shared_transport
@@ -0,0 +1,200 @@
+import hashlib
+import random
+import re
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+# 支持的等待条件
+WAIT_CONDITIONS = (
+    'present',          # 元素存在
+    'visible',          # 元素存在且可见
+    'enabled',          # 元素存在且可用
+    'text',             # 元素文本匹配
+    'screenshotStable'  # 截图在指定时间内不再变化（动画、加载结束）
+)
+
+# 文本匹配方式
+TEXT_MATCH_MODES = ('equals', 'contains', 'regex')
+
+
+class WaitTimeoutError(Exception):
+    def __init__(self, description: str, timeout: float, attempts: int, last_error: Optional[BaseException] = None):
+        """
+        等待条件在期限内未满足
+
+        :param description: 条件描述
+        :param timeout: 等待期限（秒）
+        :param attempts: 检查次数
+        :param last_error: 最后一次检查时的异常
+        """
+        message = f"Timed out after {timeout}s waiting for {description} ({attempts} attempts)"
+        if last_error is not None:
+            message += f": {last_error}"
+        super().__init__(message)
+        self.timeout = timeout
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+def backoff_intervals(initial: float = 0.05, maximum: float = 1.0, multiplier: float = 2.0, jitter: float = 0.5):
+    """
+    生成指数退避的轮询间隔
+
+    :param initial: 首次间隔（秒）
+    :param maximum: 最大间隔（秒）
+    :param multiplier: 每次增长倍数
+    :param jitter: 随机缩短的比例 (0-1)，避免多个等待同时请求服务端
+    """
+    interval = initial
+    while True:
+        yield interval * (1 - jitter * random.random())
+        interval = min(maximum, interval * multiplier)
+
+
+def wait_until(check: Callable[[], Any], timeout: float = 10.0, description: str = 'condition',
+               initial_interval: float = 0.05, max_interval: float = 1.0, multiplier: float = 2.0,
+               jitter: float = 0.5, ignored: Tuple[Type[BaseException], ...] = (Exception,)) -> Tuple[Any, int]:
+    """
+    轮询直到条件满足：首次立即检查，之后按指数退避加随机抖动等待，总时长不超过期限
+
+    :param check: 检查函数，返回真值表示条件满足；抛出 ignored 中的异常视为尚未满足
+    :param timeout: 等待期限（秒）
+    :param description: 条件描述，用于超时信息
+    :return: (检查函数的返回值, 检查次数)
+    :raises WaitTimeoutError: 期限内条件未满足
+    """
+    deadline = time.monotonic() + timeout
+    intervals = backoff_intervals(initial_interval, max_interval, multiplier, jitter)
+    attempts = 0
+    last_error = None
+    while True:
+        attempts += 1
+        try:
+            value = check()
+            if value:
+                return value, attempts
+            last_error = None
+        except ignored as e:
+            last_error = e
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WaitTimeoutError(description, timeout, attempts, last_error)
+        time.sleep(min(next(intervals), remaining))
+
+
+def element_condition(client, condition: str, strategy: str, locator: str, text: Optional[str] = None,
+                      match: str = 'equals', use_snapshot: bool = True) -> Callable[[], Optional[str]]:
+    """
+    构造元素条件的检查函数
+
+    :param client: WinAppDriverClient
+    :param condition: present / visible / enabled / text
+    :param strategy: 查找策略
+    :param locator: 定位器
+    :param text: text 条件的期望文本
+    :param match: 文本匹配方式，见 TEXT_MATCH_MODES
+    :param use_snapshot: 先在已有的页面源码快照中查找，找到时无需请求服务端
+    :return: 检查函数，条件满足时返回元素 ID
+    """
+    if not strategy or not locator:
+        raise ValueError("Wait condition requires strategy and locator")
+    if condition == 'text':
+        if text is None:
+            raise ValueError("Missing text for text condition")
+        if match not in TEXT_MATCH_MODES:
+            raise ValueError(f"Unsupported text match: {match}")
+        pattern = None
+        if match == 'regex':
+            try:
+                pattern = re.compile(text)
+            except re.error as e:
+                raise ValueError(f"Invalid regex {text!r}: {e}") from e
+
+    def find() -> Optional[str]:
+        if use_snapshot:
+            # 轮询期间只使用已有快照，不为每次检查重新获取整棵控件树
+            snapshot = client.get_snapshot(allow_refresh=False)
+            if snapshot is not None:
+                element_id = snapshot.find(strategy, locator)
+                if element_id:
+                    return element_id
+        return client.find_element(strategy, locator, use_snapshot=False)
+
+    def check() -> Optional[str]:
+        element_id = find()
+        if condition == 'present':
+            return element_id
+        if condition == 'visible':
+            return element_id if client.is_displayed(element_id) else None
+        if condition == 'enabled':
+            return element_id if client.is_enabled(element_id) else None
+
+        actual = client.get_element_text(element_id)
+        if match == 'equals':
+            matched = actual == text
+        elif match == 'contains':
+            matched = text in actual
+        else:
+            matched = pattern.search(actual) is not None
+        return element_id if matched else None
+
+    return check
+
+
+def screenshot_stable_condition(client, stable_for: float = 0.5) -> Callable[[], bool]:
+    """
+    构造截图稳定的检查函数：截图内容连续 stable_for 秒未变化时满足
+
+    :param client: WinAppDriverClient
+    :param stable_for: 需要保持不变的时长（秒）
+    :return: 检查函数
+    """
+    state = {'digest': None, 'since': 0.0}
+
+    def check() -> bool:
+        digest = hashlib.sha1(client.get_screenshot_bytes()).digest()
+        now = time.monotonic()
+        if digest != state['digest']:
+            state['digest'] = digest
+            state['since'] = now
+            return False
+        return now - state['since'] >= stable_for
+
+    return check
+
+
+def wait_for(client, condition: str, timeout: float = 10.0, strategy: Optional[str] = None,
+             locator: Optional[str] = None, text: Optional[str] = None, match: str = 'equals',
+             use_snapshot: bool = True, stable_for: float = 0.5, initial_interval: float = 0.05,
+             max_interval: float = 1.0) -> Dict[str, Any]:
+    """
+    等待条件满足
+
+    :param client: WinAppDriverClient
+    :param condition: 条件，见 WAIT_CONDITIONS
+    :param timeout: 等待期限（秒）
+    :return: {value: 元素 ID（元素条件）, attempts, elapsedMs}
+    :raises WaitTimeoutError: 期限内条件未满足
+    """
+    if condition not in WAIT_CONDITIONS:
+        raise ValueError(f"Unsupported wait condition: {condition}")
+
+    if condition == 'screenshotStable':
+        check = screenshot_stable_condition(client, stable_for)
+        description = f"screenshot stable for {stable_for}s"
+        # 稳定判断依赖采样间隔，最大间隔不超过稳定时长
+        max_interval = min(max_interval, stable_for / 2) if stable_for > 0 else max_interval
+    else:
+        check = element_condition(client, condition, strategy, locator, text=text, match=match,
+                                  use_snapshot=use_snapshot)
+        description = f"{condition} {strategy}={locator}"
+
+    start = time.perf_counter()
+    value, attempts = wait_until(check, timeout=timeout, description=description,
+                                 initial_interval=initial_interval, max_interval=max_interval)
+    return {
+        'value': value if isinstance(value, str) else None,
+        'attempts': attempts,
+        'elapsedMs': round((time.perf_counter() - start) * 1000, 3)
+    }
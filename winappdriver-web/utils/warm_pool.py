@@ -0,0 +1,217 @@
+import importlib
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+def load_reset_hook(path: Optional[str]) -> Optional[Callable[[Any], None]]:
+    """
+    按 "模块:函数" 格式加载重置钩子
+
+    :param path: 钩子路径，如 "hooks.calculator:reset"；为空时返回 None
+    :return: 钩子函数
+    """
+    if not path:
+        return None
+    module_name, _, attr = path.partition(':')
+    if not attr:
+        raise ValueError(f"Reset hook must be in 'module:function' format: {path}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class _AppPool:
+    def __init__(self, size: int):
+        self.size = size
+        self.idle = deque()
+        self.starting = 0
+        self.leased = 0
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.launched = 0
+        self.launch_failures = 0
+        self.resets = 0
+        self.replaced = 0
+        self.total_launch = 0.0
+
+
+class WarmSessionPool:
+    def __init__(self, launch: Callable[[str], Any], apps: Iterable[str] = (), size: int = 1,
+                 reset_hook: Optional[Callable[[Any], None]] = None, retry_delay: float = 5.0):
+        """
+        初始化预热会话池：为每个应用预先启动若干会话，创建会话时直接租用，后台自动补充
+
+        :param launch: 启动函数 (应用 ID) -> 已启动应用的客户端
+        :param apps: 需要预热的应用 ID
+        :param size: 每个应用保持的空闲会话数
+        :param reset_hook: 归还会话时重置应用状态的函数 (客户端)；为空或执行失败时关闭会话并重新启动
+        :param retry_delay: 启动失败后重试前的等待时间（秒）
+        """
+        self.launch = launch
+        self.size = size
+        self.reset_hook = reset_hook
+        self.retry_delay = retry_delay
+
+        self._pools: Dict[str, _AppPool] = {app_id: _AppPool(size) for app_id in apps if size > 0}
+        self._leased = set()  # 已租出客户端的 id()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._refiller: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        启动后台补充线程，开始预热会话
+        """
+        with self._condition:
+            if self._pools and self._refiller is None and not self._stopped:
+                self._refiller = threading.Thread(target=self._run_refill, name='warm-pool-refill', daemon=True)
+                self._refiller.start()
+
+    def lease(self, app_id: str) -> Optional[Any]:
+        """
+        租用一个已启动的会话，不等待
+
+        :param app_id: 应用 ID
+        :return: 客户端；该应用未预热或暂无空闲会话时返回 None，由调用方自行启动
+        """
+        with self._condition:
+            pool = self._pools.get(app_id)
+            if pool is None:
+                return None
+            if not pool.idle:
+                pool.misses += 1
+                return None
+            pool.hits += 1
+            pool.leased += 1
+            client = pool.idle.popleft()
+            self._leased.add(id(client))
+            # 通知补充线程启动新的会话
+            self._condition.notify_all()
+            return client
+
+    def release(self, app_id: str, client):
+        """
+        归还会话：重置成功且池未满时放回池中，否则关闭会话（由后台补充新会话）
+
+        :param app_id: 应用 ID
+        :param client: 客户端（也可以是未经租用、直接启动的客户端）
+        """
+        with self._condition:
+            pool = self._pools.get(app_id)
+            if id(client) in self._leased:
+                self._leased.discard(id(client))
+                if pool is not None:
+                    pool.leased -= 1
+
+        if pool is not None and self.reset_hook is not None and not self._stopped:
+            try:
+                self.reset_hook(client)
+                with self._condition:
+                    if len(pool.idle) + pool.starting < pool.size:
+                        pool.resets += 1
+                        pool.idle.append(client)
+                        return
+            except Exception:
+                pass
+
+        if pool is not None:
+            with self._condition:
+                pool.replaced += 1
+                self._condition.notify_all()
+        self._quit(client)
+
+    def idle_clients(self) -> list:
+        """
+        获取所有空闲会话客户端的快照
+        """
+        with self._condition:
+            return [client for pool in self._pools.values() for client in pool.idle]
+
+    def shutdown(self):
+        """
+        停止补充并关闭所有空闲会话
+        """
+        with self._condition:
+            self._stopped = True
+            clients = [client for pool in self._pools.values() for client in pool.idle]
+            for pool in self._pools.values():
+                pool.idle.clear()
+            self._condition.notify_all()
+        for client in clients:
+            self._quit(client)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取每个应用的空闲、启动中、已租用会话数与命中率
+        """
+        with self._condition:
+            apps = {}
+            for app_id, pool in self._pools.items():
+                requests = pool.hits + pool.misses
+                apps[app_id] = {
+                    'size': pool.size,
+                    'idle': len(pool.idle),
+                    'starting': pool.starting,
+                    'leased': pool.leased,
+                    'hits': pool.hits,
+                    'misses': pool.misses,
+                    'hitRatio': round(pool.hits / requests, 4) if requests else 0.0,
+                    'launched': pool.launched,
+                    'launchFailures': pool.launch_failures,
+                    'resets': pool.resets,
+                    'replaced': pool.replaced,
+                    'avgLaunchMs': round(pool.total_launch / pool.launched * 1000, 3) if pool.launched else 0.0
+                }
+            return {
+                'size': self.size,
+                'resetHook': self.reset_hook is not None,
+                'apps': apps
+            }
+
+    def _run_refill(self):
+        while True:
+            with self._condition:
+                app_id = self._next_deficit()
+                while app_id is None and not self._stopped:
+                    self._condition.wait()
+                    app_id = self._next_deficit()
+                if self._stopped:
+                    return
+                pool = self._pools[app_id]
+                pool.starting += 1
+
+            started = time.perf_counter()
+            try:
+                client = self.launch(app_id)
+            except Exception:
+                with self._condition:
+                    pool.starting -= 1
+                    pool.launch_failures += 1
+                    # 应用无法启动时避免连续重试
+                    self._condition.wait(self.retry_delay)
+                continue
+
+            with self._condition:
+                pool.starting -= 1
+                pool.launched += 1
+                pool.total_launch += time.perf_counter() - started
+                if not self._stopped:
+                    pool.idle.append(client)
+                    client = None
+            if client is not None:
+                self._quit(client)
+
+    def _next_deficit(self) -> Optional[str]:
+        # 选择空闲会话最少的应用优先补充
+        candidates = [(len(pool.idle) + pool.starting, app_id) for app_id, pool in self._pools.items()
+                      if len(pool.idle) + pool.starting < pool.size]
+        return min(candidates)[1] if candidates else None
+
+    @staticmethod
+    def _quit(client):
+        try:
+            client.quit()
+        except Exception:
+            pass
@@ -1,20 +1,63 @@
-import requests
 import json
 import base64
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
+from utils.transport import HttpTransport, get_shared_transport
+from utils.element_cache import ElementCache
+from utils.source_snapshot import SourceSnapshot
+from utils.waits import wait_for
+from utils.metrics import span
+
+# 创建会话时使用的能力配置
+DEFAULT_CAPABILITIES = {
+    "platformName": "Windows",
+    "deviceName": "WindowsPC",
+    "app": "Microsoft.WindowsCalculator_8wekyb3d8bbwe!App",
+    "ms:waitForAppLaunch": "10"  # 关键点：增加启动等待时间
+}
+
+# 页面源码快照的刷新策略
+SNAPSHOT_POLICIES = (
+    'off',      # 不使用快照，查找全部交给服务端
+    'passive',  # 仅使用 get_page_source 顺带生成且未过期的快照
+    'refresh'   # 快照过期时先重新获取 /source 再本地查找
+)
+
+# WebDriver 协议中元素失效的状态码
+STALE_ELEMENT_STATUS = 10
+
+# execute_batch 支持的操作
+BATCH_ACTIONS = ('find', 'click', 'sendKeys', 'clear', 'wait')
 
 class WinAppDriverClient:
-    def __init__(self, winappdriver_url: str, app_path: str = None):
+    def __init__(self, winappdriver_url: str, app_path: str = None, transport: Optional[HttpTransport] = None,
+                 cache_size: int = 256, cache_ttl: float = 30.0,
+                 snapshot_policy: str = 'passive', snapshot_max_age: float = 5.0):
         """
         初始化 WinAppDriver 客户端
         
         :param winappdriver_url: WinAppDriver 服务地址
         :param app_path: 要启动的应用程序路径
+        :param transport: HTTP 传输层，默认使用进程内共享的连接池
+        :param cache_size: 元素缓存的最大条目数
+        :param cache_ttl: 元素缓存的有效期（秒）
+        :param snapshot_policy: 页面源码快照的刷新策略，见 SNAPSHOT_POLICIES
+        :param snapshot_max_age: 快照的最长使用时间（秒）
         """
+        if snapshot_policy not in SNAPSHOT_POLICIES:
+            raise ValueError(f"Unsupported snapshot policy: {snapshot_policy}")
+        
         self.winappdriver_url = winappdriver_url.rstrip('/')
         self.app_path = app_path
+        self.transport = transport or get_shared_transport()
         self.session_id = None
-        self.element_cache = {}  # 缓存元素 ID
+        self.element_cache = ElementCache(max_size=cache_size, ttl=cache_ttl)  # 缓存元素 ID
+        self.snapshot_policy = snapshot_policy
+        self.snapshot_max_age = snapshot_max_age
+        self.snapshot: Optional[SourceSnapshot] = None
+        self.snapshot_hits = 0
+        self.snapshot_misses = 0
+        self.ui_version = 0  # 每次点击/输入/清除后递增，用于判断快照是否仍然有效
         
     def start_application(self) -> Dict[str, Any]:
         """
@@ -22,12 +65,7 @@ class WinAppDriverClient:
         
         :return: 会话响应
         """
-        capabilities = {
-            "platformName": "Windows",
-            "deviceName": "WindowsPC",
-            "app": "Microsoft.WindowsCalculator_8wekyb3d8bbwe!App",
-            "ms:waitForAppLaunch": "10"  # 关键点：增加启动等待时间
-        }
+        capabilities = dict(DEFAULT_CAPABILITIES)
         
         if not self.app_path:
             raise ValueError("Application path is required to start application")
@@ -36,7 +74,7 @@ class WinAppDriverClient:
         # "Content-Type": "application/json; charset=utf-8",
         # "Accept": "application/json"
         # }
-        response = requests.post(
+        response = self.transport.post(
             f"{self.winappdriver_url}/session",
             json={"desiredCapabilities": capabilities}
             # headers=headers 
@@ -55,12 +93,48 @@ class WinAppDriverClient:
         """
         if self.session_id:
             try:
-                requests.delete(f"{self.winappdriver_url}/session/{self.session_id}")
+                self.transport.delete(f"{self.winappdriver_url}/session/{self.session_id}")
             except:
                 pass  # 忽略关闭会话时的错误
             finally:
                 self.session_id = None
                 self.element_cache.clear()
+                self.snapshot = None
+    
+    def reset_state(self):
+        """
+        清除客户端缓存的元素与快照（应用状态被外部重置后调用）
+        """
+        self.element_cache.clear()
+        self.snapshot = None
+        self.ui_version += 1
+    
+    def to_state(self) -> Dict[str, Any]:
+        """
+        导出可在其他进程中重建客户端的会话状态（不含快照与统计信息）
+        
+        :return: 可 JSON 序列化的状态
+        """
+        return {
+            'winappdriverUrl': self.winappdriver_url,
+            'appPath': self.app_path,
+            'sessionId': self.session_id,
+            'elementCache': self.element_cache.export()
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], **kwargs) -> 'WinAppDriverClient':
+        """
+        根据 to_state() 导出的状态重建客户端，直接接管已有的远程会话
+        
+        :param state: 会话状态
+        :param kwargs: 其他构造参数（传输层、缓存与快照配置）
+        :return: 客户端
+        """
+        client = cls(state['winappdriverUrl'], app_path=state.get('appPath'), **kwargs)
+        client.session_id = state.get('sessionId')
+        client.element_cache.load(state.get('elementCache') or [])
+        return client
     
     def get_screenshot(self) -> str:
         """
@@ -71,14 +145,25 @@ class WinAppDriverClient:
         if not self.session_id:
             raise Exception("No active session")
             
-        response = requests.get(f"{self.winappdriver_url}/session/{self.session_id}/screenshot")
+        response = self.transport.get(f"{self.winappdriver_url}/session/{self.session_id}/screenshot")
         
         if response.status_code == 200:
-            data = response.json()
+            with span('decode'):
+                data = response.json()
             return data.get('value', '')
         else:
             raise Exception(f"Failed to get screenshot: {response.text}")
     
+    def get_screenshot_bytes(self) -> bytes:
+        """
+        获取屏幕截图的原始 PNG 字节
+        
+        :return: PNG 截图数据
+        """
+        screenshot = self.get_screenshot()
+        with span('decode'):
+            return base64.b64decode(screenshot)
+    
     def get_page_source(self) -> str:
         """
         获取当前页面的源码
@@ -88,20 +173,64 @@ class WinAppDriverClient:
         if not self.session_id:
             raise Exception("No active session")
             
-        response = requests.get(f"{self.winappdriver_url}/session/{self.session_id}/source")
+        response = self.transport.get(f"{self.winappdriver_url}/session/{self.session_id}/source")
         
         if response.status_code == 200:
-            data = response.json()
-            return data.get('value', '')
+            with span('decode'):
+                data = response.json()
+            source = data.get('value', '')
+            if self.snapshot_policy != 'off':
+                self._update_snapshot(source)
+            return source
         else:
             raise Exception(f"Failed to get page source: {response.text}")
     
-    def find_element(self, strategy: str, locator: str) -> str:
+    def refresh_snapshot(self) -> SourceSnapshot:
+        """
+        重新获取页面源码并生成快照
+        
+        :return: 新的快照
+        """
+        source = self.get_page_source()
+        if self.snapshot is None or self.snapshot.source is not source:
+            self._update_snapshot(source)
+        return self.snapshot
+    
+    def get_snapshot(self, allow_refresh: bool = True) -> Optional[SourceSnapshot]:
+        """
+        按刷新策略获取可用的快照
+        
+        :param allow_refresh: refresh 策略下是否允许重新获取页面源码（轮询等待时只使用已有快照）
+        :return: 未过期且界面未变化的快照，不可用时返回 None
+        """
+        if self.snapshot_policy == 'off':
+            return None
+        
+        snapshot = self.snapshot
+        if (snapshot is not None and snapshot.ui_version == self.ui_version
+                and snapshot.age() <= self.snapshot_max_age):
+            return snapshot
+        if self.snapshot_policy == 'refresh' and allow_refresh:
+            return self.refresh_snapshot()
+        return None
+    
+    def _update_snapshot(self, source: str):
+        try:
+            with span('decode'):
+                self.snapshot = SourceSnapshot(source, ui_version=self.ui_version)
+        except Exception:
+            # 无法解析的源码不影响原有调用
+            self.snapshot = None
+    
+    def find_element(self, strategy: str, locator: str, use_snapshot: bool = True) -> str:
         """
         查找元素
         
+        依次查找元素缓存、本地页面源码快照，均未命中时才请求 WinAppDriver。
+        
         :param strategy: 查找策略 (e.g., "name", "id", "xpath")
         :param locator: 查找定位器
+        :param use_snapshot: 是否允许使用本地快照查找
         :return: 元素 ID
         """
         if not self.session_id:
@@ -111,10 +240,21 @@ class WinAppDriverClient:
         cache_key = f"{strategy}:{locator}"
         
         # 检查缓存
-        if cache_key in self.element_cache:
-            return self.element_cache[cache_key]
+        element_id = self.element_cache.get(cache_key)
+        if element_id:
+            return element_id
+        
+        # 本地快照查找
+        snapshot = self.get_snapshot() if use_snapshot else None
+        if snapshot is not None:
+            element_id = snapshot.find(strategy, locator)
+            if element_id:
+                self.snapshot_hits += 1
+                self.element_cache.put(cache_key, element_id)
+                return element_id
+            self.snapshot_misses += 1
             
-        response = requests.post(
+        response = self.transport.post(
             f"{self.winappdriver_url}/session/{self.session_id}/element",
             json={
                 "using": strategy,
@@ -127,61 +267,249 @@ class WinAppDriverClient:
             element_id = data.get('value', {}).get('ELEMENT')
             if element_id:
                 # 缓存元素 ID
-                self.element_cache[cache_key] = element_id
+                self.element_cache.put(cache_key, element_id)
                 return element_id
             else:
                 raise Exception("Element not found")
         else:
             raise Exception(f"Failed to find element: {response.text}")
     
-    def click_element(self, element_id: str):
+    def click_element(self, element_id: str) -> str:
         """
         点击元素
         
         :param element_id: 元素 ID
+        :return: 实际操作的元素 ID（元素失效并重新查找后会变化）
         """
-        if not self.session_id:
-            raise Exception("No active session")
-            
-        response = requests.post(
-            f"{self.winappdriver_url}/session/{self.session_id}/element/{element_id}/click"
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to click element: {response.text}")
+        return self._element_command(element_id, 'click', "Failed to click element")
     
-    def send_keys(self, element_id: str, text: str):
+    def send_keys(self, element_id: str, text: str) -> str:
         """
         发送文本到元素
         
         :param element_id: 元素 ID
         :param text: 要发送的文本
+        :return: 实际操作的元素 ID（元素失效并重新查找后会变化）
         """
-        if not self.session_id:
-            raise Exception("No active session")
-            
-        response = requests.post(
-            f"{self.winappdriver_url}/session/{self.session_id}/element/{element_id}/value",
-            json={
+        return self._element_command(
+            element_id, 'value', "Failed to send keys",
+            payload={
                 "value": list(text)  # WinAppDriver 期望字符列表
             }
         )
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to send keys: {response.text}")
 
-    def clear_element(self, element_id: str):
+    def clear_element(self, element_id: str) -> str:
         """
         清除元素内容
         
         :param element_id: 元素 ID
+        :return: 实际操作的元素 ID（元素失效并重新查找后会变化）
+        """
+        return self._element_command(element_id, 'clear', "Failed to clear element")
+    
+    def is_displayed(self, element_id: str) -> bool:
+        """
+        判断元素是否可见
+        
+        :param element_id: 元素 ID
+        :return: 是否可见
+        """
+        return bool(self._element_query(element_id, 'displayed', "Failed to get element visibility"))
+    
+    def is_enabled(self, element_id: str) -> bool:
+        """
+        判断元素是否可用
+        
+        :param element_id: 元素 ID
+        :return: 是否可用
+        """
+        return bool(self._element_query(element_id, 'enabled', "Failed to get element state"))
+    
+    def get_element_text(self, element_id: str) -> str:
+        """
+        获取元素文本
+        
+        :param element_id: 元素 ID
+        :return: 元素文本
+        """
+        return self._element_query(element_id, 'text', "Failed to get element text") or ''
+    
+    def _element_command(self, element_id: str, command: str, error_message: str,
+                         payload: Optional[Dict[str, Any]] = None) -> str:
+        """
+        执行元素命令；元素已失效且来自缓存时，重新查找并重试一次
         """
         if not self.session_id:
             raise Exception("No active session")
-            
-        response = requests.post(
-            f"{self.winappdriver_url}/session/{self.session_id}/element/{element_id}/clear"
-        )
+        
+        # 操作可能改变界面，之前的快照不再可信
+        self.ui_version += 1
+        element_id, response = self._element_request('POST', element_id, command, payload)
+        
+        if response.status_code != 200:
+            raise Exception(f"{error_message}: {response.text}")
+        return element_id
+    
+    def _element_query(self, element_id: str, name: str, error_message: str) -> Any:
+        """
+        读取元素属性（不改变界面），元素失效时同样重新查找并重试一次
+        """
+        if not self.session_id:
+            raise Exception("No active session")
+        
+        _, response = self._element_request('GET', element_id, name)
         
         if response.status_code != 200:
-            raise Exception(f"Failed to clear element: {response.text}")
+            raise Exception(f"{error_message}: {response.text}")
+        return response.json().get('value')
+    
+    def _element_request(self, method: str, element_id: str, command: str,
+                         payload: Optional[Dict[str, Any]] = None):
+        response = self.transport.request(
+            method, f"{self.winappdriver_url}/session/{self.session_id}/element/{element_id}/{command}",
+            json=payload
+        )
+        
+        if response.status_code != 200 and _is_stale_element(response):
+            cache_key = self.element_cache.invalidate_element(element_id)
+            if cache_key:
+                strategy, locator = cache_key.split(':', 1)
+                element_id = self.find_element(strategy, locator)
+                response = self.transport.request(
+                    method, f"{self.winappdriver_url}/session/{self.session_id}/element/{element_id}/{command}",
+                    json=payload
+                )
+        return element_id, response
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        """
+        获取页面源码快照的统计信息
+        """
+        lookups = self.snapshot_hits + self.snapshot_misses
+        return {
+            'policy': self.snapshot_policy,
+            'maxAge': self.snapshot_max_age,
+            'hits': self.snapshot_hits,
+            'misses': self.snapshot_misses,
+            'hitRatio': round(self.snapshot_hits / lookups, 4) if lookups else 0.0,
+            'current': self.snapshot.stats() if self.snapshot is not None else None
+        }
+
+    def execute_batch(self, steps: List[Dict[str, Any]], stop_on_error: bool = True) -> List[Dict[str, Any]]:
+        """
+        按顺序执行一组操作，减少调用方的往返次数
+        
+        每个步骤形如 {"action": "find", "strategy": "name", "locator": "One", "as": "one"}，
+        click/sendKeys/clear 通过 "element" 指定元素：可以是元素 ID、"$别名" 或 "$步骤序号"，
+        也可以直接给出 strategy/locator 先查找再操作。wait 步骤代替固定的等待时间，如
+        {"action": "wait", "condition": "enabled", "strategy": "name", "locator": "OK", "timeout": 5}，
+        元素条件满足后返回元素 ID。click/sendKeys/clear 返回实际操作的元素 ID：元素失效并重新查找后，
+        指向旧元素 ID 的 "$别名" / "$步骤序号" 同时更新为新的元素 ID。
+        
+        :param steps: 操作列表
+        :param stop_on_error: 出错后是否跳过剩余步骤
+        :return: 每个步骤的结果 (status/value/error/elapsedMs)
+        """
+        refs = {}
+        results = []
+        failed = False
+        
+        for index, step in enumerate(steps):
+            action = step.get('action')
+            result = {'index': index, 'action': action}
+            
+            if failed and stop_on_error:
+                result['status'] = 'skipped'
+                results.append(result)
+                continue
+            
+            start = time.perf_counter()
+            try:
+                value = self._execute_step(step, refs)
+                result['status'] = 'success'
+                if value is not None:
+                    result['value'] = value
+                    # 保存元素引用供后续步骤使用
+                    element = step.get('element')
+                    if element and action != 'find':
+                        # 元素失效后重新查找：指向旧元素 ID 的引用都更新为新的元素 ID
+                        stale = refs.get(element[1:]) if element.startswith('$') else element
+                        if stale != value:
+                            for key, ref in refs.items():
+                                if ref == stale:
+                                    refs[key] = value
+                    refs[str(index)] = value
+                    if step.get('as'):
+                        refs[step['as']] = value
+            except Exception as e:
+                result['status'] = 'error'
+                result['error'] = str(e)
+                failed = True
+            result['elapsedMs'] = round((time.perf_counter() - start) * 1000, 3)
+            results.append(result)
+        
+        return results
+    
+    def _execute_step(self, step: Dict[str, Any], refs: Dict[str, str]) -> str:
+        action = step.get('action')
+        if action not in BATCH_ACTIONS:
+            raise ValueError(f"Unsupported action: {action}")
+        
+        if action == 'find':
+            return self.find_element(step.get('strategy'), step.get('locator'))
+        if action == 'wait':
+            return wait_for(
+                self, step.get('condition', 'present'),
+                timeout=float(step.get('timeout', 10)),
+                strategy=step.get('strategy'),
+                locator=step.get('locator'),
+                text=step.get('text'),
+                match=step.get('match', 'equals'),
+                use_snapshot=step.get('useSnapshot', True),
+                stable_for=float(step.get('stableFor', 0.5))
+            )['value']
+        
+        element_id = self._resolve_element(step, refs)
+        if action == 'click':
+            return self.click_element(element_id)
+        if action == 'sendKeys':
+            if step.get('text') is None:
+                raise ValueError("Missing text for sendKeys")
+            return self.send_keys(element_id, step['text'])
+        return self.clear_element(element_id)
+    
+    def _resolve_element(self, step: Dict[str, Any], refs: Dict[str, str]) -> str:
+        element = step.get('element')
+        if element is None:
+            if step.get('strategy') and step.get('locator'):
+                return self.find_element(step['strategy'], step['locator'])
+            raise ValueError("Step requires element or strategy/locator")
+        
+        if element.startswith('$'):
+            if element[1:] not in refs:
+                raise ValueError(f"Unknown element reference: {element}")
+            return refs[element[1:]]
+        return element
+
+
+def _is_stale_element(response) -> bool:
+    """
+    判断响应是否表示元素已失效
+    """
+    return is_stale_element_text(response.text)
+
+
+def is_stale_element_text(text: str) -> bool:
+    """
+    根据响应文本判断元素是否已失效（同步与异步客户端共用）
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return 'stale element' in text
+    if not isinstance(data, dict):
+        return False
+    if data.get('status') == STALE_ELEMENT_STATUS:
+        return True
+    value = data.get('value')
+    return isinstance(value, dict) and value.get('error') == 'stale element reference'